@@ -0,0 +1,106 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+# Add the parent directory to the sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cover_agent.CoverageProcessor import CoverageProcessor
+
+
+def write_cobertura_report(report_path, num_classes, lines_per_class):
+    """
+    Write a synthetic Cobertura XML report with one class per source file, ten classes per package.
+    Every third line is reported as missed.
+    """
+    with open(report_path, "w") as report:
+        report.write('<?xml version="1.0" ?>\n<coverage version="7.4.0">\n  <packages>\n')
+        for i in range(num_classes):
+            if i % 10 == 0:
+                report.write(f'    <package name="pkg{i // 10}">\n      <classes>\n')
+            report.write(f'        <class name="module{i}.py" filename="pkg{i // 10}/module{i}.py">\n')
+            report.write("          <methods/>\n          <lines>\n")
+            for number in range(1, lines_per_class + 1):
+                hits = 0 if number % 3 == 0 else 1
+                report.write(f'            <line number="{number}" hits="{hits}"/>\n')
+            report.write("          </lines>\n        </class>\n")
+            if i % 10 == 9 or i == num_classes - 1:
+                report.write("      </classes>\n    </package>\n")
+        report.write("  </packages>\n</coverage>\n")
+
+
+def parse_with_element_tree(report_path, src_file_path):
+    """
+    The previous implementation: load the whole report with ET.parse, then search it.
+    """
+    tree = ET.parse(report_path)
+    root = tree.getroot()
+    lines_covered, lines_missed = [], []
+    filename = os.path.basename(src_file_path)
+    for cls in root.findall(".//class"):
+        name_attr = cls.get("filename")
+        if name_attr.endswith(filename):
+            for line in cls.findall(".//line"):
+                line_number = int(line.get("number"))
+                hits = int(line.get("hits"))
+                if hits > 0:
+                    lines_covered.append(line_number)
+                else:
+                    lines_missed.append(line_number)
+            break
+    return lines_covered, lines_missed
+
+
+def measure(parse, repeat):
+    """
+    Return the best wall time of 'parse' over 'repeat' runs, and its peak traced memory in a separate run.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    parse()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the parsing of a large Cobertura report.")
+    parser.add_argument("--classes", type=int, default=50000, help="Number of classes in the report (about 8 KB each with the default lines). Default: %(default)s.")
+    parser.add_argument("--lines-per-class", type=int, default=200, help="Number of lines per class. Default: %(default)s.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed parses. Default: %(default)s.")
+    parser.add_argument(
+        "--no-element-tree",
+        action="store_true",
+        help="Skip the ET.parse comparison, which holds the whole tree in memory: about 12 times the size of the report. Default: False.",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        report_path = os.path.join(tmp_dir, "coverage.xml")
+        write_cobertura_report(report_path, args.classes, args.lines_per_class)
+        report_mb = os.path.getsize(report_path) / (1024 * 1024)
+        print(f"Report: {args.classes} classes x {args.lines_per_class} lines, {report_mb:.1f} MB")
+
+        for position, target in (("first", 0), ("middle", args.classes // 2), ("last", args.classes - 1)):
+            src_file_path = os.path.join(tmp_dir, f"module{target}.py")
+            processor = CoverageProcessor(report_path, src_file_path, "cobertura")
+            stream_seconds, stream_peak = measure(processor.parse_coverage_report, args.repeat)
+            result = f"iterparse {stream_seconds * 1000:.1f} ms / {stream_peak / (1024 * 1024):.1f} MB peak"
+            if not args.no_element_tree:
+                tree_seconds, tree_peak = measure(
+                    lambda: parse_with_element_tree(report_path, src_file_path), args.repeat
+                )
+                result = f"ET.parse {tree_seconds * 1000:.1f} ms / {tree_peak / (1024 * 1024):.1f} MB peak, {result}"
+            print(f"Target class {position}: {result}")
+
+
+if __name__ == "__main__":
+    main()
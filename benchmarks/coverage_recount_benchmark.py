@@ -0,0 +1,89 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Add the parent directory to the sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cover_agent.CoverageProcessor import CoverageProcessor
+
+
+def write_jacoco_report(report_path, num_source_files, lines_per_file):
+    """
+    Write a synthetic JaCoCo XML report with one package and one source file per class.
+    Every third line is reported as missed.
+    """
+    with open(report_path, "w") as report:
+        report.write('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n')
+        report.write('<report name="benchmark">\n')
+        for i in range(num_source_files):
+            report.write(f'  <package name="com/example/pkg{i}">\n')
+            report.write(f'    <sourcefile name="Class{i}.java">\n')
+            missed = 0
+            for nr in range(1, lines_per_file + 1):
+                if nr % 3 == 0:
+                    missed += 1
+                    report.write(f'      <line nr="{nr}" mi="3" ci="0" mb="0" cb="0"/>\n')
+                else:
+                    report.write(f'      <line nr="{nr}" mi="0" ci="3" mb="0" cb="0"/>\n')
+            report.write(f'      <counter type="LINE" missed="{missed}" covered="{lines_per_file - missed}"/>\n')
+            report.write("    </sourcefile>\n")
+            report.write("  </package>\n")
+        report.write("</report>\n")
+
+
+def count_tokens(text):
+    """
+    Count tokens with tiktoken when its encoding is available locally, otherwise estimate 4 characters per token.
+    """
+    try:
+        import tiktoken
+
+        return len(tiktoken.get_encoding("cl100k_base").encode(text))
+    except Exception:
+        return len(text) // 4
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the per-iteration coverage recount.")
+    parser.add_argument("--source-files", type=int, default=500, help="Number of source files in the report. Default: %(default)s.")
+    parser.add_argument("--lines-per-file", type=int, default=200, help="Number of lines per source file. Default: %(default)s.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed parses. Default: %(default)s.")
+    parser.add_argument("--prefill-tokens-per-second", type=float, default=5000.0, help="Assumed LLM prompt processing throughput. Default: %(default)s.")
+    parser.add_argument("--llm-overhead-seconds", type=float, default=1.0, help="Assumed per-request latency of the LLM provider. Default: %(default)s.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        report_path = os.path.join(tmp_dir, "jacocoTestReport.xml")
+        write_jacoco_report(report_path, args.source_files, args.lines_per_file)
+
+        # Target the class in the middle of the report
+        target = args.source_files // 2
+        source_path = os.path.join(tmp_dir, f"Class{target}.java")
+        with open(source_path, "w") as source_file:
+            source_file.write(f"package com.example.pkg{target};\n\npublic class Class{target} {{\n}}\n")
+
+        processor = CoverageProcessor(report_path, source_path, "jacoco")
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            _, _, percentage = processor.parse_coverage_report()
+            timings.append(time.perf_counter() - start)
+
+        with open(report_path, "r") as report:
+            report_tokens = count_tokens(report.read())
+
+    parse_seconds = min(timings)
+    llm_seconds = args.llm_overhead_seconds + report_tokens / args.prefill_tokens_per_second
+
+    print(f"Report: {args.source_files} source files x {args.lines_per_file} lines, {report_tokens} tokens")
+    print(f"Parsed coverage: {round(percentage * 100, 2)}%")
+    print(f"CoverageProcessor parse (best of {args.repeat}): {parse_seconds * 1000:.1f} ms")
+    print(f"Estimated LLM recount (single attempt, no retries): {llm_seconds:.1f} s")
+    print(f"Estimated latency saved per iteration: {llm_seconds - parse_seconds:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import argparse
+import os
+import sys
+
+# Add the parent directory to the sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# The benchmark runs offline: use the model cost map bundled with litellm
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+from cover_agent.CoverageProcessor import CoverageProcessor
+from cover_agent.CoverageSummary import COVERAGE_FORMATS, format_coverage_summary
+from cover_agent.utils import count_tokens
+
+TEMPLATED_TESTS_DIR = os.path.join(os.path.dirname(__file__), "..", "templated_tests")
+COVERAGE_REPORTS_DIR = os.path.join(os.path.dirname(__file__), "coverage_reports")
+
+# The source files of the templated_tests projects, with their language and the Cobertura report of their tests in
+# COVERAGE_REPORTS_DIR, if any
+SOURCE_FILES = [
+    ("python_fastapi/app.py", "python", "python_fastapi_app.xml"),
+    ("go_webservice/app.go", "go", None),
+    ("js_vanilla/app.js", "javascript", None),
+    ("js_vanilla/ui.js", "javascript", None),
+    ("java_gradle/src/main/java/com/davidparry/cover/SimpleMathOperations.java", "java", None),
+    ("java_spring_calculator/src/main/java/com/example/calculator/service/CalculatorService.java", "java", None),
+]
+
+
+def make_large_source(num_functions):
+    lines = []
+    for i in range(num_functions):
+        lines += [f"def function_{i}(x):"] + [f"    x = x * {j} + 1" for j in range(12)] + ["    return x", "", ""]
+    return "\n".join(lines)
+
+
+def split_coverage(source):
+    """
+    A synthetic line coverage of the source file: its non-blank lines, missed in one block of 7 lines out of 3.
+    """
+    lines = [i + 1 for i, line in enumerate(source.split("\n")) if line.strip() and not line.strip().startswith(("#", "//", "*", "/*"))]
+    lines_missed = [line for line in lines if (line // 7) % 3 == 0]
+    lines_covered = [line for line in lines if (line // 7) % 3 != 0]
+    return lines_covered, lines_missed
+
+
+def read_coverage(source_path, source, report_name):
+    """
+    The line coverage of the source file, from its Cobertura report in COVERAGE_REPORTS_DIR, synthetic without a
+    report.
+    """
+    if report_name is not None:
+        report_path = os.path.join(COVERAGE_REPORTS_DIR, report_name)
+        lines_covered, lines_missed, _ = CoverageProcessor(report_path, source_path, "cobertura").parse_coverage_report()
+        return lines_covered, lines_missed, "reported"
+    return *split_coverage(source), "synthetic"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tokens of the coverage summary of the prompt, in each coverage format.")
+    parser.add_argument("--large-functions", type=int, default=300, help="Number of functions of the large synthetic Python source file. Default: %(default)s.")
+    parser.add_argument("--model", default="gpt-4o", help="Model of the token counts. Default: %(default)s.")
+    args = parser.parse_args()
+
+    sources = []
+    for relative_path, language, report_name in SOURCE_FILES:
+        source_path = os.path.join(TEMPLATED_TESTS_DIR, relative_path)
+        with open(source_path) as f:
+            source = f.read()
+        sources.append((relative_path, language, source, *read_coverage(source_path, source, report_name)))
+    large_source = make_large_source(args.large_functions)
+    sources.append(
+        (f"synthetic Python module ({args.large_functions} functions)", "python", large_source, *split_coverage(large_source), "synthetic")
+    )
+
+    for name, language, source, lines_covered, lines_missed, coverage_origin in sources:
+        percentage_covered = len(lines_covered) / max(len(lines_covered) + len(lines_missed), 1)
+        tokens = {
+            coverage_format: count_tokens(
+                format_coverage_summary(lines_covered, lines_missed, percentage_covered, coverage_format, source, language),
+                args.model,
+            )
+            for coverage_format in COVERAGE_FORMATS
+        }
+        results = ", ".join(
+            f"{coverage_format}: {count} ({count / tokens['lists']:.0%})" for coverage_format, count in tokens.items()
+        )
+        print(f"{name} ({len(lines_covered) + len(lines_missed)} lines with {coverage_origin} coverage)\n  tokens: {results}")
+
+
+if __name__ == "__main__":
+    main()
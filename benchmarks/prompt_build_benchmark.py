@@ -0,0 +1,69 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Add the parent directory to the sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# The benchmark runs offline: use the model cost map bundled with litellm
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+from cover_agent.PromptBuilder import PromptBuilder, clear_prompt_caches
+
+
+def write_files(directory, source_lines, test_lines):
+    source_path = os.path.join(directory, "app.py")
+    with open(source_path, "w") as f:
+        f.write("\n".join(f"def function_{i}(x):\n    return x + {i}\n" for i in range(source_lines // 3)))
+    test_path = os.path.join(directory, "test_app.py")
+    with open(test_path, "w") as f:
+        f.write("\n".join(f"def test_{i}():\n    assert function_{i}(0) == {i}\n" for i in range(test_lines // 3)))
+    # Files modified long ago, like the source file during a run
+    for path in (source_path, test_path):
+        os.utime(path, (1_000_000_000, 1_000_000_000))
+    return source_path, test_path
+
+
+def time_builds(source_path, test_path, iterations, cached, missed_lines):
+    """
+    Build the test generation prompt once per iteration, like UnitTestGenerator.build_prompt, with a new failed tests
+    section each time.
+    """
+    clear_prompt_caches()
+    start = time.perf_counter()
+    for i in range(iterations):
+        if not cached:
+            clear_prompt_caches()
+        PromptBuilder(
+            source_file_path=source_path,
+            test_file_path=test_path,
+            code_coverage_report="coverage_report",
+            failed_test_runs=f"Failed Test:\ntest_{i}\n",
+            missed_lines=missed_lines,
+        ).build_prompt()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the build time of the test generation prompt on large files.")
+    parser.add_argument("--source-lines", type=int, default=5000, help="Number of lines of the source file. Default: %(default)s.")
+    parser.add_argument("--test-lines", type=int, default=3000, help="Number of lines of the test file. Default: %(default)s.")
+    parser.add_argument("--iterations", type=int, default=20, help="Number of prompts built. Default: %(default)s.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source_path, test_path = write_files(directory, args.source_lines, args.test_lines)
+        for missed_lines in (None, [2]):
+            label = "sliced source" if missed_lines else "full source"
+            uncached = time_builds(source_path, test_path, args.iterations, False, missed_lines)
+            cached = time_builds(source_path, test_path, args.iterations, True, missed_lines)
+            print(
+                f"{label}: {uncached * 1000:.2f} ms per prompt without the caches, {cached * 1000:.2f} ms with the "
+                f"caches ({uncached / cached:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add the parent directory to the sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# The benchmark runs offline: use the model cost map bundled with litellm
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+from cover_agent.ResponseSchema import NEW_TESTS_SCHEMA
+from cover_agent.utils import load_yaml
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "malformed_responses")
+KEYS_FIX_YAML = ["test_tags", "test_code", "test_name", "test_behavior"]
+
+
+def make_long_response(num_tests):
+    """
+    A response with 'num_tests' tests, followed by trailing prose that is not valid YAML.
+    """
+    lines = ["```yaml", "language: python", "new_tests:"]
+    for i in range(num_tests):
+        lines += [
+            "- test_behavior: |",
+            f"    Test case {i}",
+            "  test_name: |",
+            f"    test_case_{i}",
+            "  test_code: |",
+            f"    def test_case_{i}():",
+            f"        assert add({i}, 1) == {i + 1}",
+            "  new_imports_code: |",
+            '    ""',
+            "  test_tags: happy path",
+        ]
+    lines += ["```", "", "These tests cover: the add function, for many inputs."]
+    return "\n".join(lines)
+
+
+def count_tests(data):
+    if not isinstance(data, dict) or not isinstance(data.get("new_tests"), list):
+        return 0
+    return sum(1 for test in data["new_tests"] if isinstance(test, dict) and test.get("test_code"))
+
+
+def parse(response_text, schema):
+    try:
+        return load_yaml(response_text, keys_fix_yaml=KEYS_FIX_YAML, schema=schema)
+    except Exception:
+        return None
+
+
+def time_parse(response_text, schema, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = parse(response_text, schema)
+        timings.append(time.perf_counter() - start)
+    return data, min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the parsing of malformed YAML responses of the test generation prompt.")
+    parser.add_argument("--long-tests", type=int, default=200, help="Number of tests in the long malformed response. Default: %(default)s.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed parses per response. Default: %(default)s.")
+    args = parser.parse_args()
+
+    with open(os.path.join(CORPUS_DIR, "expected.json")) as f:
+        expected = json.load(f)
+    responses = {}
+    for name in sorted(expected):
+        with open(os.path.join(CORPUS_DIR, name)) as f:
+            responses[name] = f.read()
+    long_name = f"long response ({args.long_tests} tests)"
+    responses[long_name] = make_long_response(args.long_tests)
+    expected[long_name] = args.long_tests
+
+    parsers = {"retry cascade (no schema)": None, "schema": NEW_TESTS_SCHEMA}
+    successes = dict.fromkeys(parsers, 0)
+    for name, response_text in responses.items():
+        results = []
+        for parser_name, schema in parsers.items():
+            data, duration = time_parse(response_text, schema, args.repeat)
+            recovered = count_tests(data)
+            if recovered == expected[name]:
+                successes[parser_name] += 1
+            results.append(f"{parser_name}: {recovered}/{expected[name]} tests in {duration * 1000:.2f} ms")
+        print(f"{name}\n  " + "\n  ".join(results))
+
+    print()
+    for parser_name, count in successes.items():
+        print(f"{parser_name}: {count}/{len(responses)} responses fully recovered")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add the parent directory to the sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# The benchmark runs offline: use the model cost map bundled with litellm
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+from cover_agent.SourceSlicer import number_lines, python_function_bodies, slice_source
+from cover_agent.utils import count_tokens
+
+
+def make_source(num_functions, body_lines):
+    """
+    A Python module of 'num_functions' functions of 'body_lines' lines each, half of them methods of a class.
+    """
+    lines = ["import math", "", ""]
+    for i in range(num_functions // 2):
+        lines += [f"def function_{i}(x):", f'    """Compute the value {i}."""']
+        lines += [f"    x = math.sqrt(x + {j})" for j in range(body_lines - 1)]
+        lines += ["    return x", "", ""]
+    lines += ["class Service:"]
+    for i in range(num_functions - num_functions // 2):
+        lines += [f"    def method_{i}(self, x):"]
+        lines += [f"        x = x * {j} + self.offset" for j in range(body_lines - 1)]
+        lines += ["        return x", ""]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the slicing of a large source file around its missed lines.")
+    parser.add_argument("--functions", type=int, default=250, help="Number of functions of the source file. Default: %(default)s.")
+    parser.add_argument("--body-lines", type=int, default=15, help="Number of lines of each function body. Default: %(default)s.")
+    parser.add_argument("--model", default="gpt-4o", help="Model of the token counts. Default: %(default)s.")
+    args = parser.parse_args()
+
+    source = make_source(args.functions, args.body_lines)
+    functions = python_function_bodies(source)
+    print(f"Source file: {len(source.splitlines())} lines, {len(functions)} functions")
+    full_tokens = count_tokens(number_lines(source), args.model)
+    print(f"Full numbered source: {full_tokens} tokens")
+
+    for missed_ratio in (0.01, 0.1, 0.5):
+        missed_functions = random.Random(0).sample(functions, max(1, int(len(functions) * missed_ratio)))
+        missed_lines = [body_start for _, body_start, _, _ in missed_functions]
+        start = time.perf_counter()
+        sliced = slice_source(source, missed_lines, "python")
+        duration = time.perf_counter() - start
+        sliced_tokens = count_tokens(sliced, args.model)
+        print(
+            f"{len(missed_functions)} functions with missed lines: {sliced_tokens} tokens "
+            f"({sliced_tokens / full_tokens:.0%} of the full source), sliced in {duration * 1000:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import argparse
+import io
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the parent directory to the sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# The benchmark runs offline: use the model cost map bundled with litellm, and a placeholder key for the fake server
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+import litellm
+
+from cover_agent.AICaller import AICaller
+from cover_agent.StreamSink import CallbackStreamSink, ConsoleStreamSink, NullStreamSink, ProgressStreamSink
+
+
+def make_handler(num_chunks):
+    """
+    Create the handler of a fake OpenAI-compatible server, streaming 'num_chunks' chunks of a response as
+    server-sent events, as fast as the client reads them.
+    """
+
+    class FakeStreamingHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for i in range(num_chunks):
+                self.send_event({"content": f"token{i} " if i % 20 else "\n"}, None)
+            self.send_event({}, "stop")
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+        def send_event(self, delta, finish_reason):
+            chunk = {
+                "id": "chatcmpl-benchmark",
+                "object": "chat.completion.chunk",
+                "created": 0,
+                "model": "fake-model",
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+
+        def log_message(self, format, *args):
+            pass
+
+    return FakeStreamingHandler
+
+
+class SleepingConsoleStreamSink(ConsoleStreamSink):
+    """
+    The previous behaviour of AICaller.call_model: print and flush every chunk, then sleep 10 ms.
+    """
+
+    def write(self, text):
+        print(text, end="", flush=True, file=self.stream)
+        time.sleep(0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the consumers of a streamed LLM response.")
+    parser.add_argument("--chunks", type=int, default=1000, help="Number of chunks in the streamed response. Default: %(default)s.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed calls per sink. Default: %(default)s.")
+    args = parser.parse_args()
+    # The fake model is unknown to litellm when it counts the tokens of the response
+    litellm.suppress_debug_info = True
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.chunks))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_base = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    # Console output goes to an in-memory stream, so the terminal speed does not skew the results
+    sinks = {
+        "previous (print + sleep per chunk)": lambda: SleepingConsoleStreamSink(io.StringIO()),
+        "console": lambda: ConsoleStreamSink(io.StringIO()),
+        "progress": lambda: ProgressStreamSink(io.StringIO()),
+        "callback": lambda: CallbackStreamSink(lambda text: None),
+        "none (non-TTY default)": NullStreamSink,
+    }
+    prompt = {"system": "", "user": "Write the tests."}
+    print(f"Streamed response: {args.chunks} chunks from a local fake server")
+    try:
+        for name, make_sink in sinks.items():
+            ai_caller = AICaller("openai/fake-model", api_base, stream_sink=make_sink())
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                ai_caller.call_model(prompt)
+                timings.append(time.perf_counter() - start)
+            print(f"{name}: {min(timings) * 1000:.0f} ms (best of {args.repeat})")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,146 @@
 import datetime
 import os
-import time
 
 import litellm
 from wandb.sdk.data_types.trace_tree import Trace
 
+from cover_agent.CustomLogger import CustomLogger
+from cover_agent.LLMCache import LLMCache, LLMCacheMiss
+from cover_agent.RateLimiter import RateLimiter
+from cover_agent.StreamSink import StreamSink
 
 class AICaller:
-    def __init__(self, model: str, api_base: str = ""):
+    def __init__(
+        self,
+        model: str,
+        api_base: str = "",
+        cache: LLMCache = None,
+        rate_limiter: RateLimiter = None,
+        stream_sink: StreamSink = None,
+    ):
         """
         Initializes an instance of the AICaller class.
 
         Parameters:
             model (str): The name of the model to be used.
             api_base (str): The base API url to use in case model is set to Ollama or Hugging Face
+            cache (LLMCache, optional): The cache of the responses. Defaults to None (always call the model).
+            rate_limiter (RateLimiter, optional): The limiter of the requests and tokens per minute, usually shared by the process. Defaults to None (no limit).
+            stream_sink (StreamSink, optional): The consumer of the text streamed by 'call_model'. Defaults to the "auto" sink: echo the response on a terminal, discard it otherwise.
         """
         self.model = model
         self.api_base = api_base
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.stream_sink = stream_sink if stream_sink is not None else StreamSink.from_mode("auto")
+        self.logger = CustomLogger.get_logger(__name__)
 
-    def call_model(self, prompt: dict, max_tokens=4096):
+    def call_model(self, prompt: dict, max_tokens=4096, on_text=None, response_format: dict = None):
         """
         Call the language model with the provided prompt and retrieve the response.
 
         Parameters:
             prompt (dict): The prompt to be sent to the language model.
             max_tokens (int, optional): The maximum number of tokens to generate in the response. Defaults to 4096.
+            on_text (callable, optional): Called with each piece of the response as it is streamed, in addition to the stream sink. Not called for a cached response. Defaults to None.
+            response_format (dict, optional): The structured output format of the response, e.g. ResponseSchema.response_format(). Only for a model that supports it (see 'supports_structured_output'). Defaults to None (free text).
 
         Returns:
             tuple: A tuple containing the response generated by the language model, the number of tokens used from the prompt, and the total number of tokens in the response.
+
+        Raises:
+            LLMCacheMiss: If the cache is in replay mode and has no response for the prompt.
+        """
+        messages, completion_params = self.build_completion_params(prompt, max_tokens, response_format)
+        cache_key, cached_response = self.get_cached_response(completion_params)
+        if cached_response is not None:
+            return cached_response
+
+        reserved_tokens = self.estimate_tokens(messages, max_tokens)
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(reserved_tokens)
+
+        try:
+            response = litellm.completion(**completion_params)
+        except Exception:
+            self.refund_reservation(reserved_tokens)
+            raise
+
+        chunks = []
+        complete = True
+        self.stream_sink.start()
+        try:
+            for chunk in response:
+                text = chunk.choices[0].delta.content or ""
+                self.stream_sink.write(text)
+                if on_text is not None:
+                    on_text(text)
+                chunks.append(chunk)
+        except Exception as e:
+            complete = False
+            self.logger.error(f"Error during streaming: {e}")
+        self.stream_sink.finish()
+
+        return self.finish_response(prompt, messages, chunks, cache_key, reserved_tokens, complete)
+
+    async def acall_model(self, prompt: dict, max_tokens=4096, response_format: dict = None):
+        """
+        Call the language model with the provided prompt and retrieve the response, without blocking the event loop.
+        Several calls can be in flight at the same time, e.g. with asyncio.gather: litellm reuses its HTTP clients for
+        the calls of the same event loop, and the calls wait for the rate limiter instead of being rejected by the
+        provider. The response is not printed while it is streamed, as concurrent responses would interleave.
+
+        Parameters:
+            prompt (dict): The prompt to be sent to the language model.
+            max_tokens (int, optional): The maximum number of tokens to generate in the response. Defaults to 4096.
+            response_format (dict, optional): The structured output format of the response, as in 'call_model'. Defaults to None (free text).
+
+        Returns:
+            tuple: A tuple containing the response generated by the language model, the number of tokens used from the prompt, and the total number of tokens in the response.
+
+        Raises:
+            LLMCacheMiss: If the cache is in replay mode and has no response for the prompt.
+        """
+        messages, completion_params = self.build_completion_params(prompt, max_tokens, response_format)
+        cache_key, cached_response = self.get_cached_response(completion_params)
+        if cached_response is not None:
+            return cached_response
+
+        reserved_tokens = self.estimate_tokens(messages, max_tokens)
+        if self.rate_limiter is not None:
+            await self.rate_limiter.async_acquire(reserved_tokens)
+
+        try:
+            response = await litellm.acompletion(**completion_params)
+        except Exception:
+            self.refund_reservation(reserved_tokens)
+            raise
+
+        chunks = []
+        complete = True
+        try:
+            async for chunk in response:
+                chunks.append(chunk)
+        except Exception as e:
+            complete = False
+            self.logger.error(f"Error during streaming: {e}")
+
+        return self.finish_response(prompt, messages, chunks, cache_key, reserved_tokens, complete)
+
+    def supports_structured_output(self) -> bool:
+        """
+        Returns:
+            bool: True if the provider of the model can constrain its response to a JSON schema.
+        """
+        try:
+            return litellm.supports_response_schema(model=self.model)
+        except Exception:
+            return False
+
+    def build_completion_params(self, prompt: dict, max_tokens: int, response_format: dict = None) -> tuple:
+        """
+        Returns:
+            tuple: The messages of the prompt, and the parameters of the completion call.
         """
         if "system" not in prompt or "user" not in prompt:
             raise KeyError(
@@ -49,6 +162,8 @@ class AICaller:
             "stream": True,
             "temperature": 0.2,
         }
+        if response_format is not None:
+            completion_params["response_format"] = response_format
 
         # API base exception for OpenAI Compatible, Ollama and Hugging Face models
         if (
@@ -58,21 +173,61 @@ class AICaller:
         ):
             completion_params["api_base"] = self.api_base
 
-        response = litellm.completion(**completion_params)
+        return messages, completion_params
 
-        chunks = []
-        print("Streaming results from LLM model...")
-        try:
-            for chunk in response:
-                print(chunk.choices[0].delta.content or "", end="", flush=True)
-                chunks.append(chunk)
-                time.sleep(
-                    0.01
-                )  # Optional: Delay to simulate more 'natural' response pacing
-        except Exception as e:
-            print(f"Error during streaming: {e}")
-        print("\n")
+    def get_cached_response(self, completion_params: dict) -> tuple:
+        """
+        Returns:
+            tuple: The cache key of the completion (None without a cache), and the cached response tuple (None on a miss).
 
+        Raises:
+            LLMCacheMiss: If the cache is in replay mode and has no response for the prompt.
+        """
+        if self.cache is None:
+            return None, None
+        cache_key = self.cache.make_key(completion_params)
+        cached_response = self.cache.get(cache_key)
+        if cached_response is not None:
+            self.logger.info("Using the cached response of the LLM model.")
+            return cache_key, (
+                cached_response["content"],
+                cached_response["prompt_tokens"],
+                cached_response["completion_tokens"],
+            )
+        if self.cache.replay:
+            raise LLMCacheMiss(
+                f"No cached response for the prompt (key {cache_key}) in replay mode."
+            )
+        return cache_key, None
+
+    def refund_reservation(self, reserved_tokens: int):
+        """
+        Give the reservation of a failed call back to the rate limiter: its request, and all its reserved tokens.
+        """
+        if self.rate_limiter is not None:
+            self.rate_limiter.refund(reserved_tokens, requests=1)
+
+    @staticmethod
+    def estimate_tokens(messages: list, max_tokens: int) -> int:
+        """
+        Upper estimate of the tokens of a call, reserved from the rate limiter: about 4 characters per prompt token,
+        plus the maximum number of completion tokens.
+        """
+        return sum(len(message["content"]) for message in messages) // 4 + max_tokens
+
+    def finish_response(
+        self, prompt: dict, messages: list, chunks: list, cache_key: str, reserved_tokens: int, complete: bool = True
+    ) -> tuple:
+        """
+        Build the response from the streamed chunks, log it to Weights & Biases, store it in the cache and give the
+        unused tokens back to the rate limiter.
+
+        A partial response (the stream failed, or the model stopped for another reason than the end of its answer, e.g.
+        its 'max_tokens') is returned, but not cached: it would be replayed for the prompt instead of a full response.
+
+        Returns:
+            tuple: The response, the number of prompt tokens, and the number of response tokens.
+        """
         model_response = litellm.stream_chunk_builder(chunks, messages=messages)
 
         if 'WANDB_API_KEY' in os.environ:
@@ -83,9 +238,26 @@ class AICaller:
                 outputs={"model_response": model_response["choices"][0]["message"]["content"]})
             root_span.log(name="inference")
 
+        content = model_response["choices"][0]["message"]["content"]
+        prompt_tokens = int(model_response["usage"]["prompt_tokens"])
+        completion_tokens = int(model_response["usage"]["completion_tokens"])
+        if self.cache is not None:
+            finish_reason = model_response["choices"][0]["finish_reason"]
+            if not complete:
+                self.logger.warning("The response is not cached: its stream failed.")
+            elif finish_reason != "stop":
+                self.logger.warning(f"The response is not cached: the model stopped with the reason '{finish_reason}'.")
+            else:
+                self.cache.put(
+                    cache_key,
+                    {
+                        "content": content,
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                    },
+                )
+        if self.rate_limiter is not None:
+            self.rate_limiter.refund(reserved_tokens - prompt_tokens - completion_tokens)
+
         # Returns: Response, Prompt token count, and Response token count
-        return (
-            model_response["choices"][0]["message"]["content"],
-            int(model_response["usage"]["prompt_tokens"]),
-            int(model_response["usage"]["completion_tokens"]),
-        )
+        return content, prompt_tokens, completion_tokens
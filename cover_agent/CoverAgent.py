@@ -7,7 +7,6 @@ import wandb
 from cover_agent.CustomLogger import CustomLogger
 from cover_agent.ReportGenerator import ReportGenerator
 from cover_agent.UnitTestGenerator import UnitTestGenerator
-from cover_agent.utils import load_yaml
 
 
 class CoverAgent:
@@ -30,6 +29,26 @@ class CoverAgent:
             additional_instructions=args.additional_instructions,
             llm_model=args.model,
             api_base=args.api_base,
+            sandbox_workers=args.sandbox_workers,
+            sandbox_hardlinks=args.sandbox_hardlinks,
+            single_test_command=args.single_test_command,
+            use_coverage_index=args.coverage_index,
+            llm_cache=args.llm_cache,
+            llm_cache_dir=args.llm_cache_dir,
+            llm_cache_max_mb=args.llm_cache_max_mb,
+            llm_requests_per_minute=args.llm_requests_per_minute,
+            llm_tokens_per_minute=args.llm_tokens_per_minute,
+            stream_output=args.stream_output,
+            structured_output=args.structured_output,
+            pre_validation=args.pre_validation,
+            compile_command=args.compile_command,
+            slice_source=args.slice_source,
+            prompt_token_budget=args.prompt_token_budget,
+            coverage_format=args.coverage_format,
+            test_timeout=args.test_timeout,
+            test_idle_timeout=args.test_idle_timeout,
+            max_concurrent_commands=args.max_concurrent_commands,
+            early_abort=args.early_abort,
         )
 
     def _validate_paths(self):
@@ -49,83 +68,6 @@ class CoverAgent:
         else:
             self.args.test_file_output_path = self.args.test_file_path
 
-    def generate_response(self):
-        with open(self.args.code_coverage_report_path, "r") as f:
-            code_cov_file = str(f.read())
-
-        file_name = self.test_gen.source_file_path.split('/')[-1]
-
-        prompt = f"""
-                ## Overview
-                
-                Hi Mr. Llama, here is the jacoco code coverage report for the test suite.
-                =========
-                {code_cov_file}
-                =========
-                
-                Here are some instructions: 
-                1. The coverage we particularly care about is only for the `{file_name}.kt`. To find the information of this file, 
-                you'll find it underneath the <sourcefile name="{file_name}"> block.
-                2. In the `<sourcefile name="{file_name}">` block, you will find information about the instructions on each line hit, 
-                as well as the methods, lines, and classes' coverages. 
-                3. We only want you to consider the line by line coverage of this file. That information can be found in the 
-                <counter type="LINE" missed="N" covered="N"/> line. I'm using placeholders here since the actual `missed`
-                and `covered` lines might have different information.
-                
-                So for example, if we say that we care about the line coverage for `{file_name}`, you should look for a block that 
-                looks like this in the coverage report: 
-                
-                <sourcefile name="{file_name}">
-                    <line nr="5" mi="5" ci="0" mb="2" cb="0"/>
-                    <line nr="6" mi="4" ci="0" mb="0" cb="0"/>
-                    <line nr="8" mi="1" ci="0" mb="0" cb="0"/>
-                    <line nr="13" mi="0" ci="5" mb="0" cb="2"/>
-                    <line nr="14" mi="0" ci="4" mb="0" cb="0"/>
-                    <line nr="16" mi="0" ci="1" mb="0" cb="0"/>
-                    <counter type="INSTRUCTION" missed="10" covered="10"/>
-                    <counter type="BRANCH" missed="2" covered="2"/>
-                    <counter type="LINE" missed="3" covered="3"/>
-                    <counter type="COMPLEXITY" missed="2" covered="2"/>
-                    <counter type="METHOD" missed="1" covered="1"/>
-                    <counter type="CLASS" missed="0" covered="1"/>
-                </sourcefile>
-                
-                In this case, the `LINE` XML tag says that there are 3 missed and 3 covered lines. That means there were 6 lines 
-                in total in the `{file_name}` file, and 3 were missed and 3 were covered by tests. The coverage percentage 
-                in this case would be 50%. If our target percentage was 75%, this wouldn't be acceptable.
-
-                Now, please tell us the following information: 1) the number of lines covered, 2) the total 
-                number of lines in the file, as well as 3) the percentage of lines covered. 
-                
-                And please do so in the following output: 
-                
-                Example output:
-                ```yaml
-                lines_covered: ...
-                total_lines: ...
-                ```
-                
-                The Response should be only a valid YAML object, without any introduction text or follow-up text.
-                DO NOT ADD ANYTHING AFTER YOUR ANSWER. I DON'T WANT YOU TO SAY ANYTHING EXCEPT THE TWO YAML FIELDS AND THEIR INTEGER VALUES
-                
-                Answer:
-                ```yaml
-                """
-        print("Prompt", prompt)
-        response = ""
-        attempts = 0
-        while "```yaml" not in response:
-            attempts += 1
-            print('attempts', attempts)
-            response, prompt_token_count, response_token_count = (
-                self.test_gen.ai_caller.call_model(prompt={
-                    "system": "",
-                    "user": prompt
-                })
-            )
-
-        return response
-
     def run(self):
         if 'WANDB_API_KEY' in os.environ:
             wandb.login(key=os.environ['WANDB_API_KEY'])
@@ -149,47 +91,44 @@ class CoverAgent:
             self.logger.info(
                 f"Desired Coverage: {self.test_gen.desired_coverage}%")
 
+            if self.args.stream_tests and self.args.sandbox_workers == 0 and not self.args.batch_validation:
+                # Validate each test while the LLM is still writing the next ones
+                for generated_test, generated_tests_dict in self.test_gen.generate_tests_incrementally(
+                    max_tokens=4096
+                ):
+                    test_result = self.test_gen.validate_test(
+                        generated_test, generated_tests_dict
+                    )
+                    test_results_list.append(test_result)
+                iteration_count += 1
+                continue
+
             generated_tests_dict = self.test_gen.generate_tests(
                 max_tokens=4096)
 
-            for generated_test in generated_tests_dict.get("new_tests", []):
-                test_result = self.test_gen.validate_test(
-                    generated_test, generated_tests_dict
+            generated_tests = generated_tests_dict.get("new_tests", [])
+            if self.args.sandbox_workers > 0:
+                test_results_list.extend(
+                    self.test_gen.validate_tests_parallel(
+                        generated_tests, generated_tests_dict
+                    )
                 )
-                test_results_list.append(test_result)
+            elif self.args.batch_validation:
+                test_results_list.extend(
+                    self.test_gen.validate_tests_batch(
+                        generated_tests, generated_tests_dict
+                    )
+                )
+            else:
+                for generated_test in generated_tests:
+                    test_result = self.test_gen.validate_test(
+                        generated_test, generated_tests_dict
+                    )
+                    test_results_list.append(test_result)
 
             iteration_count += 1
 
-            if self.test_gen.current_coverage < (
-                self.test_gen.desired_coverage / 100
-            ):
-                prompt = self.test_gen.prompt_builder.build_prompt_custom(
-                    file="analyze_test_coverage"
-                )
-
-                response = self.generate_response()
-
-                #
-                # Example output:
-                # ```yaml
-                # lines_covered: ...
-                # total_lines: ...
-                # ```
-
-                resp = load_yaml(response, keys_fix_yaml=[
-                                 "lines_covered", "total_lines"])
-                print("response yaml", resp)
-                total_lines = resp["total_lines"]
-                lines_covered = resp["lines_covered"]
-                print("lines_covered", lines_covered)
-                print("total_lines", total_lines)
-                self.test_gen.current_coverage = int(
-                    lines_covered) / int(total_lines)
-
-                print("prompt", prompt)
-                print("response", response)
-
-                # self.test_gen.run_coverage()
+        self.test_gen.cleanup_sandbox_pool()
 
         if self.test_gen.current_coverage >= (self.test_gen.desired_coverage / 100):
             self.logger.info(
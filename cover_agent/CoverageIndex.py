@@ -0,0 +1,204 @@
+import hashlib
+import os
+import re
+import threading
+import xml.etree.ElementTree as ET
+
+from cover_agent.CustomLogger import CustomLogger
+
+# Branch coverage of a Cobertura line, e.g. condition-coverage="50% (1/2)"
+CONDITION_COVERAGE_PATTERN = re.compile(r"\((\d+)/(\d+)\)")
+
+
+class FileCoverage:
+    def __init__(self, lines_covered: list, lines_missed: list, branches: dict):
+        """
+        The coverage of a single file of a report.
+
+        Parameters:
+            lines_covered (list): The covered line numbers, sorted.
+            lines_missed (list): The missed line numbers, sorted.
+            branches (dict): The (covered, total) branch counts of the lines that hold branches, by line number.
+        """
+        self.lines_covered = lines_covered
+        self.lines_missed = lines_missed
+        self.branches = branches
+
+    @property
+    def percentage_covered(self) -> float:
+        total_lines = len(self.lines_covered) + len(self.lines_missed)
+        return (len(self.lines_covered) / total_lines) if total_lines > 0 else 0
+
+
+class CoverageIndex:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    # Coverage types whose reports can be indexed
+    SUPPORTED_COVERAGE_TYPES = ("cobertura",)
+
+    def __init__(self):
+        """
+        An index of the coverage of every file of a report, parsed once and shared by all the lookups of the process.
+
+        A report is identified by its path, and is reparsed only when its content changes: the modification time and
+        size are checked on every lookup, and a report that was rewritten with the same content (same hash) is reused.
+        A report holding the time it was generated (e.g. the "timestamp" of a Cobertura report) is reparsed after each
+        run of the test command.
+        """
+        self.reports = {}
+        self.parse_count = 0
+        self.lock = threading.Lock()
+        self.logger = CustomLogger.get_logger(__name__)
+
+    @classmethod
+    def get_instance(cls) -> "CoverageIndex":
+        """
+        Returns:
+            CoverageIndex: The index shared by all the agents and iterations of the process.
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def supports(self, coverage_type: str) -> bool:
+        return coverage_type in self.SUPPORTED_COVERAGE_TYPES
+
+    def get_file_coverage(self, report_path: str, coverage_type: str, src_file_path: str) -> FileCoverage:
+        """
+        Look up the coverage of a source file in a report, parsing the report if it is not indexed or has changed.
+
+        The files of the report are resolved against its <source> directories (relative ones against the directory
+        of the report), and the source file is matched with the file of the same name whose resolved path shares the
+        most trailing directories with its absolute path, so that e.g. "pkg_a/utils.py" and "pkg_b/utils.py" do not
+        collide. Among equally close files, the first one of the report is used.
+
+        Parameters:
+            report_path (str): The path of the coverage report.
+            coverage_type (str): The type of the coverage report, one of SUPPORTED_COVERAGE_TYPES.
+            src_file_path (str): The path of the source file.
+
+        Returns:
+            FileCoverage: The coverage of the file, empty if the file is not in the report.
+        """
+        files, files_by_name = self.get_report(report_path, coverage_type)
+        src_parts = path_parts(os.path.abspath(src_file_path))
+        best_path, best_score = None, 0
+        for path, resolved_parts in files_by_name.get(src_parts[-1] if src_parts else "", []):
+            score = common_suffix_length(resolved_parts, src_parts)
+            if score > best_score:
+                best_path, best_score = path, score
+        if best_path is None:
+            return FileCoverage([], [], {})
+        return files[best_path]
+
+    def get_report(self, report_path: str, coverage_type: str) -> tuple:
+        """
+        Returns:
+            tuple: The FileCoverage of each file of the report by its path in the report, and the (path in the report,
+            resolved path parts) of the files with each file name, in the order of the report.
+        """
+        if not self.supports(coverage_type):
+            raise ValueError(f"Unsupported coverage report type for the coverage index: {coverage_type}")
+
+        report_path = os.path.abspath(report_path)
+        stat = os.stat(report_path)
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            entry = self.reports.get(report_path)
+            if entry is not None and entry["coverage_type"] == coverage_type:
+                if entry["stat_key"] == stat_key:
+                    return entry["files"], entry["files_by_name"]
+                digest = self.hash_file(report_path)
+                if entry["digest"] == digest:
+                    entry["stat_key"] = stat_key
+                    return entry["files"], entry["files_by_name"]
+            else:
+                digest = self.hash_file(report_path)
+
+            files, sources = self.parse_cobertura(report_path)
+            report_dir = os.path.dirname(report_path)
+            source_dirs = [os.path.join(report_dir, source) for source in sources] or [report_dir]
+            files_by_name = {}
+            for path in files:
+                for source_dir in source_dirs:
+                    resolved_parts = path_parts(os.path.join(source_dir, path))
+                    files_by_name.setdefault(resolved_parts[-1], []).append((path, resolved_parts))
+            self.parse_count += 1
+            self.logger.debug(f"Indexed the coverage of {len(files)} files from {report_path}")
+            self.reports[report_path] = {
+                "coverage_type": coverage_type,
+                "stat_key": stat_key,
+                "digest": digest,
+                "files": files,
+                "files_by_name": files_by_name,
+            }
+            return files, files_by_name
+
+    def invalidate(self, report_path: str = None):
+        """
+        Drop a report from the index, or every report when no path is given.
+        """
+        with self.lock:
+            if report_path is None:
+                self.reports.clear()
+            else:
+                self.reports.pop(os.path.abspath(report_path), None)
+
+    @staticmethod
+    def hash_file(path: str) -> str:
+        digest = hashlib.blake2b()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def parse_cobertura(report_path: str) -> dict:
+        """
+        Stream a Cobertura XML report into the FileCoverage of each of its files, clearing each class once processed.
+        When several classes share a file, the first one is kept, as in CoverageProcessor.parse_coverage_report_cobertura.
+
+        Returns:
+            tuple: The FileCoverage of each file, by its path in the report, and the <source> directories of the report.
+        """
+        files = {}
+        sources = []
+        for event, elem in ET.iterparse(report_path, events=("end",)):
+            if elem.tag == "source":
+                if elem.text and elem.text.strip():
+                    sources.append(elem.text.strip())
+            elif elem.tag == "class":
+                filename = elem.get("filename")
+                if filename and filename not in files:
+                    line_hits = {}
+                    branches = {}
+                    for line in elem.iter("line"):
+                        line_number = int(line.get("number"))
+                        line_hits[line_number] = max(int(line.get("hits")), line_hits.get(line_number, 0))
+                        condition_match = CONDITION_COVERAGE_PATTERN.search(line.get("condition-coverage", ""))
+                        if line.get("branch") == "true" and condition_match:
+                            branches[line_number] = (int(condition_match.group(1)), int(condition_match.group(2)))
+                    files[filename] = FileCoverage(
+                        [line for line in sorted(line_hits) if line_hits[line] > 0],
+                        [line for line in sorted(line_hits) if line_hits[line] == 0],
+                        branches,
+                    )
+                elem.clear()
+            elif elem.tag == "package":
+                elem.clear()
+        return files, sources
+
+
+def path_parts(path: str) -> list:
+    return [part for part in os.path.normpath(path).replace("\\", "/").split("/") if part not in ("", ".", "..")]
+
+
+def common_suffix_length(parts: list, other_parts: list) -> int:
+    length = 0
+    for part, other_part in zip(reversed(parts), reversed(other_parts)):
+        if part != other_part:
+            break
+        length += 1
+    return length
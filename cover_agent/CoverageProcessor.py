@@ -4,12 +4,17 @@ import time
 import re
 import csv
 import xml.etree.ElementTree as ET
+from cover_agent.CoverageIndex import CoverageIndex
 from cover_agent.CustomLogger import CustomLogger
 
 
 class CoverageProcessor:
     def __init__(
-        self, file_path: str, src_file_path: str, coverage_type: Literal["cobertura", "lcov", "jacoco"]
+        self,
+        file_path: str,
+        src_file_path: str,
+        coverage_type: Literal["cobertura", "lcov", "jacoco"],
+        coverage_index: CoverageIndex = None,
     ):
         """
         Initializes a CoverageProcessor object.
@@ -18,11 +23,14 @@ class CoverageProcessor:
             file_path (str): The path to the coverage report file.
             src_file_path (str): The fully qualified path of the file for which coverage data is being processed.
             coverage_type (Literal["cobertura", "lcov"]): The type of coverage report being processed.
+            coverage_index (CoverageIndex, optional): A shared index that parses each report once for all the files it covers. Defaults to None (parse the report for this file only).
 
         Attributes:
             file_path (str): The path to the coverage report file.
             src_file_path (str): The fully qualified path of the file for which coverage data is being processed.
             coverage_type (Literal["cobertura", "lcov"]): The type of coverage report being processed.
+            coverage_index (CoverageIndex): The shared coverage index, or None.
+            branches (dict): The (covered, total) branch counts by line number, filled in when parsing an LCOV or JaCoCo XML report.
             logger (CustomLogger): The logger object for logging messages.
 
         Returns:
@@ -31,6 +39,8 @@ class CoverageProcessor:
         self.file_path = file_path
         self.src_file_path = src_file_path
         self.coverage_type = coverage_type
+        self.coverage_index = coverage_index
+        self.branches = {}
         self.logger = CustomLogger.get_logger(__name__)
 
     def process_coverage_report(
@@ -78,13 +88,19 @@ class CoverageProcessor:
         Returns:
             Tuple[list, list, float]: A tuple containing lists of covered and missed line numbers, and the coverage percentage.
         """
+        if self.coverage_index is not None and self.coverage_index.supports(self.coverage_type):
+            file_coverage = self.coverage_index.get_file_coverage(
+                self.file_path, self.coverage_type, self.src_file_path
+            )
+            return (
+                list(file_coverage.lines_covered),
+                list(file_coverage.lines_missed),
+                file_coverage.percentage_covered,
+            )
         if self.coverage_type == "cobertura":
             return self.parse_coverage_report_cobertura()
         elif self.coverage_type == "lcov":
-            # Placeholder for LCOV report parsing
-            raise NotImplementedError(
-                f"Parsing for {self.coverage_type} coverage reports is not implemented yet."
-            )
+            return self.parse_coverage_report_lcov()
         elif self.coverage_type == "jacoco":
             return self.parse_coverage_report_jacoco()
         else:
@@ -95,26 +111,37 @@ class CoverageProcessor:
         Parses a Cobertura XML code coverage report to extract covered and missed line numbers for a specific file,
         and calculates the coverage percentage.
 
+        The report is streamed with iterparse: elements are cleared once processed, so memory stays bounded by the size
+        of a single class, and parsing stops as soon as the class of the file is complete.
+        Lines reported both at the class and at the method level are counted once.
+
         Returns:
             Tuple[list, list, float]: A tuple containing lists of covered and missed line numbers, and the coverage percentage.
         """
-        tree = ET.parse(self.file_path)
-        root = tree.getroot()
-        lines_covered, lines_missed = [], []
         filename = os.path.basename(self.src_file_path)
-
-        for cls in root.findall(".//class"):
-            name_attr = cls.get("filename")
-            if name_attr and name_attr.endswith(filename):
-                for line in cls.findall(".//line"):
-                    line_number = int(line.get("number"))
-                    hits = int(line.get("hits"))
-                    if hits > 0:
-                        lines_covered.append(line_number)
-                    else:
-                        lines_missed.append(line_number)
-                break  # Assuming filename is unique, break after finding and processing it
-
+        line_hits = {}
+        in_target_class = False
+
+        for event, elem in ET.iterparse(self.file_path, events=("start", "end")):
+            if event == "start":
+                if elem.tag == "class":
+                    name_attr = elem.get("filename")
+                    in_target_class = bool(name_attr) and self._is_same_file(name_attr, filename)
+                continue
+
+            if elem.tag == "line":
+                if in_target_class:
+                    line_number = int(elem.get("number"))
+                    line_hits[line_number] = max(int(elem.get("hits")), line_hits.get(line_number, 0))
+            elif elem.tag == "class":
+                if in_target_class:
+                    break  # Assuming filename is unique, stop after processing it
+                elem.clear()
+            elif elem.tag == "package":
+                elem.clear()
+
+        lines_covered = [line for line in sorted(line_hits) if line_hits[line] > 0]
+        lines_missed = [line for line in sorted(line_hits) if line_hits[line] == 0]
         total_lines = len(lines_covered) + len(lines_missed)
         coverage_percentage = (
             (len(lines_covered) / total_lines) if total_lines > 0 else 0
@@ -122,28 +149,203 @@ class CoverageProcessor:
 
         return lines_covered, lines_missed, coverage_percentage
 
-    def parse_coverage_report_jacoco(self) -> Tuple[list, list, float]:
+    def parse_coverage_report_lcov(self) -> Tuple[list, list, float]:
         """
-        Parses a JaCoCo XML code coverage report to extract covered and missed line numbers for a specific file,
+        Parses an LCOV tracefile to extract covered and missed line numbers for a specific file,
         and calculates the coverage percentage.
 
-        Returns: Tuple[list, list, float]: A tuple containing empty lists of covered and missed line numbers,
-        and the coverage percentage. The reason being the format of the report for jacoco gives the totals we do not
-        sum them up. to stick with the current contract of the code and to do little change returning empty arrays.
-        I expect this should bring up a discussion on introduce a factory for different CoverageProcessors. Where the
-        total coverage percentage is returned to be evaluated only.
+        The report is read line by line, and only the records of the file are kept. The record of the file is the one
+        whose SF path shares the most trailing path components with the source file path, and reading stops at the end
+        of a record matching the whole source file path. Line coverage comes from the DA records, falling back to the
+        LF/LH totals when the record has none. The branch counts of the BRDA records are kept in 'self.branches'.
+
+        Returns:
+            Tuple[list, list, float]: A tuple containing lists of covered and missed line numbers, and the coverage percentage.
+        """
+        src_parts = self._path_parts(self.src_file_path)
+        best_score = 0
+        best_record = None
+        record = None
+
+        with open(self.file_path, "r") as file:
+            for line in file:
+                line = line.strip()
+                if line.startswith("SF:"):
+                    score = self._common_suffix_length(self._path_parts(line[3:]), src_parts)
+                    record = {"score": score, "line_hits": {}, "branches": {}, "lf": 0, "lh": 0} if score > best_score else None
+                elif record is None:
+                    continue
+                elif line.startswith("DA:"):
+                    fields = line[3:].split(",")
+                    line_number = int(fields[0])
+                    record["line_hits"][line_number] = max(int(fields[1]), record["line_hits"].get(line_number, 0))
+                elif line.startswith("BRDA:"):
+                    fields = line[5:].split(",")
+                    line_number = int(fields[0])
+                    covered, total = record["branches"].get(line_number, (0, 0))
+                    taken = fields[3] != "-" and int(fields[3]) > 0
+                    record["branches"][line_number] = (covered + taken, total + 1)
+                elif line.startswith("LF:"):
+                    record["lf"] = int(line[3:])
+                elif line.startswith("LH:"):
+                    record["lh"] = int(line[3:])
+                elif line == "end_of_record":
+                    best_score, best_record = record["score"], record
+                    record = None
+                    if best_score == len(src_parts):
+                        break  # The whole source file path matched, stop reading
+
+        if best_record is None:
+            self.branches = {}
+            return [], [], 0
+
+        line_hits = best_record["line_hits"]
+        self.branches = best_record["branches"]
+        lines_covered = [line for line in sorted(line_hits) if line_hits[line] > 0]
+        lines_missed = [line for line in sorted(line_hits) if line_hits[line] == 0]
+        if line_hits:
+            coverage_percentage = len(lines_covered) / len(line_hits)
+        else:
+            coverage_percentage = (best_record["lh"] / best_record["lf"]) if best_record["lf"] > 0 else 0
+
+        return lines_covered, lines_missed, coverage_percentage
+
+    @staticmethod
+    def _path_parts(path: str) -> list:
+        return [part for part in os.path.normpath(path).replace("\\", "/").split("/") if part not in ("", ".", "..")]
+
+    @staticmethod
+    def _common_suffix_length(parts: list, other_parts: list) -> int:
+        length = 0
+        for part, other_part in zip(reversed(parts), reversed(other_parts)):
+            if part != other_part:
+                break
+            length += 1
+        return length
+
+    @staticmethod
+    def _is_same_file(report_path: str, filename: str) -> bool:
+        """
+        Checks whether a path from a coverage report points to a file with the given name (e.g. "app.py" matches
+        "src/app.py" but not "src/test_app.py").
         """
-        lines_covered, lines_missed = [], []
+        return report_path.replace("\\", "/").rsplit("/", 1)[-1] == filename
 
+    def parse_coverage_report_jacoco(self) -> Tuple[list, list, float]:
+        """
+        Parses a JaCoCo code coverage report to extract covered and missed line numbers for a specific file,
+        and calculates the coverage percentage.
+
+        XML reports are parsed line by line with 'parse_coverage_report_jacoco_xml'. The CSV export only holds the
+        totals of each class, so for CSV reports the lists of covered and missed line numbers are empty and only the
+        coverage percentage is returned.
+
+        Returns:
+            Tuple[list, list, float]: A tuple containing lists of covered and missed line numbers, and the coverage percentage.
+        """
         package_name, class_name = self.extract_package_and_class_java()
+        if self.file_path.endswith(".xml"):
+            return self.parse_coverage_report_jacoco_xml(package_name)
+
         missed, covered = self.parse_missed_covered_lines_jacoco(package_name, class_name)
 
         total_lines = missed + covered
         coverage_percentage = (float(covered) / total_lines) if total_lines > 0 else 0
 
+        return [], [], coverage_percentage
+
+    def parse_coverage_report_jacoco_xml(self, package_name: str) -> Tuple[list, list, float]:
+        """
+        Parses a JaCoCo XML report to extract the covered and missed line numbers of the source file from its
+        'line' elements (nr/mi/ci/mb/cb), and calculates the coverage percentage.
+
+        The report is streamed with iterparse, clearing each package once processed. The 'sourcefile' element must
+        have the name of the source file. When the package of the source is known it must match the package path,
+        and reading stops at the end of the sourcefile. Otherwise (e.g. Kotlin files without a trailing semicolon on
+        the package line), the sourcefile whose package path shares the most trailing directories with the source
+        file path is used. A line is covered when at least one of its instructions is covered. The branch counts of
+        the lines are kept in 'self.branches', and the LINE counter is used when the sourcefile has no line elements.
+
+        Args:
+            package_name (str): The package of the source file, e.g. "com.example". May be empty.
+
+        Returns:
+            Tuple[list, list, float]: A tuple containing lists of covered and missed line numbers, and the coverage percentage.
+        """
+        source_file_name = os.path.basename(self.src_file_path)
+        package_path = package_name.replace(".", "/")
+        src_parts = self._path_parts(self.src_file_path)
+        current_package = ""
+        best_score = 0
+        best_sourcefile = None
+        sourcefile = None
+
+        for event, elem in ET.iterparse(self.file_path, events=("start", "end")):
+            if event == "start":
+                if elem.tag == "package":
+                    current_package = elem.get("name", "")
+                elif elem.tag == "sourcefile":
+                    sourcefile = None
+                    if elem.get("name") == source_file_name and (not package_path or current_package == package_path):
+                        candidate_parts = [part for part in current_package.split("/") if part] + [source_file_name]
+                        score = self._common_suffix_length(candidate_parts, src_parts) + 1
+                        if score > best_score:
+                            sourcefile = {
+                                "score": score,
+                                "complete_match": bool(package_path) or score > len(candidate_parts),
+                                "line_hits": {},
+                                "branches": {},
+                                "counter": (0, 0),
+                            }
+                continue
+
+            if elem.tag == "line":
+                if sourcefile is not None:
+                    line_number = int(elem.get("nr"))
+                    sourcefile["line_hits"][line_number] = int(elem.get("ci", 0))
+                    missed_branches, covered_branches = int(elem.get("mb", 0)), int(elem.get("cb", 0))
+                    if missed_branches + covered_branches > 0:
+                        sourcefile["branches"][line_number] = (covered_branches, missed_branches + covered_branches)
+            elif elem.tag == "counter":
+                if sourcefile is not None and elem.get("type") == "LINE":
+                    sourcefile["counter"] = (int(elem.get("missed")), int(elem.get("covered")))
+            elif elem.tag == "sourcefile":
+                if sourcefile is not None:
+                    best_score, best_sourcefile = sourcefile["score"], sourcefile
+                    sourcefile = None
+                    if best_sourcefile["complete_match"]:
+                        break
+                elem.clear()
+            elif elem.tag in ("class", "package"):
+                elem.clear()
+
+        if best_sourcefile is None:
+            self.branches = {}
+            return [], [], 0
+
+        line_hits = best_sourcefile["line_hits"]
+        self.branches = best_sourcefile["branches"]
+        lines_covered = [line for line in sorted(line_hits) if line_hits[line] > 0]
+        lines_missed = [line for line in sorted(line_hits) if line_hits[line] == 0]
+        if line_hits:
+            coverage_percentage = len(lines_covered) / len(line_hits)
+        else:
+            missed, covered = best_sourcefile["counter"]
+            coverage_percentage = (float(covered) / (missed + covered)) if missed + covered > 0 else 0
+
         return lines_covered, lines_missed, coverage_percentage
 
     def parse_missed_covered_lines_jacoco(self, package_name: str, class_name: str) -> tuple[int, int]:
+        """
+        Reads the missed and covered line counters for a class from a JaCoCo CSV report.
+
+        Args:
+            package_name (str): The Java package of the class, e.g. "com.example".
+            class_name (str): The simple name of the class.
+
+        Returns:
+            tuple[int, int]: The number of missed and covered lines.
+        """
         with open(self.file_path, 'r') as file:
             reader = csv.DictReader(file)
             missed, covered = 0, 0
@@ -0,0 +1,87 @@
+from cover_agent.LineSet import LineSet
+from cover_agent.SourceSlicer import FUNCTION_NAME_INDEXES
+
+# The formats of the coverage summary in the prompt: the lists of all the covered and missed line numbers, the ranges
+# of the covered lines and of the missed lines grouped by function, or only the ranges of the missed lines grouped by
+# function
+COVERAGE_FORMATS = ("lists", "ranges", "missed-ranges")
+
+
+def format_line_ranges(lines: LineSet) -> str:
+    """
+    Returns:
+        str: The line numbers collapsed into ranges, e.g. "12-18, 40, 52-60", or "none" for an empty set.
+    """
+    ranges = [f"{first}-{last}" if last > first else str(first) for first, last in lines.to_ranges()]
+    return ", ".join(ranges) or "none"
+
+
+def group_lines_by_function(lines: LineSet, functions: list) -> list:
+    """
+    Parameters:
+        lines (LineSet): The line numbers to group.
+        functions (list): The (first line, last line, name) of each function, not overlapping.
+
+    Returns:
+        list: The (label, lines) of each group with lines: the lines outside of functions first, then the lines of
+            each function, in the order of the source file.
+    """
+    groups = []
+    outside_lines = lines
+    for first_line, last_line, name in functions:
+        function_lines = lines & LineSet.from_bits(((1 << (last_line + 1)) - 1) ^ ((1 << first_line) - 1))
+        if function_lines:
+            groups.append((name, function_lines))
+            outside_lines = outside_lines - function_lines
+    if outside_lines:
+        groups.insert(0, ("outside functions", outside_lines))
+    return groups
+
+
+def format_lines_section(title: str, lines: LineSet, functions: list) -> str:
+    if not functions or not lines:
+        return f"{title}: {format_line_ranges(lines)}"
+    groups = group_lines_by_function(lines, functions)
+    return "\n".join([f"{title}, by function:"] + [f"- {label}: {format_line_ranges(group)}" for label, group in groups])
+
+
+def format_coverage_summary(
+    lines_covered,
+    lines_missed,
+    percentage_covered: float,
+    coverage_format: str = "lists",
+    source: str = "",
+    language: str = "python",
+) -> str:
+    """
+    Format the coverage of the source file for the test generation prompt.
+
+    Parameters:
+        lines_covered (list): The covered line numbers.
+        lines_missed (list): The missed line numbers.
+        percentage_covered (float): The coverage ratio, between 0 and 1.
+        coverage_format (str, optional): One of COVERAGE_FORMATS. Defaults to "lists".
+        source (str, optional): The content of the source file, to group the line ranges by function. Defaults to an empty string (no grouping).
+        language (str, optional): The language of the source file. The lines are only grouped by function for the languages of FUNCTION_NAME_INDEXES. Defaults to "python".
+
+    Returns:
+        str: The coverage summary.
+
+    Raises:
+        ValueError: If the format is not one of COVERAGE_FORMATS.
+    """
+    if coverage_format not in COVERAGE_FORMATS:
+        raise ValueError(f"Unsupported coverage format: {coverage_format}. Expected one of {', '.join(COVERAGE_FORMATS)}")
+    percentage_line = f"Percentage covered: {round(percentage_covered * 100, 2)}%"
+    if coverage_format == "lists":
+        return f"Lines covered: {lines_covered}\nLines missed: {lines_missed}\n{percentage_line}"
+
+    function_index = FUNCTION_NAME_INDEXES.get(language)
+    functions = function_index(source) if function_index is not None and source else []
+    sections = []
+    if coverage_format == "ranges":
+        # Only the missed lines, that the new tests target, are grouped: the covered lines of a function are often
+        # scattered (e.g. its signature and a few statements), so their group labels would cost more than they save
+        sections.append(format_lines_section("Lines covered", LineSet(lines_covered), []))
+    sections.append(format_lines_section("Lines missed", LineSet(lines_missed), functions))
+    return "\n".join(sections + [percentage_line])
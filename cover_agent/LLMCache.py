@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import tempfile
+
+# Default location of the cache, shared by the projects of the user
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "cover-agent", "llm")
+
+# Completion parameters that do not change the response
+IGNORED_PARAMS = ("stream", "api_base")
+
+
+class LLMCacheMiss(Exception):
+    """
+    Raised in replay mode when a prompt has no cached response.
+    """
+
+
+class LLMCache:
+    MODES = ("off", "on", "replay")
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_size_mb: int = 1024, replay: bool = False):
+        """
+        An on-disk cache of LLM responses, addressed by the hash of the model, the messages and the completion
+        parameters. Each response is a JSON file, and the least recently used files are evicted once the cache
+        grows over 'max_size_mb'.
+
+        Parameters:
+            cache_dir (str, optional): The directory of the cache. Defaults to ~/.cache/cover-agent/llm.
+            max_size_mb (int, optional): The maximum size of the cache, in MB. Defaults to 1024.
+            replay (bool, optional): Never call the model: a prompt without a cached response raises LLMCacheMiss. Defaults to False.
+        """
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.replay = replay
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_mode(cls, mode: str, cache_dir: str = DEFAULT_CACHE_DIR, max_size_mb: int = 1024) -> "LLMCache":
+        """
+        Create the cache for a --llm-cache mode: None for "off", a read-write cache for "on", and a strict
+        read-only cache for "replay".
+
+        Raises:
+            ValueError: If the mode is not one of MODES.
+        """
+        if mode not in cls.MODES:
+            raise ValueError(f"Unsupported LLM cache mode: {mode}. Expected one of {', '.join(cls.MODES)}")
+        if mode == "off":
+            return None
+        return cls(cache_dir=cache_dir, max_size_mb=max_size_mb, replay=mode == "replay")
+
+    @staticmethod
+    def make_key(completion_params: dict) -> str:
+        """
+        Returns:
+            str: The hash of the completion parameters that determine the response (model, messages, max_tokens, temperature...).
+        """
+        params = {key: value for key, value in completion_params.items() if key not in IGNORED_PARAMS}
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def path_of(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> dict:
+        """
+        Returns:
+            dict: The cached entry ('content', 'prompt_tokens' and 'completion_tokens'), or None on a miss.
+        """
+        path = self.path_of(key)
+        try:
+            with open(path, "r") as cache_file:
+                entry = json.load(cache_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        # The modification time records the last use, for the LRU eviction
+        os.utime(path)
+        return entry
+
+    def put(self, key: str, entry: dict):
+        """
+        Store an entry, then evict the least recently used entries if the cache is over its size.
+        The entry is written to a temporary file and renamed, so concurrent readers never see a partial entry.
+        """
+        path = self.path_of(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        file_descriptor, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(file_descriptor, "w") as tmp_file:
+            json.dump(entry, tmp_file)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits in its maximum size.
+        """
+        entries = []
+        total_size = 0
+        for directory, _, file_names in os.walk(self.cache_dir):
+            for file_name in file_names:
+                if not file_name.endswith(".json"):
+                    continue
+                path = os.path.join(directory, file_name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size_bytes:
+                break
+            os.remove(path)
+            total_size -= size
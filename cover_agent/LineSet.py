@@ -0,0 +1,80 @@
+class LineSet:
+    def __init__(self, lines=()):
+        """
+        A set of line numbers stored as a bitset, where bit N is set when line N is in the set.
+
+        Unions, intersections and differences of the coverage of a whole file are single integer operations,
+        so the covered lines of a test run can be compared with the baseline without building Python sets.
+
+        Parameters:
+            lines (iterable, optional): The line numbers in the set. Defaults to an empty set.
+        """
+        bits = 0
+        for line in lines:
+            bits |= 1 << int(line)
+        self.bits = bits
+
+    @classmethod
+    def from_bits(cls, bits: int) -> "LineSet":
+        line_set = cls()
+        line_set.bits = bits
+        return line_set
+
+    def to_list(self) -> list:
+        """
+        Returns:
+            list: The line numbers in the set, sorted.
+        """
+        lines = []
+        bits = self.bits
+        while bits:
+            lowest_bit = bits & -bits
+            lines.append(lowest_bit.bit_length() - 1)
+            bits ^= lowest_bit
+        return lines
+
+    def to_ranges(self) -> list:
+        """
+        Returns:
+            list: The (first line, last line) of each run of consecutive line numbers in the set, sorted.
+        """
+        ranges = []
+        bits = self.bits
+        offset = 0
+        while bits:
+            # Skip the zeros below the run, then measure the run of ones
+            zeros = (bits & -bits).bit_length() - 1
+            bits >>= zeros
+            offset += zeros
+            ones = (~bits & (bits + 1)).bit_length() - 1
+            ranges.append((offset, offset + ones - 1))
+            bits >>= ones
+            offset += ones
+        return ranges
+
+    def __or__(self, other: "LineSet") -> "LineSet":
+        return LineSet.from_bits(self.bits | other.bits)
+
+    def __and__(self, other: "LineSet") -> "LineSet":
+        return LineSet.from_bits(self.bits & other.bits)
+
+    def __sub__(self, other: "LineSet") -> "LineSet":
+        return LineSet.from_bits(self.bits & ~other.bits)
+
+    def __len__(self) -> int:
+        return bin(self.bits).count("1")
+
+    def __bool__(self) -> bool:
+        return self.bits != 0
+
+    def __iter__(self):
+        return iter(self.to_list())
+
+    def __contains__(self, line: int) -> bool:
+        return line >= 0 and bool(self.bits >> line & 1)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, LineSet) and self.bits == other.bits
+
+    def __repr__(self) -> str:
+        return f"LineSet({self.to_list()})"
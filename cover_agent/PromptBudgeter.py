@@ -0,0 +1,110 @@
+import litellm
+
+from cover_agent.utils import count_tokens
+
+# The prompt variables trimmed when the prompt is over budget, in order, with their name in the budget decisions
+TRIMMED_SECTIONS = [
+    ("failed_tests_section", "failed tests history"),
+    ("additional_includes_section", "included files"),
+    ("test_file", "test file"),
+    ("source_file_numbered", "source file"),
+]
+
+# The tokens of the response reserved in the context window of the model, the 'max_tokens' of the test generation
+DEFAULT_RESPONSE_TOKENS = 4096
+
+
+class PromptBudgeter:
+    def __init__(self, model: str, token_budget: int = 0, response_tokens: int = DEFAULT_RESPONSE_TOKENS):
+        """
+        Fit the test generation prompt in a token budget, by trimming its sections in the order of TRIMMED_SECTIONS:
+        the failed tests history first, then the included files, the test file and last the source file. The tokens
+        are counted locally, with the tokenizer of the model when litellm knows it.
+
+        Parameters:
+            model (str): The name of the model.
+            token_budget (int, optional): The maximum number of prompt tokens. Defaults to 0: the context window of the model, minus the 'response_tokens', or no budget if litellm does not know the model.
+            response_tokens (int, optional): The tokens of the response reserved in the context window. Defaults to DEFAULT_RESPONSE_TOKENS.
+        """
+        self.model = model
+        self.token_budget = token_budget if token_budget > 0 else self.model_token_budget(model, response_tokens)
+
+    @staticmethod
+    def model_token_budget(model: str, response_tokens: int) -> int:
+        """
+        Returns:
+            int: The prompt tokens left in the context window of the model once the response tokens are reserved, or
+                None if litellm does not know the model.
+        """
+        model_info = litellm.model_cost.get(model) or litellm.model_cost.get(model.split("/", 1)[-1]) or {}
+        context_window = model_info.get("max_input_tokens") or model_info.get("max_tokens")
+        if not context_window:
+            return None
+        return max(context_window - response_tokens, 0)
+
+    def count_prompt_tokens(self, prompt: dict) -> int:
+        return count_tokens(prompt["system"], self.model) + count_tokens(prompt["user"], self.model)
+
+    def fit(self, render, variables: dict) -> tuple:
+        """
+        Render the prompt, trimming the sections of the variables until it fits in the budget.
+
+        Parameters:
+            render (callable): Renders the prompt dict ("system" and "user") of the variables.
+            variables (dict): The variables of the prompt template. The trimmed sections are updated in place.
+
+        Returns:
+            tuple: The rendered prompt, and the budget decisions (one message per trimmed section, plus one if the
+                prompt is still over budget once all the sections are trimmed).
+        """
+        prompt = render(variables)
+        if self.token_budget is None:
+            return prompt, []
+        prompt_tokens = self.count_prompt_tokens(prompt)
+        decisions = []
+        for name, label in TRIMMED_SECTIONS:
+            if prompt_tokens <= self.token_budget:
+                break
+            text = variables.get(name, "")
+            if not text:
+                continue
+            text_tokens = count_tokens(text, self.model)
+            keep_tokens = text_tokens
+            while prompt_tokens > self.token_budget and variables[name]:
+                # Trim the section by the overflow of the prompt, then by the remaining overflow until it fits
+                keep_tokens -= prompt_tokens - self.token_budget
+                variables[name] = trim_text(text, keep_tokens, text_tokens)
+                prompt = render(variables)
+                prompt_tokens = self.count_prompt_tokens(prompt)
+            decisions.append(
+                f"Trimmed the {label} of the prompt from {text_tokens} to {count_tokens(variables[name], self.model)} "
+                f"tokens, to fit the budget of {self.token_budget} tokens"
+            )
+        if prompt_tokens > self.token_budget:
+            decisions.append(
+                f"The prompt is {prompt_tokens} tokens once trimmed, over the budget of {self.token_budget} tokens"
+            )
+        return prompt, decisions
+
+
+def trim_text(text: str, keep_tokens: int, text_tokens: int) -> str:
+    """
+    Keep the first lines of a text, about 'keep_tokens' of its 'text_tokens' tokens (less than all of them), followed
+    by a line naming the number of lines left out.
+
+    Returns:
+        str: The trimmed text, empty if no line is kept.
+    """
+    lines = text.split("\n")
+    # The marker line takes about a dozen tokens
+    keep_chars = len(text) * (keep_tokens - 12) // max(text_tokens, 1)
+    kept_lines = []
+    kept_chars = 0
+    for line in lines:
+        kept_chars += len(line) + 1
+        if kept_chars > keep_chars:
+            break
+        kept_lines.append(line)
+    if not kept_lines:
+        return ""
+    return "\n".join(kept_lines + [f"... ({len(lines) - len(kept_lines)} lines left out to fit the prompt token budget)"])
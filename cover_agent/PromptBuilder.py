@@ -1,7 +1,12 @@
+import functools
 import logging
+import os
+import time
 
 from jinja2 import Environment, StrictUndefined
 from cover_agent.settings.config_loader import get_settings
+from cover_agent.SourceSlicer import number_lines, slice_source
+from cover_agent.utils import count_tokens
 
 MAX_TESTS_PER_RUN = 4
 
@@ -29,6 +34,83 @@ Below is a list of failed tests that you generated in previous iterations. Do no
 ======
 """
 
+# A file modified less than this many nanoseconds before it was cached may be modified again without changing its
+# modification time (on file systems with coarse timestamps): its content is compared instead
+RACY_MTIME_WINDOW_NS = 2_000_000_000
+
+# The compiled prompt templates, by their source
+_compiled_templates = {}
+_template_environment = Environment(undefined=StrictUndefined)
+
+# The (modification time and size, time cached, content, numbered content) of the files read, by path
+_file_cache = {}
+
+
+def get_compiled_template(source: str):
+    """
+    Returns:
+        jinja2.Template: The compiled template of the source, compiled once per process.
+    """
+    template = _compiled_templates.get(source)
+    if template is None:
+        template = _compiled_templates[source] = _template_environment.from_string(source)
+    return template
+
+
+def read_file_cached(file_path: str) -> tuple:
+    """
+    Read a file, reusing the content read before while the modification time and size of the file are unchanged.
+
+    Returns:
+        tuple: The content of the file, and its numbered content.
+    """
+    try:
+        stat = os.stat(file_path)
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        stat_key = None
+    entry = _file_cache.get(file_path)
+    if (
+        stat_key is not None
+        and entry is not None
+        and entry[0] == stat_key
+        and entry[1] - stat_key[0] >= RACY_MTIME_WINDOW_NS
+    ):
+        return entry[2], entry[3]
+
+    with open(file_path, "r") as f:
+        content = f.read()
+    if entry is not None and entry[2] == content:
+        numbered_content = entry[3]
+    else:
+        numbered_content = number_lines(content)
+    if stat_key is not None:
+        _file_cache[file_path] = (stat_key, time.time_ns(), content, numbered_content)
+    return content, numbered_content
+
+
+@functools.lru_cache(maxsize=16)
+def slice_source_cached(source: str, missed_lines: tuple, language: str) -> tuple:
+    """
+    Returns:
+        tuple: The numbered source sliced around the missed lines, and the tokens of the numbered source before and
+            after slicing (None if slicing left it unchanged).
+    """
+    source_numbered = number_lines(source)
+    sliced_source_numbered = slice_source(source, missed_lines, language)
+    if sliced_source_numbered == source_numbered:
+        return source_numbered, None
+    return sliced_source_numbered, (count_tokens(source_numbered), count_tokens(sliced_source_numbered))
+
+
+def clear_prompt_caches():
+    """
+    Clear the compiled templates and the file contents cached by the process.
+    """
+    _compiled_templates.clear()
+    _file_cache.clear()
+    slice_source_cached.cache_clear()
+
 
 class PromptBuilder:
 
@@ -41,6 +123,9 @@ class PromptBuilder:
         additional_instructions: str = "",
         failed_test_runs: str = "",
         language: str = "python",
+        structured_output: bool = False,
+        missed_lines=None,
+        budgeter=None,
     ):
         """
         The `PromptBuilder` class is responsible for building a formatted prompt string by replacing placeholders with the actual content of files read during initialization. It takes in various paths and settings as parameters and provides a method to generate the prompt.
@@ -54,30 +139,37 @@ class PromptBuilder:
             additional_instructions (str): The formatted additional instructions section.
             failed_test_runs (str): The formatted failed test runs section.
             language (str): The programming language of the source and test files.
+            structured_output (bool): Ask for a JSON response, for a model called in structured output mode, instead of a YAML response.
+            missed_lines (iterable): The missed lines of the source file. When given, the source file is sliced: the bodies of the functions without missed lines are left out.
+            budgeter (PromptBudgeter): Fits the test generation prompt in a token budget, by trimming its sections. Defaults to None (no budget).
 
         Methods:
             __init__(self, prompt_template_path: str, source_file_path: str, test_file_path: str, code_coverage_report: str, included_files: str = "", additional_instructions: str = "", failed_test_runs: str = "")
                 Initializes the `PromptBuilder` object with the provided paths and settings.
 
-            _read_file(self, file_path)
-                Helper method to read the content of a file.
+            _read_file_numbered(self, file_path)
+                Helper method to read the content of a file, and number its lines.
 
             build_prompt(self)
                 Replaces placeholders with the actual content of files read during initialization and returns the formatted prompt string.
         """
         self.source_file_name = source_file_path.split("/")[-1]
         self.test_file_name = test_file_path.split("/")[-1]
-        self.source_file = self._read_file(source_file_path)
-        self.test_file = self._read_file(test_file_path)
+        # The files are read, and numbered (line numbers start from 1), once until they change
+        self.source_file, self.source_file_numbered = self._read_file_numbered(source_file_path)
+        self.test_file, self.test_file_numbered = self._read_file_numbered(test_file_path)
         self.code_coverage_report = code_coverage_report
         self.language = language
-        # add line numbers to each line in 'source_file'. start from 1
-        self.source_file_numbered = "\n".join(
-            [f"{i + 1} {line}" for i, line in enumerate(self.source_file.split("\n"))]
-        )
-        self.test_file_numbered = "\n".join(
-            [f"{i + 1} {line}" for i, line in enumerate(self.test_file.split("\n"))]
-        )
+        self.structured_output = structured_output
+        self.budgeter = budgeter
+        # The budget decisions of the last test generation prompt
+        self.budget_decisions = []
+        # The tokens of the numbered source file before and after slicing, if it was sliced
+        self.source_file_token_counts = None
+        if missed_lines is not None:
+            self.source_file_numbered, self.source_file_token_counts = slice_source_cached(
+                self.source_file, tuple(sorted(missed_lines)), language
+            )
 
         # Conditionally fill in optional sections
         self.included_files = (
@@ -98,25 +190,24 @@ class PromptBuilder:
             else ""
         )
 
-    def _read_file(self, file_path):
+    def _read_file_numbered(self, file_path):
         """
-        Helper method to read file contents.
-
-        Parameters:
-            file_path (str): Path to the file to be read.
+        Helper method to read file contents, from the cache of the process when the file is unchanged.
 
         Returns:
-            str: The content of the file.
+            tuple: The content of the file, and its numbered content.
         """
         try:
-            with open(file_path, "r") as f:
-                return f.read()
+            return read_file_cached(file_path)
         except Exception as e:
-            return f"Error reading {file_path}: {e}"
+            content = f"Error reading {file_path}: {e}"
+            return content, number_lines(content)
 
     def build_prompt(self) -> dict:
         """
         Replaces placeholders with the actual content of files read during initialization, and returns the formatted prompt.
+        With a budgeter, the sections of the prompt are trimmed to fit its token budget, and its decisions are kept in
+        'budget_decisions'.
 
         Parameters:
             None
@@ -137,13 +228,20 @@ class PromptBuilder:
             "additional_instructions_text": self.additional_instructions,
             "language": self.language,
             "max_tests": MAX_TESTS_PER_RUN,
+            "structured_output": self.structured_output,
         }
-        environment = Environment(undefined=StrictUndefined)
+        if self.budgeter is None:
+            return self.render_test_generation_prompt(variables)
+        prompt, self.budget_decisions = self.budgeter.fit(self.render_test_generation_prompt, variables)
+        return prompt
+
+    @staticmethod
+    def render_test_generation_prompt(variables: dict) -> dict:
         try:
-            system_prompt = environment.from_string(
+            system_prompt = get_compiled_template(
                 get_settings().test_generation_prompt.system
             ).render(variables)
-            user_prompt = environment.from_string(
+            user_prompt = get_compiled_template(
                 get_settings().test_generation_prompt.user
             ).render(variables)
         except Exception as e:
@@ -167,13 +265,13 @@ class PromptBuilder:
             "additional_instructions_text": self.additional_instructions,
             "language": self.language,
             "max_tests": MAX_TESTS_PER_RUN,
+            "structured_output": self.structured_output,
         }
-        environment = Environment(undefined=StrictUndefined)
         try:
-            system_prompt = environment.from_string(
+            system_prompt = get_compiled_template(
                 get_settings().get(file).system
             ).render(variables)
-            user_prompt = environment.from_string(get_settings().get(file).user).render(
+            user_prompt = get_compiled_template(get_settings().get(file).user).render(
                 variables
             )
         except Exception as e:
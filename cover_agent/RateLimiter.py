@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    def __init__(self, per_minute: int):
+        """
+        A bucket holding up to 'per_minute' units, refilled continuously at 'per_minute' units per minute.
+        The level may go negative: it is then the debt that later reservations wait for.
+        """
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.last_refill = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def take(self, amount: float) -> float:
+        """
+        Take 'amount' units (at most the capacity of the bucket) and return the seconds to wait until they are available.
+        """
+        self.level -= min(amount, self.capacity)
+        return -self.level / self.rate if self.level < 0 else 0.0
+
+    def give(self, amount: float):
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        """
+        A token-bucket limiter of the requests and tokens sent to the LLM provider per minute.
+
+        Callers reserve one request and an estimate of the tokens of the call before sending it, and wait until the
+        buckets can cover the reservation. Once the actual token usage is known, the unused part of the estimate is
+        given back with 'refund', as well as the whole reservation of a failed call. The limiter is thread-safe, and can be used by blocking and by async callers.
+
+        Parameters:
+            requests_per_minute (int, optional): The maximum number of requests per minute. Defaults to 0 (unlimited).
+            tokens_per_minute (int, optional): The maximum number of tokens (prompt and completion) per minute. Defaults to 0 (unlimited).
+        """
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.lock = threading.Lock()
+
+    @classmethod
+    def get_shared(cls, requests_per_minute: int, tokens_per_minute: int) -> "RateLimiter":
+        """
+        Returns:
+            RateLimiter: The limiter shared by all the agents of the process with the same limits, or None without limits.
+        """
+        if requests_per_minute <= 0 and tokens_per_minute <= 0:
+            return None
+        with cls._instances_lock:
+            key = (requests_per_minute, tokens_per_minute)
+            if key not in cls._instances:
+                cls._instances[key] = cls(requests_per_minute, tokens_per_minute)
+            return cls._instances[key]
+
+    def reserve(self, tokens: int) -> float:
+        """
+        Reserve a request of 'tokens' tokens.
+
+        Returns:
+            float: The seconds to wait before sending the request.
+        """
+        with self.lock:
+            now = time.monotonic()
+            wait = 0.0
+            for bucket, amount in ((self.request_bucket, 1), (self.token_bucket, tokens)):
+                if bucket is not None:
+                    bucket.refill(now)
+                    wait = max(wait, bucket.take(amount))
+            return wait
+
+    def refund(self, tokens: int, requests: int = 0):
+        """
+        Give back reserved tokens that were not used, and the reserved requests that were not sent (e.g. a call that
+        failed).
+        """
+        with self.lock:
+            for bucket, amount in ((self.request_bucket, requests), (self.token_bucket, tokens)):
+                if bucket is not None and amount > 0:
+                    bucket.give(amount)
+
+    def acquire(self, tokens: int):
+        """
+        Reserve a request of 'tokens' tokens, and block until it can be sent.
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def async_acquire(self, tokens: int):
+        """
+        Reserve a request of 'tokens' tokens, and wait without blocking the event loop until it can be sent.
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
@@ -52,6 +52,7 @@ class ReportGenerator:
                 <th>Status</th>
                 <th>Reason</th>
                 <th>Exit Code</th>
+                <th>New Lines Covered</th>
                 <th>Stderr</th>
                 <th>Stdout</th>
                 <th>Test</th>
@@ -61,6 +62,7 @@ class ReportGenerator:
                 <td class="status-{{ result.status }}">{{ result.status }}</td>
                 <td>{{ result.reason }}</td>
                 <td>{{ result.exit_code }}</td>
+                <td>{% if result.new_lines_covered %}{{ result.new_lines_covered|length }}{% else %}&nbsp;{% endif %}</td>
                 <td>{% if result.stderr %}<pre><code class="language-shell">{{ result.stderr }}</code></pre>{% else %}&nbsp;{% endif %}</td>
                 <td>{% if result.stdout %}<pre><code class="language-shell">{{ result.stdout }}</code></pre>{% else %}&nbsp;{% endif %}</td>
                 <td>{% if result.test %}<pre><code class="language-python">{{ result.test }}</code></pre>{% else %}&nbsp;{% endif %}</td>
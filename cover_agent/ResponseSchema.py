@@ -0,0 +1,259 @@
+import json
+import re
+import textwrap
+
+import yaml
+
+# A "key: value" line, optionally starting a list item. Group 1: indentation, 2: list item dash, 3: key, 4: value
+KEY_LINE_PATTERN = re.compile(r"^(\s*)(-\s+)?([A-Za-z_][\w ]*?):(?:\s+(.*?))?\s*$")
+# The indicator of a block scalar, e.g. "|", "|-", ">+" or "|2"
+BLOCK_INDICATOR_PATTERN = re.compile(r"^[|>][-+0-9]*$")
+
+
+class ResponseSchema:
+    def __init__(
+        self,
+        fields: tuple,
+        required: tuple = (),
+        list_field: str = None,
+        item_fields: tuple = (),
+        item_required: tuple = (),
+        integer_fields: tuple = (),
+        name: str = "Response",
+    ):
+        """
+        The expected keys of a response of the LLM. It recovers the data of a YAML response that is not valid YAML in a
+        single pass over its lines, and validates the JSON response of a model called in structured output mode.
+
+        Parameters:
+            fields (tuple): The top-level keys of the response.
+            required (tuple, optional): The top-level keys without which the response is not usable. Defaults to ().
+            list_field (str, optional): The top-level key holding a list of items (e.g. 'new_tests'). Defaults to None.
+            item_fields (tuple, optional): The keys of the items of the list. Defaults to ().
+            item_required (tuple, optional): The keys without which an item is dropped. Defaults to ().
+            integer_fields (tuple, optional): The top-level keys whose value is an integer. The other values are strings. Defaults to ().
+            name (str, optional): The name of the schema sent to the model in structured output mode. Defaults to "Response".
+        """
+        self.fields = set(fields)
+        self.required = required
+        self.list_field = list_field
+        self.item_fields = set(item_fields)
+        self.item_required = item_required
+        self.name = name
+        # The type of each key, resolved once and shared by the JSON schema and the validation of the responses
+        self.field_types = {key: int if key in integer_fields else str for key in fields if key != list_field}
+        self.item_types = {key: str for key in item_fields}
+
+    def is_valid(self, data) -> bool:
+        """
+        Returns:
+            bool: True if the data has the required keys of the schema.
+        """
+        return isinstance(data, dict) and all(data.get(key) is not None for key in self.required)
+
+    def validate(self, data) -> bool:
+        """
+        Returns:
+            bool: True if the data has the required keys of the schema, and its values and the items of its list have
+                the types of the schema.
+        """
+        if not self.is_valid(data):
+            return False
+        for key, value in data.items():
+            if key == self.list_field:
+                if not isinstance(value, list) or not all(self.validate_item(item) for item in value):
+                    return False
+            elif key in self.field_types and value is not None and not isinstance(value, self.field_types[key]):
+                return False
+        return True
+
+    def validate_item(self, item) -> bool:
+        return (
+            isinstance(item, dict)
+            and all(item.get(key) is not None for key in self.item_required)
+            and all(isinstance(value, self.item_types.get(key, object)) for key, value in item.items() if value is not None)
+        )
+
+    def json_schema(self) -> dict:
+        """
+        Returns:
+            dict: The JSON Schema of the response, in the strict form of the structured outputs of the providers: every
+                key is required and no other key is allowed.
+        """
+        json_types = {int: "integer", str: "string"}
+        properties = {key: {"type": json_types[value_type]} for key, value_type in self.field_types.items()}
+        if self.list_field is not None:
+            properties[self.list_field] = {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {key: {"type": "string"} for key in self.item_types},
+                    "required": list(self.item_types),
+                    "additionalProperties": False,
+                },
+            }
+        return {
+            "type": "object",
+            "properties": properties,
+            "required": list(properties),
+            "additionalProperties": False,
+        }
+
+    def response_format(self) -> dict:
+        """
+        Returns:
+            dict: The 'response_format' parameter of a completion call in structured output mode.
+        """
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": self.name, "schema": self.json_schema(), "strict": True},
+        }
+
+    def parse_json(self, response_text: str) -> dict:
+        """
+        Read the JSON response of a model called in structured output mode.
+
+        Parameters:
+            response_text (str): The response of the LLM, optionally in a code fence.
+
+        Returns:
+            dict: The data of the response, or None if it is not valid JSON or does not match the schema.
+        """
+        text = response_text.strip()
+        if text.startswith("```"):
+            text = text.split("\n", 1)[-1].rsplit("```", 1)[0]
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        return data if self.validate(data) else None
+
+    def parse(self, response_text: str) -> dict:
+        """
+        Recover the data of a response from its lines, reading each line once.
+
+        Only the keys of the schema are structure: other lines (prose before or after the YAML, code fences) are
+        skipped. The value of a key is either a block scalar, made of the following lines indented more than the key,
+        or an inline value, which is read as YAML when possible and kept as text otherwise (e.g. a value containing
+        ': '), unless it is an unterminated quoted string. The items of the list without their required keys are
+        dropped.
+
+        Parameters:
+            response_text (str): The response of the LLM.
+
+        Returns:
+            dict: The data of the response, or None if a required key is missing.
+        """
+        lines = response_text.split("\n")
+        data = {}
+        list_indent = None
+        current_item = None
+        index = 0
+        while index < len(lines):
+            match = KEY_LINE_PATTERN.match(lines[index])
+            if not match or lines[index].startswith("```"):
+                index += 1
+                continue
+            indent, dash, key, value = len(match.group(1)), match.group(2), match.group(3), match.group(4) or ""
+
+            if dash and key in self.item_fields and self.list_field in data and (list_indent is None or indent == list_indent):
+                list_indent = indent
+                current_item = {}
+                data[self.list_field].append(current_item)
+                key_indent = indent + len(dash)
+                target = current_item
+            elif not dash and current_item is not None and key in self.item_fields and indent > list_indent:
+                key_indent = indent
+                target = current_item
+            elif not dash and key in self.fields:
+                current_item = None
+                if key == self.list_field and not value:
+                    data[key] = []
+                    list_indent = None
+                    index += 1
+                    continue
+                key_indent = indent
+                target = data
+            else:
+                index += 1
+                continue
+
+            target[key], index = self.read_value(lines, index + 1, key_indent, value)
+
+        if self.list_field in data:
+            data[self.list_field] = [
+                item for item in data[self.list_field]
+                if all(item.get(key) is not None for key in self.item_required)
+            ]
+        return data if self.is_valid(data) else None
+
+    @staticmethod
+    def read_value(lines: list, index: int, key_indent: int, value: str) -> tuple:
+        """
+        Read the value of a key, from its inline text and the following lines indented more than the key.
+
+        Returns:
+            tuple: The value, and the index of the first line after it.
+        """
+        value_lines = []
+        while index < len(lines):
+            line = lines[index]
+            if line.strip() and (len(line) - len(line.lstrip()) <= key_indent or line.startswith("```")):
+                break
+            value_lines.append(line)
+            index += 1
+        while value_lines and not value_lines[-1].strip():
+            value_lines.pop()
+
+        if BLOCK_INDICATOR_PATTERN.match(value):
+            block = textwrap.dedent("\n".join(value_lines))
+            if value in ("|", "|-"):
+                # A literal block is its dedented lines, with a single final newline unless it is stripped
+                return block + ("\n" if block and value == "|" else ""), index
+            try:
+                return yaml.safe_load(f"value: {value}\n" + textwrap.indent(block, "  ", lambda line: True))["value"], index
+            except yaml.YAMLError:
+                return block + ("" if value.endswith("-") else "\n"), index
+
+        text = " ".join([value] + [line.strip() for line in value_lines]).strip()
+        try:
+            return yaml.safe_load(f"value: {text}")["value"], index
+        except yaml.YAMLError:
+            if text[:1] in ("'", '"'):
+                # An unterminated quoted value, e.g. at the end of a truncated response
+                return None, index
+            return text, index
+
+
+NEW_TESTS_SCHEMA = ResponseSchema(
+    fields=("language", "existing_test_function_signature", "new_tests"),
+    required=("new_tests",),
+    list_field="new_tests",
+    item_fields=("test_behavior", "lines_to_cover", "test_name", "test_code", "new_imports_code", "test_tags"),
+    item_required=("test_code",),
+    name="NewTests",
+)
+
+TEST_HEADERS_INDENTATION_SCHEMA = ResponseSchema(
+    fields=("language", "testing_framework", "number_of_tests", "test_headers_indentation"),
+    required=("test_headers_indentation",),
+    integer_fields=("number_of_tests", "test_headers_indentation"),
+    name="TestsAnalysis",
+)
+
+TEST_INSERT_LINE_SCHEMA = ResponseSchema(
+    fields=(
+        "language",
+        "testing_framework",
+        "number_of_tests",
+        "relevant_line_number_to_insert_tests_after",
+        "relevant_line_number_to_insert_imports_after",
+    ),
+    required=("relevant_line_number_to_insert_tests_after",),
+    integer_fields=(
+        "number_of_tests",
+        "relevant_line_number_to_insert_tests_after",
+        "relevant_line_number_to_insert_imports_after",
+    ),
+    name="TestInsertLine",
+)
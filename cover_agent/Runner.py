@@ -1,27 +1,384 @@
+import asyncio
+import os
+import selectors
+import signal
 import subprocess
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# The maximum bytes of each output stream kept by the Runner: its first quarter and its last three quarters
+DEFAULT_MAX_OUTPUT_BYTES = 1024 * 1024
+
+# The seconds a process group is given to exit after SIGTERM, before it is killed
+KILL_GRACE_SECONDS = 2
+
+# The seconds a process group is given to report its failures after SIGINT, when it is stopped at the first failed test
+ABORT_GRACE_SECONDS = 5
+
+# The default maximum number of commands run at the same time by a CommandExecutor: one per core
+DEFAULT_MAX_CONCURRENT_COMMANDS = os.cpu_count() or 1
+
+
+class OutputBuffer:
+    def __init__(self, max_bytes: int = DEFAULT_MAX_OUTPUT_BYTES):
+        """
+        A bounded capture of an output stream: the first 'max_bytes' / 4 bytes (the head), and the last bytes (the
+        tail), up to 'max_bytes' in total. The bytes in between are counted, but not kept.
+        """
+        self.head_size = max_bytes // 4
+        self.tail_size = max_bytes - self.head_size
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.omitted_bytes = 0
+
+    def write(self, data: bytes):
+        if len(self.head) < self.head_size:
+            head_part = data[:self.head_size - len(self.head)]
+            self.head += head_part
+            data = data[len(head_part):]
+        self.tail += data
+        overflow = len(self.tail) - self.tail_size
+        if overflow > 0:
+            del self.tail[:overflow]
+            self.omitted_bytes += overflow
+
+    def text(self) -> str:
+        """
+        Returns:
+            str: The captured output, with a line naming the number of bytes omitted between the head and the tail.
+        """
+        if not self.omitted_bytes:
+            return (self.head + self.tail).decode("utf-8", errors="replace")
+        return (
+            self.head.decode("utf-8", errors="replace")
+            + f"\n... [{self.omitted_bytes} bytes of output omitted] ...\n"
+            + self.tail.decode("utf-8", errors="replace")
+        )
+
+
+class CommandResult:
+    def __init__(self, stdout: str, stderr: str, exit_code: int, command_start_time: int):
+        """
+        The result of a command run by 'Runner.run_command_detailed'.
+
+        Attributes:
+            stdout (str): The standard output, bounded by the output cap of the run.
+            stderr (str): The standard error, bounded by the output cap of the run.
+            exit_code (int): The exit code of the command, negative when it was killed by a signal.
+            command_start_time (int): The time the command was started, in milliseconds.
+            timed_out (str): "wall" or "idle" when the command was killed by a timeout, None otherwise.
+            failure_line (str): The line reporting the failed test the command was stopped at, None otherwise.
+            duration (float): The wall-clock seconds of the run.
+            peak_rss_bytes (int): The peak resident set size of the command and its waited-for descendants, if known.
+            cpu_seconds (float): The user and system CPU time of the command and its waited-for descendants, if known.
+        """
+        self.stdout = stdout
+        self.stderr = stderr
+        self.exit_code = exit_code
+        self.command_start_time = command_start_time
+        self.timed_out = None
+        self.failure_line = None
+        self.duration = 0.0
+        self.peak_rss_bytes = None
+        self.cpu_seconds = None
 
 
 class Runner:
     @staticmethod
-    def run_command(command, cwd=None):
+    def run_command(command, cwd=None, timeout=None, idle_timeout=None, failure_detector=None):
         """
         Executes a shell command in a specified working directory and returns its output, error, and exit code.
 
         Parameters:
             command (str): The shell command to execute.
             cwd (str, optional): The working directory in which to execute the command. Defaults to None.
+            timeout (float, optional): The maximum wall-clock seconds of the command. Defaults to None (no limit).
+            idle_timeout (float, optional): The maximum seconds without any output from the command. Defaults to None (no limit).
+            failure_detector (TestFailureDetector, optional): Stops the command at the first failed test it reports. Defaults to None (run the command to its end).
 
         Returns:
             tuple: A tuple containing the standard output ('stdout'), standard error ('stderr'), exit code ('exit_code'), and the time of the executed command ('command_start_time').
+            A command killed by a timeout, or stopped at a failed test, has a non-zero exit code, and the reason is explained at the end of 'stderr'.
+        """
+        result = Runner.run_command_detailed(
+            command, cwd=cwd, timeout=timeout, idle_timeout=idle_timeout, failure_detector=failure_detector
+        )
+        return result.stdout, result.stderr, result.exit_code, result.command_start_time
+
+    @staticmethod
+    async def run_command_async(
+        command,
+        cwd=None,
+        timeout=None,
+        idle_timeout=None,
+        max_output_bytes=DEFAULT_MAX_OUTPUT_BYTES,
+        executor: "CommandExecutor" = None,
+        failure_detector=None,
+    ) -> CommandResult:
+        """
+        Run a command like 'run_command_detailed', without blocking the event loop: the command is run by a bounded
+        executor, so the commands awaited concurrently (e.g. the validations of several sandboxes) never run more
+        than its 'max_workers' at the same time.
+
+        Parameters:
+            executor (CommandExecutor, optional): The executor running the command. Defaults to the executor shared by the process.
+
+        Returns:
+            CommandResult: The output, exit code, timeout, and resource usage of the command.
+        """
+        executor = executor if executor is not None else CommandExecutor.get_shared()
+        return await asyncio.wrap_future(
+            executor.submit(
+                command,
+                cwd=cwd,
+                timeout=timeout,
+                idle_timeout=idle_timeout,
+                max_output_bytes=max_output_bytes,
+                failure_detector=failure_detector,
+            )
+        )
+
+    @staticmethod
+    def run_command_detailed(
+        command,
+        cwd=None,
+        timeout=None,
+        idle_timeout=None,
+        max_output_bytes=DEFAULT_MAX_OUTPUT_BYTES,
+        failure_detector=None,
+    ) -> CommandResult:
+        """
+        Executes a shell command in its own process group, streaming its output into bounded buffers.
+
+        When the wall-clock or the idle timeout expires, the whole process group (the shell and the processes it
+        started, e.g. the test runner and its workers) is terminated, then killed after KILL_GRACE_SECONDS. The idle
+        timeout only applies while the output of the command is open, the wall-clock timeout until the command exits.
+
+        With a failure detector, the output is fed to the detector as it is read. At the first failed test, the process
+        group is interrupted (SIGINT), so that the test runner reports the failures so far (e.g. pytest prints its
+        FAILURES section), then it is killed once its output is closed, or after ABORT_GRACE_SECONDS.
+
+        Parameters:
+            command (str): The shell command to execute.
+            cwd (str, optional): The working directory in which to execute the command. Defaults to None.
+            timeout (float, optional): The maximum wall-clock seconds of the command. Defaults to None (no limit).
+            idle_timeout (float, optional): The maximum seconds without any output from the command. Defaults to None (no limit).
+            max_output_bytes (int, optional): The maximum bytes kept of each of stdout and stderr. Defaults to DEFAULT_MAX_OUTPUT_BYTES.
+            failure_detector (TestFailureDetector, optional): Stops the command at the first failed test it reports. Defaults to None (run the command to its end).
+
+        Returns:
+            CommandResult: The output, exit code, timeout, and resource usage of the command.
         """
         # Get the current time before running the test command, in milliseconds
         command_start_time = int(round(time.time() * 1000))
+        start = time.monotonic()
+
+        if os.name != "posix":
+            return Runner._run_command_portable(command, cwd, timeout, command_start_time, start)
+
+        process = subprocess.Popen(
+            command,
+            shell=True,
+            cwd=cwd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+        )
+        buffers = {
+            process.stdout: OutputBuffer(max_output_bytes),
+            process.stderr: OutputBuffer(max_output_bytes),
+        }
+        timed_out = None
+        failure_line = None
+        try:
+            with selectors.DefaultSelector() as selector:
+                for stream in buffers:
+                    selector.register(stream, selectors.EVENT_READ)
+                last_output = start
+                while selector.get_map():
+                    now = time.monotonic()
+                    deadlines = []
+                    if timeout:
+                        deadlines.append((start + timeout, "wall"))
+                    if idle_timeout:
+                        deadlines.append((last_output + idle_timeout, "idle"))
+                    if failure_line is not None:
+                        deadlines.append((abort_deadline, "abort"))
+                    wait = None
+                    if deadlines:
+                        deadline, kind = min(deadlines)
+                        if deadline <= now:
+                            timed_out = kind if kind != "abort" else None
+                            break
+                        wait = deadline - now
+                    for key, _ in selector.select(wait):
+                        data = os.read(key.fileobj.fileno(), 65536)
+                        if data:
+                            buffers[key.fileobj].write(data)
+                            last_output = time.monotonic()
+                            if failure_detector is not None and failure_line is None:
+                                failure_line = failure_detector.feed(key.fileobj, data)
+                                if failure_line is not None:
+                                    Runner._interrupt_process_group(process.pid)
+                                    abort_deadline = last_output + ABORT_GRACE_SECONDS
+                        else:
+                            selector.unregister(key.fileobj)
+
+            exited = None
+            if timeout and timed_out is None and failure_line is None:
+                # The output is closed, but the command may still run (e.g. a process detached from the pipes): the
+                # wall-clock timeout still applies while it is waited for
+                exited, timed_out = Runner._wait_until(process.pid, start + timeout)
+        except BaseException:
+            # The process group is in its own session, so it does not get the Ctrl-C (KeyboardInterrupt) of the
+            # terminal: it is killed here, on any error, not to leave it running
+            exited = Runner._kill_process_group(process.pid)
+            for stream in buffers:
+                stream.close()
+            status = exited[0] if exited is not None else os.waitpid(process.pid, 0)[1]
+            process.returncode = os.waitstatus_to_exitcode(status)
+            raise
 
-        # Ensure the command is executed with shell=True for string commands
-        result = subprocess.run(
-            command, shell=True, cwd=cwd, text=True, capture_output=True
+        if timed_out is not None or failure_line is not None:
+            exited = Runner._kill_process_group(process.pid)
+        for stream in buffers:
+            stream.close()
+        status, rusage = exited if exited is not None else os.wait4(process.pid, 0)[1:]
+        # The process was reaped by 'wait4', not by 'Popen.wait'
+        process.returncode = os.waitstatus_to_exitcode(status)
+
+        result = CommandResult(
+            buffers[process.stdout].text(),
+            buffers[process.stderr].text(),
+            process.returncode,
+            command_start_time,
         )
+        result.timed_out = timed_out
+        result.failure_line = failure_line
+        result.duration = time.monotonic() - start
+        # 'ru_maxrss' is in kilobytes on Linux, and in bytes on macOS
+        result.peak_rss_bytes = rusage.ru_maxrss if os.uname().sysname == "Darwin" else rusage.ru_maxrss * 1024
+        result.cpu_seconds = rusage.ru_utime + rusage.ru_stime
+        if timed_out == "wall":
+            result.stderr += f"\nCommand timed out after {timeout} seconds, its process group was killed."
+        elif timed_out == "idle":
+            result.stderr += f"\nCommand produced no output for {idle_timeout} seconds, its process group was killed."
+        elif failure_line is not None:
+            # A test runner may exit cleanly when it is interrupted
+            result.exit_code = result.exit_code or 1
+            result.stderr += f"\nCommand stopped at the first failed test, its process group was killed: {failure_line}"
+        return result
+
+    @staticmethod
+    def _wait_until(pid: int, deadline: float) -> tuple:
+        """
+        Wait for the process to exit until the deadline (a time.monotonic() time).
+
+        Returns:
+            tuple: The wait status and the resource usage of the process (None if it did not exit), and "wall" if the
+                deadline passed, None otherwise.
+        """
+        delay = 0.001
+        while True:
+            waited_pid, status, rusage = os.wait4(pid, os.WNOHANG)
+            if waited_pid:
+                return (status, rusage), None
+            now = time.monotonic()
+            if now >= deadline:
+                return None, "wall"
+            time.sleep(min(delay, deadline - now))
+            delay = min(delay * 2, 0.05)
+
+    @staticmethod
+    def _interrupt_process_group(pid: int):
+        try:
+            os.killpg(pid, signal.SIGINT)
+        except ProcessLookupError:
+            pass
+
+    @staticmethod
+    def _kill_process_group(pid: int) -> tuple:
+        """
+        Terminate the process group of the process, then kill what is left of the group once the process exited, or
+        after KILL_GRACE_SECONDS.
+
+        Returns:
+            tuple: The wait status and the resource usage of the process, or None if it did not exit yet.
+        """
+        try:
+            os.killpg(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        deadline = time.monotonic() + KILL_GRACE_SECONDS
+        exited = None
+        while exited is None and time.monotonic() < deadline:
+            waited_pid, status, rusage = os.wait4(pid, os.WNOHANG)
+            if waited_pid:
+                exited = (status, rusage)
+            else:
+                time.sleep(0.05)
+        try:
+            # The processes of the group that survived SIGTERM, or outlived the shell
+            os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        return exited
 
-        # Return a dictionary with the desired information
-        return result.stdout, result.stderr, result.returncode, command_start_time
+    @staticmethod
+    def _run_command_portable(command, cwd, timeout, command_start_time, start) -> CommandResult:
+        """
+        Run a command without process groups, idle timeout, failure detection or resource usage, where they are not available
+        (e.g. Windows).
+        """
+        try:
+            completed = subprocess.run(
+                command, shell=True, cwd=cwd, text=True, capture_output=True, timeout=timeout or None
+            )
+            result = CommandResult(completed.stdout, completed.stderr, completed.returncode, command_start_time)
+        except subprocess.TimeoutExpired as e:
+            stdout = e.stdout.decode(errors="replace") if isinstance(e.stdout, bytes) else e.stdout or ""
+            stderr = e.stderr.decode(errors="replace") if isinstance(e.stderr, bytes) else e.stderr or ""
+            result = CommandResult(stdout, stderr + f"\nCommand timed out after {timeout} seconds.", 1, command_start_time)
+            result.timed_out = "wall"
+        result.duration = time.monotonic() - start
+        return result
+
+
+class CommandExecutor:
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, max_workers: int = 0):
+        """
+        A bounded pool of threads running commands with 'Runner.run_command_detailed'. Each thread waits on its own
+        subprocess, so at most 'max_workers' commands run at the same time, and the others wait in the queue.
+
+        Parameters:
+            max_workers (int, optional): The maximum number of commands run at the same time. Defaults to 0 (DEFAULT_MAX_CONCURRENT_COMMANDS, one per core).
+        """
+        self.max_workers = max_workers if max_workers > 0 else DEFAULT_MAX_CONCURRENT_COMMANDS
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="cover-agent-command")
+
+    @classmethod
+    def get_shared(cls, max_workers: int = 0) -> "CommandExecutor":
+        """
+        Returns:
+            CommandExecutor: The executor shared by all the agents of the process with the same limit.
+        """
+        max_workers = max_workers if max_workers > 0 else DEFAULT_MAX_CONCURRENT_COMMANDS
+        with cls._instances_lock:
+            executor = cls._instances.get(max_workers)
+            if executor is None:
+                executor = cls._instances[max_workers] = cls(max_workers)
+            return executor
+
+    def submit(self, command, cwd=None, **kwargs) -> Future:
+        """
+        Queue a command, with the keyword arguments of 'Runner.run_command_detailed'.
+
+        Returns:
+            Future: The future CommandResult of the command.
+        """
+        return self.executor.submit(Runner.run_command_detailed, command, cwd, **kwargs)
@@ -0,0 +1,296 @@
+import asyncio
+import atexit
+import os
+import shutil
+import tempfile
+
+from cover_agent.CoverageProcessor import CoverageProcessor
+from cover_agent.CustomLogger import CustomLogger
+from cover_agent.Runner import CommandExecutor, Runner
+
+# tmpfs mount used for the sandboxes when it is available
+TMPFS_DIR = "/dev/shm"
+
+
+class Sandbox:
+    def __init__(self, root: str, project_dir: str, test_file_path: str, code_coverage_report_path: str, source_file_path: str):
+        """
+        A copy of the project directory, with the paths of the files used during validation mapped into the copy.
+
+        Parameters:
+            root (str): The directory holding the copy of the project.
+            project_dir (str): The original project directory (the test command directory).
+            test_file_path (str): The path of the test file in the original project.
+            code_coverage_report_path (str): The path of the coverage report in the original project.
+            source_file_path (str): The path of the source file in the original project.
+        """
+        self.root = root
+        self.project_dir = project_dir
+        self.test_file_path = self.map_path(test_file_path)
+        self.code_coverage_report_path = self.map_path(code_coverage_report_path)
+        self.source_file_path = self.map_path(source_file_path)
+
+    def map_path(self, path: str) -> str:
+        """
+        Map a path of the original project to the same path in the sandbox. Paths outside of the project are kept as is.
+        """
+        path = os.path.abspath(path)
+        if os.path.commonpath([self.project_dir, path]) != self.project_dir:
+            return path
+        return os.path.join(self.root, os.path.relpath(path, self.project_dir))
+
+    def map_command(self, command: str) -> str:
+        """
+        Rewrite the absolute paths of the original project that appear in a command, so they point into the sandbox.
+        """
+        return command.replace(self.project_dir, self.root)
+
+
+class SandboxPool:
+    def __init__(
+        self,
+        project_dir: str,
+        test_file_path: str,
+        code_coverage_report_path: str,
+        source_file_path: str,
+        size: int,
+        hardlinks: bool = False,
+        root_dir: str = None,
+        ignore_patterns: tuple = (".git",),
+        command_executor: CommandExecutor = None,
+    ):
+        """
+        A pool of pre-created copies of the project, used to validate generated tests concurrently.
+
+        Each sandbox has its own test file and coverage report, so candidates can be inserted and run at the same time.
+        The test commands are run by a bounded CommandExecutor, so no more commands than its 'max_workers' run at the
+        same time, even with more sandboxes. With 'hardlinks' the sandboxes are hardlink farms instead of full copies: the test file is
+        always a real copy, and the coverage report is removed before each run so it is never written through a link.
+        Test commands that modify other files of the project in place should not be used with hardlinks.
+
+        Parameters:
+            project_dir (str): The directory the test command runs in. The test file and the coverage report must be inside it.
+            test_file_path (str): The path of the test file.
+            code_coverage_report_path (str): The path of the coverage report.
+            source_file_path (str): The path of the source file.
+            size (int): The number of sandboxes, which is also the maximum number of candidates validated at the same time.
+            hardlinks (bool, optional): Create the sandboxes as hardlink farms. Defaults to False.
+            root_dir (str, optional): The directory to create the sandboxes in. Defaults to /dev/shm when available, otherwise the system temporary directory.
+            ignore_patterns (tuple, optional): Glob patterns of files and directories not copied into the sandboxes. Defaults to (".git",).
+            command_executor (CommandExecutor, optional): The executor of the test commands. Defaults to the executor shared by the process, sized to the number of cores.
+
+        Raises:
+            ValueError: If the test file or the coverage report is outside of the project directory.
+        """
+        self.project_dir = os.path.abspath(project_dir)
+        for path in (test_file_path, code_coverage_report_path):
+            if os.path.commonpath([self.project_dir, os.path.abspath(path)]) != self.project_dir:
+                raise ValueError(
+                    f"Cannot sandbox {path}: it is outside of the test command directory {self.project_dir}"
+                )
+        self.test_file_path = test_file_path
+        self.code_coverage_report_path = code_coverage_report_path
+        self.source_file_path = source_file_path
+        self.size = size
+        self.hardlinks = hardlinks
+        if root_dir is None and os.path.isdir(TMPFS_DIR) and os.access(TMPFS_DIR, os.W_OK):
+            root_dir = TMPFS_DIR
+        self.root_dir = root_dir
+        self.ignore_patterns = ignore_patterns
+        self.command_executor = command_executor
+        self.logger = CustomLogger.get_logger(__name__)
+
+        self.root = None
+        self.sandboxes = []
+
+    def create(self):
+        """
+        Create the sandboxes.
+        """
+        self.root = tempfile.mkdtemp(prefix="cover-agent-sandbox-", dir=self.root_dir)
+        atexit.register(self.cleanup)
+        copy_function = os.link if self.hardlinks else shutil.copy2
+        for i in range(self.size):
+            sandbox_root = os.path.join(self.root, f"sandbox_{i}")
+            shutil.copytree(
+                self.project_dir,
+                sandbox_root,
+                symlinks=True,
+                copy_function=copy_function,
+                ignore=shutil.ignore_patterns(*self.ignore_patterns),
+            )
+            sandbox = Sandbox(
+                sandbox_root,
+                self.project_dir,
+                self.test_file_path,
+                self.code_coverage_report_path,
+                self.source_file_path,
+            )
+            if self.hardlinks:
+                # Never write through a link into the original project
+                os.unlink(sandbox.test_file_path)
+                shutil.copy2(self.test_file_path, sandbox.test_file_path)
+                if os.path.exists(sandbox.code_coverage_report_path):
+                    os.unlink(sandbox.code_coverage_report_path)
+            self.sandboxes.append(sandbox)
+        self.logger.info(f"Created {self.size} sandboxes in {self.root}")
+
+    def validate(
+        self,
+        test_file_contents: list,
+        test_command: str,
+        coverage_type: str,
+        timeout=None,
+        idle_timeout=None,
+        compile_command: str = None,
+    ) -> list:
+        """
+        Run the test command for each test file content, each in its own sandbox, and collect the coverage.
+
+        Parameters:
+            test_file_contents (list): The content of the test file to validate, one per candidate.
+            test_command (str): The test command of the original project.
+            coverage_type (str): The type of the coverage report.
+            timeout (float, optional): The maximum wall-clock seconds of each run of the test command. Defaults to None (no limit).
+            idle_timeout (float, optional): The maximum seconds of each run of the test command without any output. Defaults to None (no limit).
+            compile_command (str, optional): A compile-only command of the original project, run before the test command. Defaults to None (no command).
+
+        Returns:
+            list: A result dictionary for each content, in the same order, as returned by 'validate_in_sandbox'.
+        """
+        if self.root is None:
+            self.create()
+        return asyncio.run(
+            self.validate_async(test_file_contents, test_command, coverage_type, timeout, idle_timeout, compile_command)
+        )
+
+    async def validate_async(
+        self,
+        test_file_contents: list,
+        test_command: str,
+        coverage_type: str,
+        timeout=None,
+        idle_timeout=None,
+        compile_command: str = None,
+    ) -> list:
+        """
+        The coroutine of 'validate': each sandbox validates a single candidate at a time, and takes the next pending
+        one as soon as it is done.
+        """
+        results = [None] * len(test_file_contents)
+        pending = iter(enumerate(test_file_contents))
+
+        async def validate_next(sandbox: Sandbox):
+            for index, content in pending:
+                results[index] = await validate_in_sandbox(
+                    sandbox,
+                    content,
+                    sandbox.map_command(test_command),
+                    coverage_type,
+                    timeout,
+                    idle_timeout,
+                    self.command_executor,
+                    sandbox.map_command(compile_command) if compile_command else None,
+                )
+
+        await asyncio.gather(*(validate_next(sandbox) for sandbox in self.sandboxes))
+        return results
+
+    def cleanup(self):
+        """
+        Remove the sandboxes.
+        """
+        if self.root is not None:
+            shutil.rmtree(self.root, ignore_errors=True)
+            self.root = None
+        self.sandboxes = []
+
+    def __enter__(self):
+        self.create()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cleanup()
+
+
+async def validate_in_sandbox(
+    sandbox: Sandbox,
+    test_file_content: str,
+    test_command: str,
+    coverage_type: str,
+    timeout=None,
+    idle_timeout=None,
+    command_executor: CommandExecutor = None,
+    compile_command: str = None,
+) -> dict:
+    """
+    Write the test file into a sandbox, run the compile-only command (if any) and the test command there, and parse
+    the sandbox coverage report.
+
+    Returns:
+        dict: The 'stdout', 'stderr' and 'exit_code' of the run, the 'lines_covered', 'lines_missed' and
+        'percentage_covered' when the run passed, and an 'error' message when the coverage could not be processed.
+        When the compile-only command failed, the test command is not run: 'compile_failed' is True, and the output
+        and exit code are those of the compile-only command.
+    """
+    with open(sandbox.test_file_path, "w") as test_file:
+        test_file.write(test_file_content)
+    if os.path.exists(sandbox.code_coverage_report_path):
+        os.unlink(sandbox.code_coverage_report_path)
+
+    if compile_command:
+        compile_result = await Runner.run_command_async(
+            command=compile_command,
+            cwd=sandbox.root,
+            executor=command_executor,
+        )
+        if compile_result.exit_code != 0:
+            return {
+                "stdout": compile_result.stdout,
+                "stderr": compile_result.stderr,
+                "exit_code": compile_result.exit_code,
+                "lines_covered": [],
+                "lines_missed": [],
+                "percentage_covered": None,
+                "error": None,
+                "compile_failed": True,
+            }
+
+    command_result = await Runner.run_command_async(
+        command=test_command,
+        cwd=sandbox.root,
+        timeout=timeout,
+        idle_timeout=idle_timeout,
+        executor=command_executor,
+    )
+    exit_code, time_of_test_command = command_result.exit_code, command_result.command_start_time
+    result = {
+        "stdout": command_result.stdout,
+        "stderr": command_result.stderr,
+        "exit_code": exit_code,
+        "lines_covered": [],
+        "lines_missed": [],
+        "percentage_covered": None,
+        "error": None,
+        "compile_failed": False,
+    }
+    if exit_code != 0:
+        return result
+
+    try:
+        coverage_processor = CoverageProcessor(
+            file_path=sandbox.code_coverage_report_path,
+            src_file_path=sandbox.source_file_path,
+            coverage_type=coverage_type,
+        )
+        lines_covered, lines_missed, percentage_covered = (
+            coverage_processor.process_coverage_report(
+                time_of_test_command=time_of_test_command
+            )
+        )
+        result["lines_covered"] = lines_covered
+        result["lines_missed"] = lines_missed
+        result["percentage_covered"] = percentage_covered
+    except Exception as e:
+        result["error"] = str(e)
+    return result
@@ -0,0 +1,106 @@
+import ast
+
+
+def number_lines(text: str) -> str:
+    """
+    Returns:
+        str: The text with the number of each line (starting from 1) at its start.
+    """
+    return "\n".join([f"{i + 1} {line}" for i, line in enumerate(text.split("\n"))])
+
+
+def python_function_bodies(source: str) -> list:
+    """
+    Index the functions and methods of a Python source file (not the nested functions, which are part of the body of
+    their function).
+
+    Returns:
+        list: The (first line, first body line, last line, body indentation) of each function, where the first line
+            is the first decorator, and the body starts after the docstring. Empty if the source is not valid Python.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return []
+
+    functions = []
+    nodes = list(tree.body)
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, ast.ClassDef):
+            nodes.extend(node.body)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            body = node.body[1:] if ast.get_docstring(node, clean=False) is not None else node.body
+            if not body:
+                continue
+            first_line = min([node.lineno] + [decorator.lineno for decorator in node.decorator_list])
+            body_start = min([body[0].lineno] + [decorator.lineno for decorator in getattr(body[0], "decorator_list", [])])
+            if body_start > node.lineno:
+                functions.append((first_line, body_start, node.end_lineno, body[0].col_offset))
+    return sorted(functions)
+
+
+def python_function_names(source: str) -> list:
+    """
+    Index the functions and methods of a Python source file by name (not the nested functions).
+
+    Returns:
+        list: The (first line, last line, name) of each function, sorted, where the name of a method is prefixed with
+            the name of its class. Empty if the source is not valid Python.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return []
+
+    functions = []
+    nodes = [(node, "") for node in tree.body]
+    while nodes:
+        node, prefix = nodes.pop()
+        if isinstance(node, ast.ClassDef):
+            nodes.extend((child, f"{prefix}{node.name}.") for child in node.body)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            first_line = min([node.lineno] + [decorator.lineno for decorator in node.decorator_list])
+            functions.append((first_line, node.end_lineno, f"{prefix}{node.name}"))
+    return sorted(functions)
+
+
+# The function indexes of the languages whose source files can be sliced
+FUNCTION_INDEXES = {"python": python_function_bodies}
+
+# The function name indexes of the languages whose coverage can be grouped by function
+FUNCTION_NAME_INDEXES = {"python": python_function_names}
+
+
+def slice_source(source: str, missed_lines, language: str) -> str:
+    """
+    Number the lines of a source file, keeping only the signatures of the functions without missed lines: their bodies
+    (of more than one line) are replaced with a single line naming the omitted lines. The functions holding missed
+    lines, and the code outside of functions (imports, constants, class headers), are kept in full.
+
+    Parameters:
+        source (str): The content of the source file.
+        missed_lines (iterable): The line numbers not covered by the tests.
+        language (str): The language of the source file.
+
+    Returns:
+        str: The numbered source, sliced. The full numbered source if the language has no function index, or if there
+            are no missed lines (e.g. a report without line data).
+    """
+    missed_lines = set(missed_lines)
+    function_index = FUNCTION_INDEXES.get(language)
+    if not missed_lines or function_index is None:
+        return number_lines(source)
+
+    lines = source.split("\n")
+    numbered_lines = []
+    next_line = 1
+    for first_line, body_start, last_line, body_indent in function_index(source):
+        # A single line body is kept: it is shorter than the line replacing it
+        if body_start == last_line or any(first_line <= line <= last_line for line in missed_lines):
+            continue
+        numbered_lines.extend(f"{i} {lines[i - 1]}" for i in range(next_line, body_start))
+        numbered_lines.append(f"{' ' * body_indent}... (lines {body_start}-{last_line} have no missed lines, not shown)")
+        next_line = last_line + 1
+    numbered_lines.extend(f"{i} {lines[i - 1]}" for i in range(next_line, len(lines) + 1))
+    return "\n".join(numbered_lines)
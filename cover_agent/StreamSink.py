@@ -0,0 +1,118 @@
+import sys
+import time
+
+# Modes of the --stream-output option
+STREAM_OUTPUT_MODES = ("auto", "console", "progress", "none")
+
+
+class StreamSink:
+    """
+    Consumer of the text streamed by the LLM.
+    """
+
+    def start(self):
+        pass
+
+    def write(self, text: str):
+        pass
+
+    def finish(self):
+        pass
+
+    @staticmethod
+    def from_mode(mode: str = "auto") -> "StreamSink":
+        """
+        Create the sink of a --stream-output mode: "console" echoes the response, "progress" shows a progress line,
+        "none" discards the text, and "auto" echoes the response on a terminal and discards it otherwise (e.g. in CI).
+
+        Raises:
+            ValueError: If the mode is not one of STREAM_OUTPUT_MODES.
+        """
+        if mode == "auto":
+            mode = "console" if sys.stdout.isatty() else "none"
+        if mode == "console":
+            return ConsoleStreamSink()
+        if mode == "progress":
+            return ProgressStreamSink()
+        if mode == "none":
+            return NullStreamSink()
+        raise ValueError(f"Unsupported stream output mode: {mode}. Expected one of {', '.join(STREAM_OUTPUT_MODES)}")
+
+
+class NullStreamSink(StreamSink):
+    """
+    Discard the streamed text, for headless runs.
+    """
+
+
+class ConsoleStreamSink(StreamSink):
+    def __init__(self, stream=None):
+        """
+        Echo the streamed text. The stream is only flushed at the end of lines, not at every chunk.
+
+        Parameters:
+            stream (file, optional): The stream to write to. Defaults to sys.stdout.
+        """
+        self.stream = stream if stream is not None else sys.stdout
+
+    def start(self):
+        print("Streaming results from LLM model...", file=self.stream)
+
+    def write(self, text: str):
+        self.stream.write(text)
+        if "\n" in text:
+            self.stream.flush()
+
+    def finish(self):
+        print("\n", file=self.stream, flush=True)
+
+
+class ProgressStreamSink(StreamSink):
+    def __init__(self, stream=None, interval: float = 0.5):
+        """
+        Show a single line with the number of characters received so far, redrawn at most every 'interval' seconds.
+
+        Parameters:
+            stream (file, optional): The stream to write to. Defaults to sys.stderr.
+            interval (float, optional): The minimum time between redraws, in seconds. Defaults to 0.5.
+        """
+        self.stream = stream if stream is not None else sys.stderr
+        self.interval = interval
+        self.characters = 0
+        self.start_time = 0.0
+        self.last_redraw = 0.0
+
+    def start(self):
+        self.characters = 0
+        self.start_time = self.last_redraw = time.monotonic()
+
+    def write(self, text: str):
+        self.characters += len(text)
+        now = time.monotonic()
+        if now - self.last_redraw >= self.interval:
+            self.last_redraw = now
+            self.redraw(now)
+
+    def finish(self):
+        self.redraw(time.monotonic())
+        self.stream.write("\n")
+        self.stream.flush()
+
+    def redraw(self, now: float):
+        self.stream.write(f"\rReceiving the LLM response: {self.characters} characters in {now - self.start_time:.1f}s")
+        self.stream.flush()
+
+
+class CallbackStreamSink(StreamSink):
+    def __init__(self, callback):
+        """
+        Pass each piece of streamed text to a callback, e.g. to forward the response to a UI.
+
+        Parameters:
+            callback (callable): Called with each piece of text.
+        """
+        self.callback = callback
+
+    def write(self, text: str):
+        self.callback(text)
+
@@ -0,0 +1,134 @@
+import re
+import textwrap
+
+import yaml
+
+from cover_agent.ResponseSchema import NEW_TESTS_SCHEMA
+
+NEW_TESTS_KEY_PATTERN = re.compile(r"^new_tests:\s*$")
+LIST_ITEM_PATTERN = re.compile(r"^(\s*)- ")
+
+
+class StreamingTestParser:
+    def __init__(self):
+        """
+        An incremental parser of the YAML response of the test generation prompt.
+
+        The response is fed as it is streamed, and each entry of 'new_tests' is parsed as soon as it is complete:
+        when the first line of the next entry is received, when the list ends (a top-level key or the closing code
+        fence), or when the stream is closed. An entry that is not valid YAML is recovered with NEW_TESTS_SCHEMA, and
+        an entry that cannot be recovered is skipped, and left to the parsing of the full response.
+        """
+        self.buffer = ""
+        self.header_lines = []
+        self.header = None
+        self.in_new_tests = False
+        self.list_indent = None
+        self.entry_lines = []
+        self.tests = []
+
+    def feed(self, text: str) -> list:
+        """
+        Add streamed text to the response.
+
+        Returns:
+            list: The tests completed by this text, in order.
+        """
+        self.buffer += text
+        *lines, self.buffer = self.buffer.split("\n")
+        completed = []
+        for line in lines:
+            completed.extend(self.process_line(line))
+        return completed
+
+    def close(self) -> list:
+        """
+        End the response.
+
+        Returns:
+            list: The tests completed by the end of the response.
+        """
+        completed = self.process_line(self.buffer) if self.buffer else []
+        self.buffer = ""
+        completed.extend(self.complete_entry())
+        self.in_new_tests = False
+        return completed
+
+    def document(self) -> dict:
+        """
+        Returns:
+            dict: The keys of the response before 'new_tests' (e.g. 'language'), and the tests completed so far.
+        """
+        return {**(self.header or {}), "new_tests": list(self.tests)}
+
+    def has_test(self, generated_test: dict) -> bool:
+        """
+        Returns:
+            bool: True if a test with the same code was already completed.
+        """
+        test_code = str(generated_test.get("test_code", "")).strip()
+        return any(str(test.get("test_code", "")).strip() == test_code for test in self.tests)
+
+    def process_line(self, line: str) -> list:
+        if line.startswith("```"):
+            # Opening or closing code fence
+            completed = self.complete_entry()
+            self.in_new_tests = False
+            return completed
+
+        if not self.in_new_tests:
+            if NEW_TESTS_KEY_PATTERN.match(line):
+                self.in_new_tests = True
+                self.header = self.parse_header()
+            elif self.header is None:
+                self.header_lines.append(line)
+            return []
+
+        if not line.strip():
+            # Blank lines may be part of a block scalar
+            if self.entry_lines:
+                self.entry_lines.append(line)
+            return []
+
+        indent = len(line) - len(line.lstrip())
+        list_item_match = LIST_ITEM_PATTERN.match(line)
+        if list_item_match and self.list_indent is None:
+            self.list_indent = indent
+        if list_item_match and indent == self.list_indent:
+            completed = self.complete_entry()
+            self.entry_lines = [line]
+            return completed
+        if self.list_indent is not None and indent <= self.list_indent:
+            # A key after the list, e.g. when 'new_tests' is not the last key
+            completed = self.complete_entry()
+            self.in_new_tests = False
+            return completed
+        if self.entry_lines:
+            self.entry_lines.append(line)
+        return []
+
+    def parse_header(self) -> dict:
+        try:
+            header = yaml.safe_load("\n".join(self.header_lines))
+        except yaml.YAMLError:
+            return {}
+        return header if isinstance(header, dict) else {}
+
+    def complete_entry(self) -> list:
+        if not self.entry_lines:
+            return []
+        entry_text = textwrap.dedent("\n".join(self.entry_lines).rstrip() + "\n")
+        self.entry_lines = []
+        try:
+            entry = yaml.safe_load(entry_text)
+        except yaml.YAMLError:
+            recovered = NEW_TESTS_SCHEMA.parse("new_tests:\n" + entry_text)
+            entry = recovered["new_tests"] if recovered is not None else None
+
+        if not isinstance(entry, list) or len(entry) != 1:
+            return []
+        generated_test = entry[0]
+        if not isinstance(generated_test, dict) or not generated_test.get("test_code"):
+            return []
+        self.tests.append(generated_test)
+        return [generated_test]
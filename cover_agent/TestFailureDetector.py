@@ -0,0 +1,113 @@
+import codecs
+import re
+
+# Patterns matching the complete line reporting the first failed test in the output of each test framework
+FAILURE_PATTERNS = {
+    "pytest": re.compile(
+        r"^\S+\.py [.sxX]*[FE]"  # progress: "test_app.py ..F"
+        r"|^\S+::\S+ (?:FAILED|ERROR)\b"  # verbose: "test_app.py::test_add FAILED"
+        r"|^[.sxX]*[FE][.sxXFE]*(?:\s+\[\s*\d+%\])?$"  # quiet progress: "..F.   [ 50%]"
+    ),
+    "go": re.compile(r"^\s*--- FAIL: "),  # "--- FAIL: TestAdd (0.00s)"
+    "jest": re.compile(r"^\s*FAIL |^\s*[✕×] "),  # "FAIL src/app.test.js", verbose: "✕ adds numbers (3 ms)"
+    "gradle": re.compile(r"^\S.* > .+ FAILED$"),  # "AppTest > testAdd() FAILED"
+}
+
+# Patterns matching the line being written, for the progress lines written one test at a time. They must not match the
+# start of unrelated lines (e.g. a line starting with "E" or "F", read before its end), which would stop a passing run.
+PARTIAL_LINE_PATTERNS = {
+    "pytest": re.compile(r"^\S+\.py [.sxX]*[FE]"),  # progress: "test_app.py ..F"
+}
+
+# Substrings of the test command naming its framework, tried in order
+FRAMEWORK_COMMANDS = [
+    ("pytest", "pytest"),
+    ("go", "go test"),
+    ("jest", "jest"),
+    ("gradle", "gradle"),
+]
+
+# The modes of the early abort of the test command: off, the framework detected from the test command, or a framework
+EARLY_ABORT_MODES = ("off", "auto") + tuple(FAILURE_PATTERNS)
+
+# The maximum characters of a line matched against the patterns: its start, where the patterns are anchored
+MAX_LINE_CHARS = 1024
+
+
+def detect_framework(test_command: str) -> str:
+    """
+    Returns:
+        str: The test framework of FAILURE_PATTERNS named by the test command (e.g. "pytest" for
+            "coverage run -m pytest"), or None.
+    """
+    for framework, command in FRAMEWORK_COMMANDS:
+        if command in test_command:
+            return framework
+    return None
+
+
+class TestFailureDetector:
+    __test__ = False  # Not a pytest test class, despite its name
+
+    def __init__(self, framework: str):
+        """
+        Detect the first failed test in the output of a test command, as it is streamed by the Runner. A single
+        failure is enough to reject a generated test, since the test command must pass before a test is inserted.
+
+        Parameters:
+            framework (str): One of the frameworks of FAILURE_PATTERNS.
+
+        Raises:
+            ValueError: If the framework has no failure pattern.
+        """
+        if framework not in FAILURE_PATTERNS:
+            raise ValueError(
+                f"Unsupported test framework: {framework}. Expected one of {', '.join(FAILURE_PATTERNS)}"
+            )
+        self.framework = framework
+        self.pattern = FAILURE_PATTERNS[framework]
+        self.partial_line_pattern = PARTIAL_LINE_PATTERNS.get(framework)
+        # The line being written to each stream, up to MAX_LINE_CHARS, and the decoder of each stream (a read can end
+        # in the middle of a character)
+        self.partial_lines = {}
+        self.decoders = {}
+
+    @classmethod
+    def from_mode(cls, mode: str, test_command: str) -> "TestFailureDetector":
+        """
+        Returns:
+            TestFailureDetector: The detector of the mode, one of EARLY_ABORT_MODES, or None when it is "off", or when
+                it is "auto" and the framework of the test command is not known.
+
+        Raises:
+            ValueError: If the mode is not one of EARLY_ABORT_MODES.
+        """
+        if mode not in EARLY_ABORT_MODES:
+            raise ValueError(f"Unsupported early abort mode: {mode}. Expected one of {', '.join(EARLY_ABORT_MODES)}")
+        if mode == "off":
+            return None
+        framework = detect_framework(test_command) if mode == "auto" else mode
+        return cls(framework) if framework is not None else None
+
+    def feed(self, stream, data: bytes) -> str:
+        """
+        Parameters:
+            stream: The stream the data was read from. Each stream has its own partial line.
+            data (bytes): The output read from the stream.
+
+        Returns:
+            str: The line reporting a failed test, or None if none was written yet.
+        """
+        decoder = self.decoders.get(stream)
+        if decoder is None:
+            decoder = self.decoders[stream] = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        lines = (self.partial_lines.get(stream, "") + decoder.decode(data)).split("\n")
+        self.partial_lines[stream] = lines[-1][:MAX_LINE_CHARS]
+        for line in lines[:-1]:
+            line = line.rstrip("\r")[:MAX_LINE_CHARS]
+            if self.pattern.search(line):
+                return line
+        partial_line = self.partial_lines[stream]
+        if self.partial_line_pattern is not None and self.partial_line_pattern.search(partial_line):
+            return partial_line
+        return None
@@ -0,0 +1,131 @@
+import ast
+import hashlib
+import random
+import re
+import textwrap
+
+# Minimum estimated Jaccard similarity of the shingles of two tests for them to be near duplicates
+DEFAULT_SIMILARITY_THRESHOLD = 0.9
+
+# A token of the normalized code: a word or a single punctuation character
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Modulus of the MinHash permutations, a Mersenne prime larger than the 64-bit shingle hashes
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+class PythonTestNormalizer(ast.NodeTransformer):
+    """
+    Normalize the AST of a Python test, so that tests differing only by their names, docstrings or the names of their
+    local variables are equal.
+    """
+
+    def __init__(self):
+        self.local_names = {}
+
+    def visit_FunctionDef(self, node):
+        node.name = "_"
+        if ast.get_docstring(node, clean=False) is not None:
+            node.body = node.body[1:] or [ast.Pass()]
+        return self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Store) and node.id not in self.local_names:
+            self.local_names[node.id] = f"v{len(self.local_names)}"
+        node.id = self.local_names.get(node.id, node.id)
+        return node
+
+
+class TestFingerprintIndex:
+    # Not a test class, despite its name
+    __test__ = False
+
+    def __init__(self, threshold: float = DEFAULT_SIMILARITY_THRESHOLD, num_permutations: int = 64, shingle_size: int = 4):
+        """
+        The fingerprints of the tests validated in a run, to skip the generated tests that repeat one of them.
+
+        A test is fingerprinted by the hash of its normalized code (its AST for Python, with the test name, docstring
+        and local variable names erased), for exact duplicates, and by a MinHash signature of the shingles of its
+        normalized tokens, for near duplicates.
+
+        Parameters:
+            threshold (float, optional): The minimum estimated similarity of a near duplicate. Defaults to 0.9.
+            num_permutations (int, optional): The size of the MinHash signatures. Defaults to 64.
+            shingle_size (int, optional): The number of consecutive tokens of a shingle. Defaults to 4.
+        """
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        permutation_random = random.Random(0)
+        self.permutations = [
+            (permutation_random.randrange(1, MERSENNE_PRIME), permutation_random.randrange(0, MERSENNE_PRIME))
+            for _ in range(num_permutations)
+        ]
+        # The status of each test, by the hash of its normalized code
+        self.statuses = {}
+        # The (signature, status) of each test, for the near duplicate search
+        self.signatures = []
+
+    @staticmethod
+    def normalize(test_code: str) -> str:
+        """
+        Returns:
+            str: The normalized Python code of the test, or its whitespace-separated tokens if it is not Python.
+        """
+        try:
+            tree = ast.parse(textwrap.dedent(test_code))
+        except SyntaxError:
+            return " ".join(TOKEN_PATTERN.findall(test_code))
+        return ast.unparse(PythonTestNormalizer().visit(tree))
+
+    def fingerprint(self, test_code: str) -> tuple:
+        """
+        Returns:
+            tuple: The hash of the normalized code, and the MinHash signature of its shingles.
+        """
+        normalized_code = self.normalize(test_code)
+        exact_hash = hashlib.blake2b(normalized_code.encode("utf-8"), digest_size=16).hexdigest()
+
+        tokens = TOKEN_PATTERN.findall(normalized_code)
+        shingle_count = max(len(tokens) - self.shingle_size + 1, 1)
+        shingle_hashes = {
+            int.from_bytes(
+                hashlib.blake2b(" ".join(tokens[i:i + self.shingle_size]).encode("utf-8"), digest_size=8).digest(),
+                "big",
+            )
+            for i in range(shingle_count)
+        }
+        signature = tuple(
+            min((a * shingle_hash + b) % MERSENNE_PRIME for shingle_hash in shingle_hashes)
+            for a, b in self.permutations
+        )
+        return exact_hash, signature
+
+    def add(self, test_code: str, status: str):
+        """
+        Record the status ("PASS" or "FAIL") of a validated test.
+        """
+        exact_hash, signature = self.fingerprint(test_code)
+        if exact_hash not in self.statuses:
+            self.signatures.append((signature, status))
+        self.statuses[exact_hash] = status
+
+    def find(self, test_code: str) -> tuple:
+        """
+        Search a previously validated test that the given test duplicates.
+
+        Returns:
+            tuple: The status of the duplicated test, and the estimated similarity (1.0 for an exact duplicate), or
+                None if the test is new.
+        """
+        exact_hash, signature = self.fingerprint(test_code)
+        if exact_hash in self.statuses:
+            return self.statuses[exact_hash], 1.0
+
+        best_match = None
+        for other_signature, status in self.signatures:
+            similarity = sum(a == b for a, b in zip(signature, other_signature)) / len(signature)
+            if similarity >= self.threshold and (best_match is None or similarity > best_match[1]):
+                best_match = (status, similarity)
+        return best_match
@@ -0,0 +1,127 @@
+import ast
+import importlib.util
+import os
+import sys
+import textwrap
+
+from cover_agent.Runner import Runner
+
+# Templates of compile-only commands, by language. Placeholder: {test_file} (the test file path)
+COMPILE_COMMAND_TEMPLATES = {
+    "go": "go vet .",
+    "typescript": "npx tsc --noEmit {test_file}",
+    "gradle": "gradle compileTestJava --quiet",
+    "maven": "mvn -q test-compile",
+}
+
+
+class TestPreValidator:
+    # Not a test class, despite its name
+    __test__ = False
+
+    MODES = ("off", "syntax", "imports")
+
+    def __init__(self, mode: str = "syntax", compile_command: str = "", search_dirs: list = None):
+        """
+        Cheap checks of a generated test before the test command is run, to reject the tests that can never pass.
+
+        In "syntax" mode, a Python test file is compiled in-process after the test is inserted. In "imports" mode, the
+        modules imported by the test must also be found, in the environment of Cover Agent or as local modules of the
+        'search_dirs'. Only use this mode when the tests run in the same environment as Cover Agent. Besides, in any
+        mode (even "off"), a compile-only command (e.g. "go vet .") can be run once the test is written to the test file.
+
+        Parameters:
+            mode (str, optional): One of MODES. Defaults to "syntax".
+            compile_command (str, optional): A compile-only command, or the name of one of COMPILE_COMMAND_TEMPLATES. Defaults to an empty string (no command).
+            search_dirs (list, optional): The directories of the local modules the tests can import. Defaults to None.
+
+        Raises:
+            ValueError: If the mode is not one of MODES.
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unsupported pre-validation mode: {mode}. Expected one of {', '.join(self.MODES)}")
+        self.mode = mode
+        self.compile_command = COMPILE_COMMAND_TEMPLATES.get(compile_command, compile_command)
+        self.search_dirs = search_dirs or []
+
+    def check(self, test_file_path: str, test_file_content: str, generated_test: dict) -> str:
+        """
+        Check, in-process, the test file with a generated test inserted.
+
+        Returns:
+            str: The reason the test is rejected, or None if it passed the checks.
+        """
+        if self.mode == "off" or not test_file_path.endswith(".py"):
+            return None
+        try:
+            compile(test_file_content, test_file_path, "exec", dont_inherit=True)
+        except SyntaxError as e:
+            line = f": {e.text.strip()}" if e.text else ""
+            return f"SyntaxError: {e.msg} (line {e.lineno}){line}"
+        if self.mode == "imports":
+            missing_modules = self.find_missing_python_modules(generated_test)
+            if missing_modules:
+                return f"ModuleNotFoundError: No module named {', '.join(repr(name) for name in missing_modules)}"
+        return None
+
+    def get_compile_command(self, test_file_path: str) -> str:
+        """
+        Returns:
+            str: The compile-only command of the test file, or None if there is no command.
+        """
+        if not self.compile_command:
+            return None
+        return self.compile_command.replace("{test_file}", test_file_path)
+
+    def run_compile_command(self, test_file_path: str, cwd: str) -> str:
+        """
+        Run the compile-only command, once the generated test is written to the test file.
+
+        Returns:
+            str: The output of the failed command, or None if it succeeded or there is no command.
+        """
+        command = self.get_compile_command(test_file_path)
+        if command is None:
+            return None
+        stdout, stderr, exit_code, _ = Runner.run_command(command=command, cwd=cwd)
+        if exit_code == 0:
+            return None
+        return self.compile_error_message(stdout, stderr)
+
+    @staticmethod
+    def compile_error_message(stdout: str, stderr: str) -> str:
+        """
+        Returns:
+            str: The reason a test is rejected, from the output of the failed compile-only command.
+        """
+        return f"Compilation failed:\n{(stderr or stdout).strip()}"
+
+    def find_missing_python_modules(self, generated_test: dict) -> list:
+        """
+        Returns:
+            list: The top-level modules imported by the test (its new imports, and the imports inside its code) that
+                cannot be found.
+        """
+        module_names = []
+        for code in (generated_test.get("new_imports_code", ""), generated_test.get("test_code", "")):
+            try:
+                tree = ast.parse(textwrap.dedent(str(code or "")).strip('"'))
+            except SyntaxError:
+                continue
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Import):
+                    module_names.extend(alias.name.split(".")[0] for alias in node.names)
+                elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                    module_names.append(node.module.split(".")[0])
+        return [name for name in dict.fromkeys(module_names) if not self.is_python_module_found(name)]
+
+    def is_python_module_found(self, name: str) -> bool:
+        if name in sys.builtin_module_names or name in getattr(sys, "stdlib_module_names", ()):
+            return True
+        for directory in self.search_dirs:
+            if os.path.isfile(os.path.join(directory, f"{name}.py")) or os.path.isdir(os.path.join(directory, name)):
+                return True
+        try:
+            return importlib.util.find_spec(name) is not None
+        except (ImportError, ValueError):
+            return False
@@ -0,0 +1,116 @@
+import ast
+import hashlib
+import os
+
+
+class TestSuiteAnalyzer:
+    """
+    Static analyzer of the test files of a language. It finds, without calling the LLM, the keys of the initial test
+    suite analysis: 'test_headers_indentation', 'relevant_line_number_to_insert_tests_after' and
+    'relevant_line_number_to_insert_imports_after'.
+    """
+
+    # Not a test class, despite its name
+    __test__ = False
+
+    def supports(self, test_file_path: str) -> bool:
+        return False
+
+    def analyze(self, content: str) -> dict:
+        """
+        Returns:
+            dict: The analysis of the test file, or None if it cannot be found statically (the LLM is asked instead).
+        """
+        return None
+
+
+class PythonTestSuiteAnalyzer(TestSuiteAnalyzer):
+    def supports(self, test_file_path: str) -> bool:
+        return test_file_path.endswith(".py")
+
+    def analyze(self, content: str) -> dict:
+        """
+        Find the last test function of the file, at the top level or in a class. The new tests are indented like it,
+        and inserted after it, or after the end of its class so they are methods of the same class. The new imports
+        are inserted after the last top-level import, or, without imports, after the module docstring (line 0 without
+        a docstring: at the start of the file).
+        """
+        try:
+            tree = ast.parse(content)
+        except SyntaxError:
+            return None
+
+        last_test = None
+        insert_after_node = None
+        imports_after = 0
+        if tree.body and isinstance(tree.body[0], ast.Expr) and isinstance(tree.body[0].value, ast.Constant) \
+                and isinstance(tree.body[0].value.value, str):
+            imports_after = tree.body[0].end_lineno
+        for node in tree.body:
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                imports_after = node.end_lineno
+            elif self.is_test_function(node):
+                last_test = insert_after_node = node
+            elif isinstance(node, ast.ClassDef):
+                tests = [child for child in node.body if self.is_test_function(child)]
+                if tests:
+                    last_test, insert_after_node = tests[-1], node
+
+        if last_test is None:
+            return None
+        return {
+            "test_headers_indentation": last_test.col_offset,
+            "relevant_line_number_to_insert_tests_after": insert_after_node.end_lineno,
+            "relevant_line_number_to_insert_imports_after": imports_after,
+        }
+
+    @staticmethod
+    def is_test_function(node) -> bool:
+        return isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith("test")
+
+
+# The static analyzers, tried in order. Add the analyzer of a new language here
+ANALYZERS = [PythonTestSuiteAnalyzer()]
+
+
+def analyze_test_file(test_file_path: str, content: str) -> dict:
+    """
+    Analyze a test file with the first static analyzer that supports it.
+
+    Returns:
+        dict: The analysis of the test file, or None if no analyzer supports it or could analyze it.
+    """
+    for analyzer in ANALYZERS:
+        if analyzer.supports(test_file_path):
+            analysis = analyzer.analyze(content)
+            if analysis is not None:
+                return analysis
+    return None
+
+
+def analysis_cache_key(content: str) -> str:
+    """
+    Returns:
+        str: The key of the analysis of a test file in the caches, the hash of its content.
+    """
+    return hashlib.sha256(("test-suite-analysis\n" + content).encode("utf-8")).hexdigest()
+
+
+# The analyses of the test files in this process, by the absolute path of the test file: the cache key of the analyzed
+# content, and its analysis. An entry is replaced when its test file changes.
+_analysis_cache = {}
+
+
+def get_cached_analysis(test_file_path: str, cache_key: str) -> dict:
+    """
+    Returns:
+        dict: The cached analysis of the test file, or None if it was not analyzed with this content.
+    """
+    cached = _analysis_cache.get(os.path.abspath(test_file_path))
+    if cached is None or cached[0] != cache_key:
+        return None
+    return cached[1]
+
+
+def cache_analysis(test_file_path: str, cache_key: str, analysis: dict):
+    _analysis_cache[os.path.abspath(test_file_path)] = (cache_key, analysis)
@@ -1,18 +1,60 @@
+import asyncio
 import datetime
 import logging
 import os
+import queue
 import re
+import threading
 import json
 from wandb.sdk.data_types.trace_tree import Trace
 
-from cover_agent.Runner import Runner
+from cover_agent.Runner import CommandExecutor, Runner
+from cover_agent.CoverageIndex import CoverageIndex
 from cover_agent.CoverageProcessor import CoverageProcessor
+from cover_agent.CoverageSummary import COVERAGE_FORMATS, format_coverage_summary
 from cover_agent.CustomLogger import CustomLogger
-from cover_agent.PromptBuilder import PromptBuilder
+from cover_agent.PromptBudgeter import PromptBudgeter
+from cover_agent.PromptBuilder import PromptBuilder, read_file_cached
+from cover_agent.RateLimiter import RateLimiter
+from cover_agent.ResponseSchema import (
+    NEW_TESTS_SCHEMA,
+    TEST_HEADERS_INDENTATION_SCHEMA,
+    TEST_INSERT_LINE_SCHEMA,
+)
+from cover_agent.SandboxPool import SandboxPool
+from cover_agent.StreamSink import StreamSink
+from cover_agent.StreamingTestParser import StreamingTestParser
+from cover_agent.TestFailureDetector import TestFailureDetector
+from cover_agent.TestFingerprintIndex import TestFingerprintIndex
+from cover_agent.TestPreValidator import TestPreValidator
+from cover_agent.TestSuiteAnalyzer import analysis_cache_key, analyze_test_file, cache_analysis, get_cached_analysis
 from cover_agent.AICaller import AICaller
 from cover_agent.FilePreprocessor import FilePreprocessor
+from cover_agent.LineSet import LineSet
+from cover_agent.LLMCache import DEFAULT_CACHE_DIR, LLMCache
 from cover_agent.utils import load_yaml
 from cover_agent.settings.config_loader import get_settings
+from cover_agent.SourceSlicer import python_function_names
+
+# Templates of commands that run a single test, by test framework.
+# Placeholders: {test_command} (the full test command), {test_file} (the test file path, relative to the test command
+# directory), {test_name} (the new test), {test_node_id} (the pytest node ID of the new test, e.g.
+# "test_app.py::TestAdd::test_add", which selects it alone, unlike "-k test_add" that also selects test_add_negative)
+TEST_SELECTION_TEMPLATES = {
+    "pytest": '{test_command} "{test_node_id}"',
+    "go": "{test_command} -run '^{test_name}$'",
+    "gradle": '{test_command} --tests "*{test_name}"',
+    "jest": '{test_command} -t "{test_name}"',
+}
+
+# Patterns extracting the name of a test from its code, tried in order
+TEST_NAME_PATTERNS = [
+    r"def\s+(test\w*)\s*\(",  # pytest
+    r"func\s+(Test\w*)\s*\(",  # go test
+    r"\b(?:it|test)\s*\(\s*['\"`](.+?)['\"`]",  # jest / vitest
+    r"def\s+['\"](.+?)['\"]\s*\(",  # spock
+    r"(?:void|fun)\s+(\w+)\s*\(",  # junit
+]
 
 
 class UnitTestGenerator:
@@ -29,6 +71,26 @@ class UnitTestGenerator:
         coverage_type="cobertura",
         desired_coverage: int = 90,  # Default to 90% coverage if not specified
         additional_instructions: str = "",
+        sandbox_workers: int = 0,
+        sandbox_hardlinks: bool = False,
+        single_test_command: str = "",
+        use_coverage_index: bool = False,
+        llm_cache: str = "off",
+        llm_cache_dir: str = DEFAULT_CACHE_DIR,
+        llm_cache_max_mb: int = 1024,
+        llm_requests_per_minute: int = 0,
+        llm_tokens_per_minute: int = 0,
+        stream_output: str = "auto",
+        structured_output: bool = False,
+        pre_validation: str = "syntax",
+        compile_command: str = "",
+        slice_source: bool = False,
+        prompt_token_budget: int = 0,
+        coverage_format: str = "lists",
+        test_timeout: float = 0,
+        test_idle_timeout: float = 0,
+        max_concurrent_commands: int = 0,
+        early_abort: str = "off",
     ):
         """
         Initialize the UnitTestGenerator class with the provided parameters.
@@ -45,6 +107,26 @@ class UnitTestGenerator:
             coverage_type (str, optional): The type of coverage report. Defaults to "cobertura".
             desired_coverage (int, optional): The desired coverage percentage. Defaults to 90.
             additional_instructions (str, optional): Additional instructions for test generation. Defaults to an empty string.
+            sandbox_workers (int, optional): The number of sandbox copies of the project used by 'validate_tests_parallel'. Defaults to 0.
+            sandbox_hardlinks (bool, optional): Create the sandboxes as hardlink farms instead of full copies. Defaults to False.
+            single_test_command (str, optional): A command template, or the name of one of TEST_SELECTION_TEMPLATES, that runs only the new test in 'validate_test'. Defaults to an empty string (run the full test command).
+            use_coverage_index (bool, optional): Read the coverage from the CoverageIndex shared by the process, instead of parsing the report for each lookup. Defaults to False.
+            llm_cache (str, optional): The mode of the LLM response cache, one of "off", "on" and "replay" (fail on a cache miss). Defaults to "off".
+            llm_cache_dir (str, optional): The directory of the LLM response cache. Defaults to ~/.cache/cover-agent/llm.
+            llm_cache_max_mb (int, optional): The maximum size of the LLM response cache, in MB. Defaults to 1024.
+            llm_requests_per_minute (int, optional): The maximum number of LLM requests per minute, shared by all the agents of the process. Defaults to 0 (unlimited).
+            llm_tokens_per_minute (int, optional): The maximum number of LLM tokens per minute, shared by all the agents of the process. Defaults to 0 (unlimited).
+            stream_output (str, optional): How the streamed LLM responses are shown, one of STREAM_OUTPUT_MODES. Defaults to "auto" (echo on a terminal, nothing otherwise).
+            structured_output (bool, optional): Ask the LLM for JSON responses constrained to the schema of each prompt, if the model supports structured outputs. Defaults to False (YAML responses).
+            pre_validation (str, optional): The checks of the generated tests before the test command is run, one of TestPreValidator.MODES. Defaults to "syntax".
+            compile_command (str, optional): A compile-only command, or the name of one of COMPILE_COMMAND_TEMPLATES, run before the test command to reject the tests that do not compile. Defaults to an empty string (no command).
+            slice_source (bool, optional): Only show the full bodies of the functions of the source file that hold missed lines in the prompt, and the signatures of the others. Defaults to False (the whole source file).
+            prompt_token_budget (int, optional): The maximum number of tokens of the test generation prompt, whose sections are trimmed to fit it. Defaults to 0: the context window of the model, minus the tokens of the response.
+            coverage_format (str, optional): The format of the coverage in the prompt, one of COVERAGE_FORMATS: the lists of the covered and missed lines, or their ranges, with the missed lines grouped by function ("ranges"), or only the ranges of the missed lines ("missed-ranges"). Defaults to "lists".
+            test_timeout (float, optional): The maximum wall-clock seconds of a run of the test command, after which its process group is killed. Defaults to 0 (no limit).
+            test_idle_timeout (float, optional): The maximum seconds of a run of the test command without any output, after which its process group is killed. Defaults to 0 (no limit).
+            max_concurrent_commands (int, optional): The maximum number of test commands run at the same time (e.g. in sandboxes), shared by all the agents of the process. Defaults to 0 (one per core).
+            early_abort (str, optional): Stop the test command of 'validate_test' at the first failed test, one of EARLY_ABORT_MODES: "off", "auto" (the framework of the test command), or the name of a framework. Defaults to "off".
 
         Returns:
             None
@@ -60,16 +142,54 @@ class UnitTestGenerator:
         self.desired_coverage = desired_coverage
         self.additional_instructions = additional_instructions
         self.language = self.get_code_language(source_file_path)
+        self.sandbox_workers = sandbox_workers
+        self.sandbox_hardlinks = sandbox_hardlinks
+        self.slice_source = slice_source
+        if coverage_format not in COVERAGE_FORMATS:
+            raise ValueError(f"Unsupported coverage format: {coverage_format}. Expected one of {', '.join(COVERAGE_FORMATS)}")
+        self.coverage_format = coverage_format
+        self.test_timeout = test_timeout or None
+        self.test_idle_timeout = test_idle_timeout or None
+        # Validates the mode: each run of the test command gets its own detector
+        TestFailureDetector.from_mode(early_abort, test_command)
+        self.early_abort = early_abort
+        self.single_test_command = TEST_SELECTION_TEMPLATES.get(
+            single_test_command, single_test_command
+        )
 
         # Objects to instantiate
-        self.ai_caller = AICaller(model=llm_model, api_base=api_base)
+        self.coverage_index = CoverageIndex.get_instance() if use_coverage_index else None
+        self.command_executor = CommandExecutor.get_shared(max_concurrent_commands)
+        self.pre_validator = TestPreValidator(
+            mode=pre_validation,
+            compile_command=compile_command,
+            search_dirs=[test_command_dir, os.path.dirname(test_file_path), os.path.dirname(source_file_path)],
+        )
+        self.ai_caller = AICaller(
+            model=llm_model,
+            api_base=api_base,
+            cache=LLMCache.from_mode(llm_cache, llm_cache_dir, llm_cache_max_mb),
+            rate_limiter=RateLimiter.get_shared(llm_requests_per_minute, llm_tokens_per_minute),
+            stream_sink=StreamSink.from_mode(stream_output),
+        )
+        self.prompt_budgeter = PromptBudgeter(model=llm_model, token_budget=prompt_token_budget)
 
         # Get the logger instance from CustomLogger
         self.logger = CustomLogger.get_logger(__name__)
 
+        self.structured_output = structured_output and self.ai_caller.supports_structured_output()
+        if structured_output and not self.structured_output:
+            self.logger.warning(
+                f"The model {llm_model} does not support structured outputs, its responses are parsed as YAML."
+            )
+
         # States to maintain within this class
         self.preprocessor = FilePreprocessor(self.test_file_path)
         self.failed_test_runs = []
+        self.fingerprint_index = TestFingerprintIndex()
+        self.sandbox_pool = None
+        self.lines_covered = LineSet()
+        self.lines_missed = LineSet()
 
         # Run coverage and build the prompt
         self.run_coverage()
@@ -124,9 +244,22 @@ class UnitTestGenerator:
         self.logger.info(
             f'Running build/test command to generate coverage report: "{self.test_command}"'
         )
-        stdout, stderr, exit_code, time_of_test_command = Runner.run_command(
-            command=self.test_command, cwd=self.test_command_dir
+        result = Runner.run_command_detailed(
+            command=self.test_command,
+            cwd=self.test_command_dir,
+            timeout=self.test_timeout,
+            idle_timeout=self.test_idle_timeout,
         )
+        stdout, stderr, exit_code, time_of_test_command = (
+            result.stdout,
+            result.stderr,
+            result.exit_code,
+            result.command_start_time,
+        )
+        if result.peak_rss_bytes is not None:
+            self.logger.info(
+                f"Test command ran in {result.duration:.2f}s: peak RSS {result.peak_rss_bytes / 2**20:.1f} MB, CPU time {result.cpu_seconds:.2f}s"
+            )
         assert (
             exit_code == 0
         ), f'Fatal: Error running test command. Are you sure the command is correct? "{self.test_command}"\nExit code {exit_code}. \nStdout: \n{stdout} \nStderr: \n{stderr}'
@@ -136,6 +269,7 @@ class UnitTestGenerator:
             file_path=self.code_coverage_report_path,
             src_file_path=self.source_file_path,
             coverage_type=self.coverage_type,
+            coverage_index=self.coverage_index,
         )
 
         # Use the process_coverage_report method of CoverageProcessor, passing in the time the test command was executed
@@ -147,8 +281,7 @@ class UnitTestGenerator:
             )
 
             # Process the extracted coverage metrics
-            self.current_coverage = percentage_covered
-            self.code_coverage_report = f"Lines covered: {lines_covered}\nLines missed: {lines_missed}\nPercentage covered: {round(percentage_covered * 100, 2)}%"
+            self.update_coverage(lines_covered, lines_missed, percentage_covered)
         except AssertionError as error:
             # Handle the case where the coverage report does not exist or was not updated after the test command
             self.logger.error(f"Error in coverage processing: {error}")
@@ -163,6 +296,134 @@ class UnitTestGenerator:
             with open(self.code_coverage_report_path, "r") as f:
                 self.code_coverage_report = f.read()
 
+    def update_coverage(self, lines_covered, lines_missed, percentage_covered):
+        """
+        Record the coverage of the source file, as parsed from a freshly generated coverage report.
+
+        Parameters:
+            lines_covered (list): The covered line numbers.
+            lines_missed (list): The missed line numbers.
+            percentage_covered (float): The coverage ratio, between 0 and 1.
+
+        Returns:
+            None
+        """
+        self.current_coverage = percentage_covered
+        self.lines_covered = LineSet(lines_covered)
+        self.lines_missed = LineSet(lines_missed)
+        source = ""
+        if self.coverage_format != "lists":
+            try:
+                source = read_file_cached(self.source_file_path)[0]
+            except OSError as e:
+                self.logger.warning(f"Error reading the source file, the coverage is not grouped by function: {e}")
+        self.code_coverage_report = format_coverage_summary(
+            lines_covered,
+            lines_missed,
+            percentage_covered,
+            coverage_format=self.coverage_format,
+            source=source,
+            language=self.language,
+        )
+
+    def get_single_test_command(self, generated_test: dict) -> str:
+        """
+        Build the command that runs only the given generated test, from the 'single_test_command' template.
+
+        Running a single test is only possible when the baseline coverage has line-level data, since the coverage of the
+        test is added to the baseline covered lines instead of being read from a full test suite run.
+
+        Parameters:
+            generated_test (dict): The generated test, as found in the 'new_tests' list of the LLM response.
+
+        Returns:
+            str: The command running only the test, or the full test command if a single test can not be selected.
+        """
+        if not self.single_test_command or not (self.lines_covered or self.lines_missed):
+            return self.test_command
+
+        test_code = generated_test.get("test_code", "")
+        test_name = ""
+        for pattern in TEST_NAME_PATTERNS:
+            match = re.search(pattern, test_code)
+            if match:
+                test_name = match.group(1)
+                break
+        if not test_name:
+            test_name = str(generated_test.get("test_name", "")).strip()
+        if not test_name:
+            return self.test_command
+
+        command = (
+            self.single_test_command.replace("{test_command}", self.test_command)
+            .replace("{test_file}", self.get_test_file_from_command_dir())
+            .replace("{test_name}", test_name)
+        )
+        if "{test_node_id}" in command:
+            command = command.replace("{test_node_id}", self.get_test_node_id(test_name))
+        return command
+
+    def get_test_file_from_command_dir(self) -> str:
+        """
+        Returns:
+            str: The path of the test file relative to the test command directory, where the single test command runs.
+        """
+        return os.path.relpath(os.path.abspath(self.test_file_path), os.path.abspath(self.test_command_dir))
+
+    def get_test_node_id(self, test_name: str) -> str:
+        """
+        Returns:
+            str: The pytest node ID of the test in the test file, with the classes it is defined in (e.g.
+                "test_app.py::TestAdd::test_add"), or "{test_file}::{test_name}" if the test file does not define it. The
+                path of the test file is relative to the test command directory.
+        """
+        try:
+            with open(self.test_file_path, "r") as test_file:
+                test_source = test_file.read()
+        except OSError:
+            test_source = ""
+        qualified_name = test_name
+        for _, _, name in python_function_names(test_source):
+            if name == test_name or name.endswith(f".{test_name}"):
+                qualified_name = name
+                break
+        return f"{self.get_test_file_from_command_dir()}::{qualified_name.replace('.', '::')}"
+
+    def merge_with_baseline_coverage(self, test_lines_covered: list):
+        """
+        Add the lines covered by a single test to the baseline covered lines held in memory.
+
+        Parameters:
+            test_lines_covered (list): The lines covered by the test run alone.
+
+        Returns:
+            tuple: The covered lines, missed lines and coverage percentage of the test suite with the new test.
+        """
+        all_lines = self.lines_covered | self.lines_missed
+        lines_covered = self.lines_covered | (LineSet(test_lines_covered) & all_lines)
+        lines_missed = all_lines - lines_covered
+        percentage_covered = len(lines_covered) / len(all_lines) if all_lines else 0
+        return lines_covered.to_list(), lines_missed.to_list(), percentage_covered
+
+    def get_coverage_increase(self, lines_covered: list, percentage_covered: float):
+        """
+        Compare the coverage of a test run with the current coverage.
+
+        When the coverage report has line-level data, the coverage increased if at least one line that is missed in the
+        current coverage is covered. Otherwise, the coverage percentages are compared.
+
+        Parameters:
+            lines_covered (list): The lines covered by the test run.
+            percentage_covered (float): The coverage ratio of the test run, between 0 and 1.
+
+        Returns:
+            tuple: Whether the coverage increased, and the sorted list of the newly covered lines.
+        """
+        if self.lines_covered or self.lines_missed:
+            new_lines_covered = (LineSet(lines_covered) & self.lines_missed).to_list()
+            return bool(new_lines_covered), new_lines_covered
+        return percentage_covered > self.current_coverage, []
+
     @staticmethod
     def get_included_files(included_files):
         """
@@ -242,66 +503,125 @@ class UnitTestGenerator:
             additional_instructions=self.additional_instructions,
             failed_test_runs=failed_test_runs_value,
             language=self.language,
+            structured_output=self.structured_output,
+            missed_lines=self.lines_missed if self.slice_source else None,
+            budgeter=self.prompt_budgeter,
         )
+        if self.prompt_builder.source_file_token_counts is not None:
+            tokens_before, tokens_after = self.prompt_builder.source_file_token_counts
+            self.logger.info(
+                f"Sliced the source file around its missed lines: {tokens_before} tokens before, {tokens_after} tokens after"
+            )
 
-        return self.prompt_builder.build_prompt()
+        prompt = self.prompt_builder.build_prompt()
+        for decision in self.prompt_builder.budget_decisions:
+            self.logger.info(decision)
+        return prompt
 
     def initial_test_suite_analysis(self):
+        """
+        Find the indentation of the test headers, and the lines of the test file to insert the new tests and imports
+        after.
+
+        The test file is analyzed statically when its language has an analyzer (see TestSuiteAnalyzer). Otherwise, or
+        when the static analysis fails, the LLM is asked: the two analyses are independent, so their requests are sent
+        concurrently. The result is cached by the content of the test file, so an unchanged test file is not analyzed
+        again: per test file in this process, and across runs in the LLM cache when there is one.
+        """
         try:
-            test_headers_indentation = None
-            allowed_attempts = 3
-            counter_attempts = 0
-            while test_headers_indentation is None and counter_attempts < allowed_attempts:
-                prompt_headers_indentation = (
-                    self.prompt_builder.build_prompt_custom(
-                        file="analyze_suite_test_headers_indentation"
-                    )
-                )
-                response, prompt_token_count, response_token_count = (
-                    self.ai_caller.call_model(prompt=prompt_headers_indentation)
-                )
-                tests_dict = load_yaml(response)
-                test_headers_indentation = tests_dict.get(
-                    "test_headers_indentation", None
-                )
-                counter_attempts += 1
-
-            if test_headers_indentation is None:
-                raise Exception("Failed to analyze the test headers indentation")
-
-            relevant_line_number_to_insert_tests_after = None
-            relevant_line_number_to_insert_imports_after = None
-            allowed_attempts = 3
-            counter_attempts = 0
-            while not relevant_line_number_to_insert_tests_after and counter_attempts < allowed_attempts:
-                prompt_test_insert_line = (
-                    self.prompt_builder.build_prompt_custom(
-                        file="analyze_suite_test_insert_line"
-                    )
-                )
-                response, prompt_token_count, response_token_count = (
-                    self.ai_caller.call_model(prompt=prompt_test_insert_line)
-                )
-                tests_dict = load_yaml(response)
-                relevant_line_number_to_insert_tests_after = tests_dict.get(
-                    "relevant_line_number_to_insert_tests_after", None
+            with open(self.test_file_path, "r") as test_file:
+                test_file_content = test_file.read()
+            cache = self.ai_caller.cache
+            cache_key = analysis_cache_key(test_file_content)
+            analysis = get_cached_analysis(self.test_file_path, cache_key)
+            if analysis is None and cache is not None:
+                analysis = cache.get(cache_key)
+            if analysis is None:
+                analysis = analyze_test_file(self.test_file_path, test_file_content)
+                if analysis is None:
+                    test_headers_indentation, (
+                        relevant_line_number_to_insert_tests_after,
+                        relevant_line_number_to_insert_imports_after,
+                    ) = asyncio.run(self.analyze_test_suite())
+                    analysis = {
+                        "test_headers_indentation": test_headers_indentation,
+                        "relevant_line_number_to_insert_tests_after": relevant_line_number_to_insert_tests_after,
+                        "relevant_line_number_to_insert_imports_after": relevant_line_number_to_insert_imports_after,
+                    }
+                if cache is not None and not cache.replay:
+                    cache.put(cache_key, analysis)
+            cache_analysis(self.test_file_path, cache_key, analysis)
+
+            self.test_headers_indentation = analysis["test_headers_indentation"]
+            self.relevant_line_number_to_insert_tests_after = analysis["relevant_line_number_to_insert_tests_after"]
+            self.relevant_line_number_to_insert_imports_after = analysis["relevant_line_number_to_insert_imports_after"]
+        except Exception as e:
+            self.logger.error(f"Error during initial test suite analysis: {e}")
+            raise Exception("Error during initial test suite analysis")
+
+    async def analyze_test_suite(self):
+        return await asyncio.gather(
+            self.analyze_test_headers_indentation(),
+            self.analyze_test_insert_line(),
+        )
+
+    async def analyze_test_headers_indentation(self):
+        test_headers_indentation = None
+        allowed_attempts = 3
+        counter_attempts = 0
+        while test_headers_indentation is None and counter_attempts < allowed_attempts:
+            prompt_headers_indentation = (
+                self.prompt_builder.build_prompt_custom(
+                    file="analyze_suite_test_headers_indentation"
                 )
-                relevant_line_number_to_insert_imports_after = tests_dict.get(
-                    "relevant_line_number_to_insert_imports_after", None
+            )
+            response, prompt_token_count, response_token_count = (
+                await self.ai_caller.acall_model(
+                    prompt=prompt_headers_indentation,
+                    **self.structured_output_params(TEST_HEADERS_INDENTATION_SCHEMA),
                 )
-                counter_attempts += 1
+            )
+            tests_dict = self.parse_response(response, TEST_HEADERS_INDENTATION_SCHEMA)
+            test_headers_indentation = tests_dict.get(
+                "test_headers_indentation", None
+            )
+            counter_attempts += 1
+
+        if test_headers_indentation is None:
+            raise Exception("Failed to analyze the test headers indentation")
+        return test_headers_indentation
 
-            if not relevant_line_number_to_insert_tests_after:
-                raise Exception(
-                    "Failed to analyze the relevant line number to insert new tests"
+    async def analyze_test_insert_line(self):
+        relevant_line_number_to_insert_tests_after = None
+        relevant_line_number_to_insert_imports_after = None
+        allowed_attempts = 3
+        counter_attempts = 0
+        while not relevant_line_number_to_insert_tests_after and counter_attempts < allowed_attempts:
+            prompt_test_insert_line = (
+                self.prompt_builder.build_prompt_custom(
+                    file="analyze_suite_test_insert_line"
                 )
+            )
+            response, prompt_token_count, response_token_count = (
+                await self.ai_caller.acall_model(
+                    prompt=prompt_test_insert_line,
+                    **self.structured_output_params(TEST_INSERT_LINE_SCHEMA),
+                )
+            )
+            tests_dict = self.parse_response(response, TEST_INSERT_LINE_SCHEMA)
+            relevant_line_number_to_insert_tests_after = tests_dict.get(
+                "relevant_line_number_to_insert_tests_after", None
+            )
+            relevant_line_number_to_insert_imports_after = tests_dict.get(
+                "relevant_line_number_to_insert_imports_after", None
+            )
+            counter_attempts += 1
 
-            self.test_headers_indentation = test_headers_indentation
-            self.relevant_line_number_to_insert_tests_after = relevant_line_number_to_insert_tests_after
-            self.relevant_line_number_to_insert_imports_after = relevant_line_number_to_insert_imports_after
-        except Exception as e:
-            self.logger.error(f"Error during initial test suite analysis: {e}")
-            raise Exception("Error during initial test suite analysis")
+        if not relevant_line_number_to_insert_tests_after:
+            raise Exception(
+                "Failed to analyze the relevant line number to insert new tests"
+            )
+        return relevant_line_number_to_insert_tests_after, relevant_line_number_to_insert_imports_after
 
     def generate_tests(self, max_tokens=4096, dry_run=False):
         self.prompt = self.build_prompt()
@@ -310,14 +630,19 @@ class UnitTestGenerator:
             response = "```def test_something():\n    pass```\n```def test_something_else():\n    pass```\n```def test_something_different():\n    pass```"
         else:
             response, prompt_token_count, response_token_count = (
-                self.ai_caller.call_model(prompt=self.prompt, max_tokens=max_tokens)
+                self.ai_caller.call_model(
+                    prompt=self.prompt,
+                    max_tokens=max_tokens,
+                    **self.structured_output_params(NEW_TESTS_SCHEMA),
+                )
             )
         self.logger.info(
             f"Total token used count for LLM model {self.ai_caller.model}: {prompt_token_count + response_token_count}"
         )
         try:
-            tests_dict = load_yaml(
+            tests_dict = self.parse_response(
                 response,
+                NEW_TESTS_SCHEMA,
                 keys_fix_yaml=["test_tags", "test_code", "test_name", "test_behavior"],
             )
             if tests_dict is None:
@@ -338,10 +663,118 @@ class UnitTestGenerator:
 
         return tests_dict
 
-    def validate_test(self, generated_test: dict, generated_tests_dict: dict):
+    def structured_output_params(self, schema) -> dict:
+        """
+        Returns:
+            dict: The extra parameters of a call to the LLM for a response of the schema: its response format in
+                structured output mode, none otherwise.
+        """
+        return {"response_format": schema.response_format()} if self.structured_output else {}
+
+    def parse_response(self, response: str, schema, keys_fix_yaml=[]) -> dict:
+        """
+        Read a response of the LLM: validate it against the schema in structured output mode, and parse it as YAML
+        otherwise, or when the model did not follow the schema.
+
+        Returns:
+            dict: The data of the response.
+        """
+        if self.structured_output:
+            data = schema.parse_json(response)
+            if data is not None:
+                return data
+            self.logger.warning(f"The response does not match the {schema.name} schema, parsing it as YAML.")
+        return load_yaml(response, keys_fix_yaml=keys_fix_yaml, schema=schema)
+
+    def generate_tests_incrementally(self, max_tokens=4096):
+        """
+        Generate new tests like 'generate_tests', but yield each test as soon as the LLM has finished writing it,
+        so it can be validated while the rest of the response is still being generated.
+
+        The LLM is called in a background thread, and its streamed response is fed to a StreamingTestParser. Once the
+        response is complete, the tests that could only be read by the tolerant parsing of the full response
+        ('load_yaml') are yielded too.
+
+        Parameters:
+            max_tokens (int, optional): The maximum number of tokens of the response. Defaults to 4096.
+
+        Yields:
+            tuple: A generated test, and the response parsed so far (the 'generated_tests_dict' of 'validate_test').
+        """
+        if self.structured_output:
+            # A JSON response is only parsed once complete
+            tests_dict = self.generate_tests(max_tokens)
+            for generated_test in (tests_dict or {}).get("new_tests") or []:
+                yield generated_test, tests_dict
+            return
+
+        self.prompt = self.build_prompt()
+        keys_fix_yaml = ["test_tags", "test_code", "test_name", "test_behavior"]
+        parser = StreamingTestParser()
+        completed_tests = queue.Queue()
+        outcome = {}
+
+        def on_text(text):
+            for generated_test in parser.feed(text):
+                completed_tests.put(generated_test)
+
+        def call_model():
+            try:
+                outcome["response"] = self.ai_caller.call_model(
+                    prompt=self.prompt, max_tokens=max_tokens, on_text=on_text
+                )
+            except Exception as e:
+                outcome["error"] = e
+            finally:
+                completed_tests.put(None)
+
+        thread = threading.Thread(target=call_model, daemon=True)
+        thread.start()
+        while (generated_test := completed_tests.get()) is not None:
+            yield generated_test, parser.document()
+        thread.join()
+        if "error" in outcome:
+            raise outcome["error"]
+
+        response, prompt_token_count, response_token_count = outcome["response"]
+        self.logger.info(
+            f"Total token used count for LLM model {self.ai_caller.model}: {prompt_token_count + response_token_count}"
+        )
+        for generated_test in parser.close():
+            yield generated_test, parser.document()
+
         try:
-            # Step 0: no pre-process.
-            # We asked the model that each generated test should be a self-contained independent test
+            tests_dict = load_yaml(response, keys_fix_yaml=keys_fix_yaml, schema=NEW_TESTS_SCHEMA)
+        except Exception as e:
+            self.logger.error(f"Error during test generation: {e}")
+            tests_dict = None
+        if not isinstance(tests_dict, dict):
+            return
+        for generated_test in tests_dict.get("new_tests") or []:
+            if isinstance(generated_test, dict) and not parser.has_test(generated_test):
+                yield generated_test, tests_dict
+
+    def _insert_tests(self, original_content: str, generated_tests: list):
+        """
+        Insert generated tests, and the new imports they need, into the content of the test file.
+
+        The tests are inserted after 'relevant_line_number_to_insert_tests_after', re-indented to 'test_headers_indentation'.
+        New imports that are not already in the test file are inserted after 'relevant_line_number_to_insert_imports_after'.
+
+        Parameters:
+            original_content (str): The current content of the test file.
+            generated_tests (list): The generated tests, as found in the 'new_tests' list of the LLM response.
+
+        Returns:
+            tuple: The processed test file content, and the number of import lines inserted above the tests.
+        """
+        relevant_line_number_to_insert_tests_after = self.relevant_line_number_to_insert_tests_after
+        relevant_line_number_to_insert_imports_after = self.relevant_line_number_to_insert_imports_after
+        needed_indent = self.test_headers_indentation
+
+        test_code_lines = []
+        additional_imports_list = []
+        for generated_test in generated_tests:
             test_code = generated_test.get("test_code", "").rstrip()
             additional_imports = generated_test.get("new_imports_code", "").strip()
             if additional_imports and additional_imports[0] == '"' and additional_imports[-1] == '"':
@@ -350,10 +783,9 @@ class UnitTestGenerator:
             # check if additional_imports only contains '"':
             if additional_imports and additional_imports == '""':
                 additional_imports = ""
-            relevant_line_number_to_insert_tests_after = self.relevant_line_number_to_insert_tests_after
-            relevant_line_number_to_insert_imports_after = self.relevant_line_number_to_insert_imports_after
+            if additional_imports and additional_imports not in additional_imports_list:
+                additional_imports_list.append(additional_imports)
 
-            needed_indent = self.test_headers_indentation
             # remove initial indent of the test code, and insert the needed indent
             test_code_indented = test_code
             if needed_indent:
@@ -364,41 +796,169 @@ class UnitTestGenerator:
                         [delta_indent * " " + line for line in test_code.split("\n")]
                     )
             test_code_indented = "\n" + test_code_indented.strip("\n") + "\n"
+            test_code_lines += test_code_indented.split("\n")
+
+        # insert the test code at the relevant line
+        original_content_lines = original_content.split("\n")
+        processed_test_lines = (
+            original_content_lines[:relevant_line_number_to_insert_tests_after]
+            + test_code_lines
+            + original_content_lines[relevant_line_number_to_insert_tests_after:]
+        )
+
+        # insert the additional imports at line 'relevant_line_number_to_insert_imports_after'
+        inserted_imports_line_count = 0
+        if relevant_line_number_to_insert_imports_after is not None:
+            for additional_imports in additional_imports_list:
+                if additional_imports in "\n".join(processed_test_lines):
+                    continue
+                additional_imports_lines = additional_imports.split("\n")
+                insert_at = relevant_line_number_to_insert_imports_after + inserted_imports_line_count
+                processed_test_lines = (
+                    processed_test_lines[:insert_at]
+                    + additional_imports_lines
+                    + processed_test_lines[insert_at:]
+                )
+                inserted_imports_line_count += len(additional_imports_lines)
+
+        return "\n".join(processed_test_lines), inserted_imports_line_count
+
+    def pre_validate(self, generated_test: dict, test_file_content: str) -> dict:
+        """
+        Check a generated test, inserted into the test file content, with the in-process checks of the pre-validator.
+
+        Returns:
+            dict: The failure details of a rejected test, or None if the test passed the checks.
+        """
+        error_message = self.pre_validator.check(self.test_file_path, test_file_content, generated_test)
+        if error_message is None:
+            return None
+        return self.reject_test(generated_test, error_message)
+
+    def reject_test(self, generated_test: dict, error_message: str) -> dict:
+        """
+        Record a test rejected by the pre-validation in the failed test runs, so the next prompt shows its error.
+
+        Returns:
+            dict: The failure details of the test.
+        """
+        self.logger.info(f"Skipping a generated test that failed the pre-validation: {error_message}")
+        self.failed_test_runs.append({"code": generated_test, "error_message": error_message})
+        return {
+            "status": "FAIL",
+            "reason": "Pre-validation failed",
+            "exit_code": None,
+            "stderr": error_message,
+            "stdout": "",
+            "test": generated_test,
+        }
+
+    @staticmethod
+    def merge_rejected_results(rejected_results, validate, generated_tests, generated_tests_dict) -> list:
+        """
+        Validate the tests that were not rejected (by the pre-validation, or as duplicates) with 'validate', and merge
+        their results with the failure details of the rejected tests.
+
+        Parameters:
+            rejected_results (list): The failure details of each rejected test, None for the other tests.
+
+        Returns:
+            list: A result dictionary for each generated test, in the same order as 'generated_tests'.
+        """
+        accepted_tests = [
+            generated_test
+            for generated_test, fail_details in zip(generated_tests, rejected_results)
+            if fail_details is None
+        ]
+        accepted_results = iter(validate(accepted_tests, generated_tests_dict) if accepted_tests else [])
+        return [
+            fail_details if fail_details is not None else next(accepted_results)
+            for fail_details in rejected_results
+        ]
+
+    def skip_duplicate(self, generated_test: dict) -> dict:
+        """
+        Check whether a generated test repeats, exactly or nearly, a test already validated in this run.
+
+        Returns:
+            dict: The failure details of a duplicate test, or None if the test is new.
+        """
+        match = self.fingerprint_index.find(str(generated_test.get("test_code", "")))
+        if match is None:
+            return None
+        status, similarity = match
+        outcome = "passed" if status == "PASS" else "failed"
+        error_message = f"duplicate of a test that already {outcome} (similarity {similarity:.0%})"
+        self.logger.info(f"Skipping a generated test that is a {error_message}")
+        self.failed_test_runs.append({"code": generated_test, "error_message": error_message})
+        return {
+            "status": "FAIL",
+            "reason": "Duplicate test",
+            "exit_code": None,
+            "stderr": "",
+            "stdout": "",
+            "test": generated_test,
+        }
+
+    def record_results(self, results: list):
+        """
+        Add the validated tests to the fingerprint index, with their status.
+        """
+        for result in results:
+            if result is not None and result.get("reason") != "Duplicate test":
+                self.fingerprint_index.add(str(result["test"].get("test_code", "")), result["status"])
+
+    def validate_test(self, generated_test: dict, generated_tests_dict: dict):
+        """
+        Validate a generated test: insert it into the test file, run it, and keep it if it passes and increases the
+        coverage. A duplicate of a test already validated in this run is skipped without touching the test file.
 
-            if test_code_indented and relevant_line_number_to_insert_tests_after:
+        Returns:
+            dict: The result of the validation.
+        """
+        fail_details = self.skip_duplicate(generated_test)
+        if fail_details is not None:
+            return fail_details
+        result = self._validate_test(generated_test, generated_tests_dict)
+        self.record_results([result])
+        return result
+
+    def _validate_test(self, generated_test: dict, generated_tests_dict: dict):
+        try:
+            # Step 0: no pre-process.
+            # We asked the model that each generated test should be a self-contained independent test
+            if self.relevant_line_number_to_insert_tests_after:
 
                 # Step 1: Append the generated test to the relevant line in the test file
                 with open(self.test_file_path, "r") as test_file:
                     original_content = test_file.read()  # Store original content
-                original_content_lines = original_content.split("\n")
-                test_code_lines = test_code_indented.split("\n")
-                # insert the test code at the relevant line
-                processed_test_lines = (
-                    original_content_lines[:relevant_line_number_to_insert_tests_after]
-                    + test_code_lines
-                    + original_content_lines[relevant_line_number_to_insert_tests_after:]
+                processed_test, inserted_imports_line_count = self._insert_tests(
+                    original_content, [generated_test]
                 )
-                # insert the additional imports at line 'relevant_line_number_to_insert_imports_after'
-                processed_test = "\n".join(processed_test_lines)
-                if relevant_line_number_to_insert_imports_after and additional_imports and additional_imports not in processed_test:
-                    additional_imports_lines = additional_imports.split("\n")
-                    processed_test_lines = (
-                        processed_test_lines[:relevant_line_number_to_insert_imports_after]
-                        + additional_imports_lines
-                        + processed_test_lines[relevant_line_number_to_insert_imports_after:]
-                    )
-                    self.relevant_line_number_to_insert_tests_after += len(additional_imports_lines) # this is important, otherwise the next test will be inserted at the wrong line
-                processed_test = "\n".join(processed_test_lines)
+                fail_details = self.pre_validate(generated_test, processed_test)
+                if fail_details is not None:
+                    return fail_details
 
                 with open(self.test_file_path, "w") as test_file:
                     test_file.write(processed_test)
 
+                compile_error = self.pre_validator.run_compile_command(self.test_file_path, self.test_command_dir)
+                if compile_error is not None:
+                    with open(self.test_file_path, "w") as test_file:
+                        test_file.write(original_content)
+                    return self.reject_test(generated_test, compile_error)
+
                 # Step 2: Run the test using the Runner class
+                test_command = self.get_single_test_command(generated_test)
                 self.logger.info(
-                    f'Running test with the following command: "{self.test_command}"'
+                    f'Running test with the following command: "{test_command}"'
                 )
                 stdout, stderr, exit_code, time_of_test_command = Runner.run_command(
-                    command=self.test_command, cwd=self.test_command_dir
+                    command=test_command,
+                    cwd=self.test_command_dir,
+                    timeout=self.test_timeout,
+                    idle_timeout=self.test_idle_timeout,
+                    failure_detector=TestFailureDetector.from_mode(self.early_abort, self.test_command),
                 )
 
                 # Step 3: Check for pass/fail from the Runner object
@@ -442,14 +1002,23 @@ class UnitTestGenerator:
                         file_path=self.code_coverage_report_path,
                         src_file_path=self.source_file_path,
                         coverage_type=self.coverage_type,
+                        coverage_index=self.coverage_index,
                     )
-                    _, _, new_percentage_covered = (
+                    new_lines_covered, new_lines_missed, new_percentage_covered = (
                         new_coverage_processor.process_coverage_report(
                             time_of_test_command=time_of_test_command
                         )
                     )
+                    if test_command != self.test_command:
+                        # Only the new test ran, so the report holds its coverage alone
+                        new_lines_covered, new_lines_missed, new_percentage_covered = (
+                            self.merge_with_baseline_coverage(new_lines_covered)
+                        )
 
-                    if new_percentage_covered <= self.current_coverage:
+                    coverage_increased, new_lines_covered_by_test = self.get_coverage_increase(
+                        new_lines_covered, new_percentage_covered
+                    )
+                    if not coverage_increased:
                         # Coverage has not increased, rollback the test by removing it from the test file
                         with open(self.test_file_path, "w") as test_file:
                             test_file.write(original_content)
@@ -503,9 +1072,10 @@ class UnitTestGenerator:
                     return fail_details
 
                 # If everything passed and coverage increased, update current coverage and log success
-                self.current_coverage = new_percentage_covered
+                self.update_coverage(new_lines_covered, new_lines_missed, new_percentage_covered)
+                self.relevant_line_number_to_insert_tests_after += inserted_imports_line_count  # this is important, otherwise the next test will be inserted at the wrong line
                 self.logger.info(
-                    f"Test passed and coverage increased. Current coverage: {round(new_percentage_covered * 100, 2)}%"
+                    f"Test passed and coverage increased ({len(new_lines_covered_by_test)} new lines covered). Current coverage: {round(new_percentage_covered * 100, 2)}%"
                 )
                 return {
                     "status": "PASS",
@@ -514,6 +1084,7 @@ class UnitTestGenerator:
                     "stderr": stderr,
                     "stdout": stdout,
                     "test": generated_test,
+                    "new_lines_covered": new_lines_covered_by_test,
                 }
         except Exception as e:
             self.logger.error(f"Error validating test: {e}")
@@ -526,6 +1097,309 @@ class UnitTestGenerator:
                 "test": generated_test,
             }
 
+    def validate_tests_batch(self, generated_tests: list, generated_tests_dict: dict) -> list:
+        """
+        Validate a batch of generated tests with a single run of the test command.
+
+        All the tests are inserted into the test file together, checked with the compile-only command of the
+        pre-validator (if any), and the test command is run once. If the run passes and the coverage increased, all the
+        tests are kept. If the compilation or the run fails, the batch is rolled back and split in two halves that are
+        validated separately, down to single tests that are validated with 'validate_test'.
+        A batch that passes without increasing the coverage is rolled back as a whole.
+
+        Parameters:
+            generated_tests (list): The generated tests, as found in the 'new_tests' list of the LLM response.
+            generated_tests_dict (dict): The LLM response the tests were taken from.
+
+        Returns:
+            list: A result dictionary for each generated test, in the same order as 'generated_tests'. The 'new_lines_covered'
+            of a passing batch are the lines newly covered by the whole batch.
+        """
+        if len(generated_tests) <= 1 or not self.relevant_line_number_to_insert_tests_after:
+            return [
+                self.validate_test(generated_test, generated_tests_dict)
+                for generated_test in generated_tests
+            ]
+
+        duplicate_results = [self.skip_duplicate(generated_test) for generated_test in generated_tests]
+        if any(duplicate_results):
+            return self.merge_rejected_results(
+                duplicate_results, self.validate_tests_batch, generated_tests, generated_tests_dict
+            )
+
+        with open(self.test_file_path, "r") as test_file:
+            original_content = test_file.read()  # Store original content
+
+        pre_validation_results = [
+            self.pre_validate(generated_test, self._insert_tests(original_content, [generated_test])[0])
+            for generated_test in generated_tests
+        ]
+        if any(pre_validation_results):
+            self.record_results(pre_validation_results)
+            return self.merge_rejected_results(
+                pre_validation_results,
+                self.validate_tests_batch,
+                generated_tests,
+                generated_tests_dict,
+            )
+
+        stdout, stderr, exit_code = "", "", None
+        compile_error = None
+        try:
+            processed_test, inserted_imports_line_count = self._insert_tests(
+                original_content, generated_tests
+            )
+            with open(self.test_file_path, "w") as test_file:
+                test_file.write(processed_test)
+
+            compile_error = self.pre_validator.run_compile_command(self.test_file_path, self.test_command_dir)
+            if compile_error is None:
+                self.logger.info(
+                    f'Running {len(generated_tests)} tests with the following command: "{self.test_command}"'
+                )
+                stdout, stderr, exit_code, time_of_test_command = Runner.run_command(
+                    command=self.test_command,
+                    cwd=self.test_command_dir,
+                    timeout=self.test_timeout,
+                    idle_timeout=self.test_idle_timeout,
+                )
+            if exit_code == 0:
+                new_coverage_processor = CoverageProcessor(
+                    file_path=self.code_coverage_report_path,
+                    src_file_path=self.source_file_path,
+                    coverage_type=self.coverage_type,
+                    coverage_index=self.coverage_index,
+                )
+                new_lines_covered, new_lines_missed, new_percentage_covered = (
+                    new_coverage_processor.process_coverage_report(
+                        time_of_test_command=time_of_test_command
+                    )
+                )
+        except Exception as e:
+            self.logger.error(f"Error validating batch of tests: {e}")
+            with open(self.test_file_path, "w") as test_file:
+                test_file.write(original_content)
+            results = []
+            for generated_test in generated_tests:
+                self.failed_test_runs.append(
+                    {"code": generated_test, "error_message": "coverage verification error"}
+                )
+                results.append(
+                    {
+                        "status": "FAIL",
+                        "reason": "Runtime error",
+                        "exit_code": exit_code,
+                        "stderr": stderr if exit_code is not None else str(e),
+                        "stdout": stdout,
+                        "test": generated_test,
+                    }
+                )
+            self.record_results(results)
+            return results
+
+        if compile_error is not None or exit_code != 0:
+            # At least one of the tests failed, or does not compile: roll back and validate each half on its own, down
+            # to single tests rejected by 'validate_test'
+            with open(self.test_file_path, "w") as test_file:
+                test_file.write(original_content)
+            self.logger.info(
+                f"Batch of {len(generated_tests)} generated tests failed. Bisecting to find the failing tests."
+            )
+            middle = len(generated_tests) // 2
+            return self.validate_tests_batch(
+                generated_tests[:middle], generated_tests_dict
+            ) + self.validate_tests_batch(generated_tests[middle:], generated_tests_dict)
+
+        coverage_increased, new_lines_covered_by_batch = self.get_coverage_increase(
+            new_lines_covered, new_percentage_covered
+        )
+        if not coverage_increased:
+            # Coverage has not increased, rollback the whole batch
+            with open(self.test_file_path, "w") as test_file:
+                test_file.write(original_content)
+            self.logger.info("Batch of tests did not increase coverage. Rolling back.")
+            results = []
+            for generated_test in generated_tests:
+                self.failed_test_runs.append(
+                    {"code": generated_test, "error_message": "did not increase code coverage"}
+                )
+                results.append(
+                    {
+                        "status": "FAIL",
+                        "reason": "Coverage did not increase",
+                        "exit_code": exit_code,
+                        "stderr": stderr,
+                        "stdout": stdout,
+                        "test": generated_test,
+                    }
+                )
+            self.record_results(results)
+            return results
+
+        self.update_coverage(new_lines_covered, new_lines_missed, new_percentage_covered)
+        self.relevant_line_number_to_insert_tests_after += inserted_imports_line_count
+        self.logger.info(
+            f"Batch of {len(generated_tests)} tests passed and coverage increased ({len(new_lines_covered_by_batch)} new lines covered). Current coverage: {round(new_percentage_covered * 100, 2)}%"
+        )
+        results = [
+            {
+                "status": "PASS",
+                "reason": "",
+                "exit_code": exit_code,
+                "stderr": stderr,
+                "stdout": stdout,
+                "test": generated_test,
+                "new_lines_covered": new_lines_covered_by_batch,
+            }
+            for generated_test in generated_tests
+        ]
+        self.record_results(results)
+        return results
+
+    def validate_tests_parallel(self, generated_tests: list, generated_tests_dict: dict) -> list:
+        """
+        Validate generated tests concurrently, each in its own sandbox copy of the project.
+
+        Each test is inserted into the test file of its sandbox, checked with the compile-only command of the
+        pre-validator (if any), and validated against the current coverage.
+        The tests that pass and increase the coverage on their own are then merged into the real test file with
+        'validate_tests_batch', which confirms them with a single run of the test command.
+
+        Parameters:
+            generated_tests (list): The generated tests, as found in the 'new_tests' list of the LLM response.
+            generated_tests_dict (dict): The LLM response the tests were taken from.
+
+        Returns:
+            list: A result dictionary for each generated test, in the same order as 'generated_tests'.
+        """
+        if not self.relevant_line_number_to_insert_tests_after:
+            return [
+                self.validate_test(generated_test, generated_tests_dict)
+                for generated_test in generated_tests
+            ]
+
+        duplicate_results = [self.skip_duplicate(generated_test) for generated_test in generated_tests]
+        if any(duplicate_results):
+            return self.merge_rejected_results(
+                duplicate_results, self.validate_tests_parallel, generated_tests, generated_tests_dict
+            )
+
+        if self.sandbox_pool is None:
+            try:
+                self.sandbox_pool = SandboxPool(
+                    project_dir=self.test_command_dir,
+                    test_file_path=self.test_file_path,
+                    code_coverage_report_path=self.code_coverage_report_path,
+                    source_file_path=self.source_file_path,
+                    size=self.sandbox_workers,
+                    hardlinks=self.sandbox_hardlinks,
+                    command_executor=self.command_executor,
+                )
+            except ValueError as e:
+                self.logger.warning(f"{e}. Falling back to batch validation.")
+                self.sandbox_workers = 0
+                return self.validate_tests_batch(generated_tests, generated_tests_dict)
+
+        with open(self.test_file_path, "r") as test_file:
+            original_content = test_file.read()
+        test_file_contents = [
+            self._insert_tests(original_content, [generated_test])[0]
+            for generated_test in generated_tests
+        ]
+        pre_validation_results = [
+            self.pre_validate(generated_test, test_file_content)
+            for generated_test, test_file_content in zip(generated_tests, test_file_contents)
+        ]
+        if any(pre_validation_results):
+            self.record_results(pre_validation_results)
+            return self.merge_rejected_results(
+                pre_validation_results,
+                self.validate_tests_parallel,
+                generated_tests,
+                generated_tests_dict,
+            )
+
+        self.logger.info(
+            f'Running {len(generated_tests)} tests in {self.sandbox_pool.size} sandboxes with the following command: "{self.test_command}"'
+        )
+        sandbox_results = self.sandbox_pool.validate(
+            test_file_contents,
+            self.test_command,
+            self.coverage_type,
+            timeout=self.test_timeout,
+            idle_timeout=self.test_idle_timeout,
+            compile_command=self.pre_validator.get_compile_command(os.path.abspath(self.test_file_path)),
+        )
+
+        results = [None] * len(generated_tests)
+        accepted_indexes = []
+        new_lines_covered_by_test = {}
+        for i, (generated_test, sandbox_result) in enumerate(zip(generated_tests, sandbox_results)):
+            fail_details = {
+                "status": "FAIL",
+                "reason": "",
+                "exit_code": sandbox_result["exit_code"],
+                "stderr": sandbox_result["stderr"],
+                "stdout": sandbox_result["stdout"],
+                "test": generated_test,
+            }
+            if sandbox_result.get("compile_failed"):
+                results[i] = self.reject_test(
+                    generated_test,
+                    self.pre_validator.compile_error_message(sandbox_result["stdout"], sandbox_result["stderr"]),
+                )
+                continue
+            if sandbox_result["exit_code"] != 0:
+                fail_details["reason"] = "Test failed"
+                error_message = extract_error_message_python(sandbox_result["stdout"])
+                if error_message:
+                    logging.error(f"Error message:\n{error_message}")
+                self.failed_test_runs.append(
+                    {"code": generated_test, "error_message": error_message}
+                )
+            elif sandbox_result["error"]:
+                self.logger.error(f"Error during coverage verification: {sandbox_result['error']}")
+                fail_details["reason"] = "Runtime error"
+                self.failed_test_runs.append(
+                    {"code": generated_test, "error_message": "coverage verification error"}
+                )
+            else:
+                coverage_increased, new_lines_covered_by_test[i] = self.get_coverage_increase(
+                    sandbox_result["lines_covered"], sandbox_result["percentage_covered"]
+                )
+                if coverage_increased:
+                    accepted_indexes.append(i)
+                    continue
+                fail_details["reason"] = "Coverage did not increase"
+                self.failed_test_runs.append(
+                    {"code": generated_test, "error_message": "did not increase code coverage"}
+                )
+            results[i] = fail_details
+
+        # The accepted tests are recorded by 'validate_tests_batch'
+        self.record_results(results)
+        self.logger.info(
+            f"{len(accepted_indexes)} of {len(generated_tests)} tests passed and increased coverage in their sandbox. Merging them into the test file."
+        )
+        if accepted_indexes:
+            merged_results = self.validate_tests_batch(
+                [generated_tests[i] for i in accepted_indexes], generated_tests_dict
+            )
+            for i, merged_result in zip(accepted_indexes, merged_results):
+                if merged_result.get("status") == "PASS":
+                    # Lines the test covers on top of the baseline, as measured in its own sandbox
+                    merged_result["new_lines_covered"] = new_lines_covered_by_test[i]
+                results[i] = merged_result
+        return results
+
+    def cleanup_sandbox_pool(self):
+        """
+        Remove the sandboxes created by 'validate_tests_parallel', if any.
+        """
+        if self.sandbox_pool is not None:
+            self.sandbox_pool.cleanup()
+            self.sandbox_pool = None
+
 
 def extract_error_message_python(fail_message):
     try:
@@ -1,6 +1,11 @@
 import argparse
 import os
 from cover_agent.CoverAgent import CoverAgent
+from cover_agent.CoverageSummary import COVERAGE_FORMATS
+from cover_agent.LLMCache import DEFAULT_CACHE_DIR, LLMCache
+from cover_agent.StreamSink import STREAM_OUTPUT_MODES
+from cover_agent.TestFailureDetector import EARLY_ABORT_MODES
+from cover_agent.TestPreValidator import TestPreValidator
 from cover_agent.version import __version__
 import logging
 
@@ -87,6 +92,129 @@ def parse_args():
         default="http://localhost:11434",
         help="The API url to use for Ollama or Hugging Face. Default: %(default)s.",
     )
+    parser.add_argument(
+        "--batch-validation",
+        action="store_true",
+        help="If set, all the tests generated in an iteration are validated with a single run of the test command, and the run is bisected only when it fails. Default: False.",
+    )
+    parser.add_argument(
+        "--single-test-command",
+        default="",
+        help='Run only the new test when validating it, and add its coverage to the baseline coverage held in memory. Either one of "pytest", "go", "gradle", "jest", or a command template using the {test_command}, {test_file}, {test_name} and {test_node_id} (the pytest node ID of the test) placeholders. Requires a coverage report with line-level data. Default: run the full test command.',
+    )
+    parser.add_argument(
+        "--sandbox-workers",
+        type=int,
+        default=0,
+        help="Number of sandbox copies of the test command directory used to validate generated tests concurrently. 0 disables sandboxes. Default: %(default)s.",
+    )
+    parser.add_argument(
+        "--sandbox-hardlinks",
+        action="store_true",
+        help="If set, the sandboxes are created as hardlink farms instead of full copies. Only use this if the test command does not modify project files in place. Default: False.",
+    )
+    parser.add_argument(
+        "--coverage-index",
+        action="store_true",
+        help="If set, each coverage report is parsed once into an index of all the files it covers, shared by every agent and iteration of the process, and reparsed only when its content changes. A report with a timestamp (e.g. Cobertura from coverage.py) changes with every run of the test command, so the index only saves parsing when a report is read several times between runs. Default: False.",
+    )
+    parser.add_argument(
+        "--llm-cache",
+        choices=LLMCache.MODES,
+        default="off",
+        help='Cache the LLM responses on disk, keyed by the model, the prompt and the completion parameters. "on" reuses cached responses and calls the LLM on a miss, "replay" fails on a miss, to re-run the pipeline offline and deterministically. Default: %(default)s.',
+    )
+    parser.add_argument(
+        "--llm-cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help="The directory of the LLM response cache. Default: %(default)s.",
+    )
+    parser.add_argument(
+        "--llm-cache-max-mb",
+        type=int,
+        default=1024,
+        help="The maximum size of the LLM response cache, in MB. The least recently used responses are evicted first. Default: %(default)s.",
+    )
+    parser.add_argument(
+        "--llm-requests-per-minute",
+        type=int,
+        default=0,
+        help="The maximum number of LLM requests per minute, shared by all the agents of the process. 0 means unlimited. Default: %(default)s.",
+    )
+    parser.add_argument(
+        "--llm-tokens-per-minute",
+        type=int,
+        default=0,
+        help="The maximum number of LLM tokens (prompt and completion) per minute, shared by all the agents of the process. 0 means unlimited. Default: %(default)s.",
+    )
+    parser.add_argument(
+        "--stream-output",
+        choices=STREAM_OUTPUT_MODES,
+        default="auto",
+        help='How the LLM responses are shown while they are streamed: "console" echoes them, "progress" shows a progress line, "none" shows nothing, and "auto" echoes them on a terminal and shows nothing otherwise (e.g. in CI). Default: %(default)s.',
+    )
+    parser.add_argument(
+        "--stream-tests",
+        action="store_true",
+        help="If set, each generated test is validated as soon as the LLM has finished writing it, while the rest of the response is still being generated. Ignored with --batch-validation and --sandbox-workers. Default: False.",
+    )
+    parser.add_argument(
+        "--structured-output",
+        action="store_true",
+        help="If set, the LLM is asked for JSON responses constrained to the schema of each prompt, when the model supports structured outputs, instead of YAML responses that may need repairs. Ignored for other models. Default: False.",
+    )
+    parser.add_argument(
+        "--pre-validation",
+        choices=TestPreValidator.MODES,
+        default="syntax",
+        help='The checks of the generated tests before the test command is run: "syntax" compiles Python test files, "imports" also requires the modules imported by the tests to be found in the environment of Cover Agent, and "off" disables the checks. Rejected tests are reported to the LLM in the next prompt. Default: %(default)s.',
+    )
+    parser.add_argument(
+        "--compile-command",
+        default="",
+        help='A compile-only command run after inserting a generated test and before the test command, to reject the tests that do not compile, whatever the --pre-validation mode. Either one of "go", "typescript", "gradle", "maven", or a command using the {test_file} placeholder, e.g. "npx tsc --noEmit {test_file}". Default: no command.',
+    )
+    parser.add_argument(
+        "--slice-source",
+        action="store_true",
+        help="If set, the prompt only shows the full bodies of the functions of the source file that hold missed lines, and the signatures of the other functions, to shrink the prompts of large files. Only for Python source files, and coverage reports with line-level data. Default: False.",
+    )
+    parser.add_argument(
+        "--prompt-token-budget",
+        type=int,
+        default=0,
+        help="The maximum number of tokens of the test generation prompt. When the prompt is over budget, its sections are trimmed, in order: the failed tests history, the included files, the test file and the source file. Default: 0 (the context window of the model minus the 4096 tokens of the response, no budget if the model is unknown).",
+    )
+    parser.add_argument(
+        "--coverage-format",
+        choices=COVERAGE_FORMATS,
+        default="lists",
+        help='The format of the coverage in the prompt: "lists" of all the covered and missed line numbers, "ranges" of the covered and missed lines (e.g. 12-18, 40), the missed lines grouped by function for Python source files, or "missed-ranges" to omit the covered lines. Default: %(default)s.',
+    )
+    parser.add_argument(
+        "--test-timeout",
+        type=float,
+        default=0,
+        help="The maximum seconds of a run of the test command. A run over the limit is killed, with the processes it started, and its test is rejected. Default: 0 (no limit).",
+    )
+    parser.add_argument(
+        "--test-idle-timeout",
+        type=float,
+        default=0,
+        help="The maximum seconds of a run of the test command without any output, e.g. a test waiting forever. A run over the limit is killed, with the processes it started, and its test is rejected. Default: 0 (no limit).",
+    )
+    parser.add_argument(
+        "--max-concurrent-commands",
+        type=int,
+        default=0,
+        help="The maximum number of test commands run at the same time, e.g. by the sandboxes of --sandbox-workers. Default: 0 (the number of cores).",
+    )
+    parser.add_argument(
+        "--early-abort",
+        choices=EARLY_ABORT_MODES,
+        default="off",
+        help='Stop the test command at the first failed test when a generated test is validated, instead of running the rest of the suite. The failures reported so far are kept for the next prompt. "auto" detects the test framework from the test command, or a framework can be named. Default: %(default)s.',
+    )
     parser.add_argument(
         "--strict-coverage",
         action="store_true",
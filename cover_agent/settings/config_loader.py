@@ -7,7 +7,6 @@ SETTINGS_FILES = [
     "language_extensions.toml",
     "analyze_suite_test_headers_indentation.toml",
     "analyze_suite_test_insert_line.toml",
-    "analyze_test_coverage.toml"
 ]
 
 
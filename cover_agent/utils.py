@@ -1,22 +1,28 @@
 import logging
 import re
+import litellm
 import yaml
 
 from typing import List
 
+from cover_agent.ResponseSchema import ResponseSchema
 
-def load_yaml(response_text: str, keys_fix_yaml: List[str] = []) -> dict:
+
+def load_yaml(response_text: str, keys_fix_yaml: List[str] = [], schema: ResponseSchema = None) -> dict:
     """
     Load and parse YAML data from a given response text.
 
     Parameters:
     response_text (str): The response text containing YAML data.
     keys_fix_yaml (List[str]): A list of keys to fix YAML formatting (default is an empty list).
+    schema (ResponseSchema): The expected keys of the response (default is None).
 
     Returns:
     dict: The parsed YAML data.
 
-    If parsing the YAML data directly fails, it attempts to fix the YAML formatting using the 'try_fix_yaml' function.
+    If parsing the YAML data directly fails, and a schema is given, the data is recovered in a single pass with
+    'schema.parse'. Otherwise, or if the schema parsing fails, it attempts to fix the YAML formatting using the
+    'try_fix_yaml' function.
 
     Example:
         load_yaml(response_text, keys_fix_yaml=['key1', 'key2'])
@@ -26,6 +32,11 @@ def load_yaml(response_text: str, keys_fix_yaml: List[str] = []) -> dict:
     try:
         data = yaml.safe_load(response_text)
     except Exception as e:
+        if schema is not None:
+            data = schema.parse(response_text)
+            if data is not None:
+                logging.info(f"Recovered AI prediction with the response schema after: {e}")
+                return data
         logging.info(
             f"Failed to parse AI prediction: {e}. Attempting to fix YAML formatting."
         )
@@ -103,8 +114,10 @@ def try_fix_yaml(response_text: str, keys_fix_yaml: List[str] = []) -> dict:
         pass
 
     # fourth fallback - try to remove last lines
+    # Lines after the line of a parsing error are removed at once, instead of one at a time
     data = {}
-    for i in range(1, len(response_text_lines)):
+    i = 1
+    while i < len(response_text_lines):
         response_text_lines_tmp = "\n".join(response_text_lines[:-i])
         try:
             data = yaml.safe_load(response_text_lines_tmp)
@@ -113,8 +126,12 @@ def try_fix_yaml(response_text: str, keys_fix_yaml: List[str] = []) -> dict:
                     f"Successfully parsed AI prediction after removing {i} lines"
                 )
                 return data
+        except yaml.MarkedYAMLError as e:
+            if e.problem_mark is not None:
+                i = max(i, len(response_text_lines) - e.problem_mark.line - 1)
         except:
             pass
+        i += 1
 
     ## fifth fallback - brute force:
     ## detect 'language:' key and use it as a starting point.
@@ -143,3 +160,21 @@ def try_fix_yaml(response_text: str, keys_fix_yaml: List[str] = []) -> dict:
             pass
     except:
         pass
+
+
+def count_tokens(text: str, model: str = "") -> int:
+    """
+    Count the tokens of a text, with the tokenizer of the model when litellm knows it, and a generic one otherwise.
+
+    Parameters:
+    text (str): The text to count the tokens of.
+    model (str): The name of the model (default is an empty string, the generic tokenizer).
+
+    Returns:
+    int: The number of tokens of the text.
+    """
+    try:
+        return litellm.token_counter(model=model, text=text)
+    except Exception:
+        # About 4 characters per token
+        return len(text) // 4
@@ -1,8 +1,11 @@
 import os
 
 import pytest
-from unittest.mock import patch
+from unittest.mock import patch, AsyncMock, MagicMock
 from cover_agent.AICaller import AICaller
+from cover_agent.LLMCache import LLMCache, LLMCacheMiss
+from cover_agent.RateLimiter import RateLimiter
+from cover_agent.StreamSink import CallbackStreamSink
 
 
 class TestAICaller:
@@ -107,3 +110,137 @@ class TestAICaller:
             ai_caller.call_model(prompt)
         assert str(exc_info.value) == '"The prompt dictionary must contain \'system\' and \'user\' keys."'
 
+    @patch("cover_agent.AICaller.litellm.completion")
+    def test_call_model_cache(self, mock_completion, tmp_path):
+        chunk = MagicMock()
+        chunk.choices[0].delta.content = "response"
+        mock_completion.return_value = [chunk]
+        prompt = {"system": "", "user": "Hello, world!"}
+        ai_caller = AICaller("test-model", "test-api", cache=LLMCache(str(tmp_path)))
+        with patch("cover_agent.AICaller.litellm.stream_chunk_builder") as mock_builder:
+            mock_builder.return_value = {
+                "choices": [{"message": {"content": "response"}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 2, "completion_tokens": 10}
+            }
+            assert ai_caller.call_model(prompt) == ("response", 2, 10)
+            assert ai_caller.call_model(prompt) == ("response", 2, 10)
+            # A different prompt or completion parameter is a miss
+            ai_caller.call_model(prompt, max_tokens=100)
+
+        assert mock_completion.call_count == 2
+
+    @patch("cover_agent.AICaller.litellm.completion")
+    def test_call_model_partial_response_is_not_cached(self, mock_completion, tmp_path):
+        def failing_stream():
+            chunk = MagicMock()
+            chunk.choices[0].delta.content = "resp"
+            yield chunk
+            raise ConnectionError("connection reset")
+
+        mock_completion.side_effect = lambda **kwargs: failing_stream()
+        prompt = {"system": "", "user": "Hello, world!"}
+        ai_caller = AICaller("test-model", "test-api", cache=LLMCache(str(tmp_path)))
+        with patch("cover_agent.AICaller.litellm.stream_chunk_builder") as mock_builder:
+            mock_builder.return_value = {
+                "choices": [{"message": {"content": "resp"}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 2, "completion_tokens": 1}
+            }
+            assert ai_caller.call_model(prompt) == ("resp", 2, 1)
+            # A response truncated by 'max_tokens' is not cached either
+            mock_completion.side_effect = None
+            mock_completion.return_value = []
+            mock_builder.return_value = {
+                "choices": [{"message": {"content": "resp"}, "finish_reason": "length"}],
+                "usage": {"prompt_tokens": 2, "completion_tokens": 1}
+            }
+            ai_caller.call_model(prompt)
+            ai_caller.call_model(prompt)
+
+        assert mock_completion.call_count == 3
+
+    @patch("cover_agent.AICaller.litellm.completion")
+    def test_call_model_cache_replay_miss(self, mock_completion, tmp_path):
+        prompt = {"system": "", "user": "Hello, world!"}
+        ai_caller = AICaller("test-model", "test-api", cache=LLMCache(str(tmp_path), replay=True))
+
+        with pytest.raises(LLMCacheMiss, match="replay mode"):
+            ai_caller.call_model(prompt)
+        mock_completion.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("cover_agent.AICaller.litellm.acompletion", new_callable=AsyncMock)
+    async def test_acall_model(self, mock_acompletion, ai_caller):
+        async def stream():
+            yield {"choices": [{"delta": {"content": "response"}}]}
+
+        mock_acompletion.return_value = stream()
+        ai_caller.rate_limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=10000)
+        prompt = {"system": "System message", "user": "Hello, world!"}
+        with patch("cover_agent.AICaller.litellm.stream_chunk_builder") as mock_builder:
+            mock_builder.return_value = {
+                "choices": [{"message": {"content": "response"}}],
+                "usage": {"prompt_tokens": 2, "completion_tokens": 10}
+            }
+            response, prompt_tokens, response_tokens = await ai_caller.acall_model(prompt, max_tokens=100)
+
+        assert (response, prompt_tokens, response_tokens) == ("response", 2, 10)
+        assert mock_acompletion.call_args.kwargs["messages"][0] == {"role": "system", "content": "System message"}
+        assert mock_builder.call_args.args[0] == [{"choices": [{"delta": {"content": "response"}}]}]
+        # The unused part of the reserved tokens was given back
+        assert ai_caller.rate_limiter.token_bucket.level == pytest.approx(10000 - 12, abs=1)
+
+    @pytest.mark.asyncio
+    @patch("cover_agent.AICaller.litellm.acompletion", new_callable=AsyncMock)
+    async def test_acall_model_error_refunds_the_reservation(self, mock_acompletion, ai_caller):
+        mock_acompletion.side_effect = Exception("Test exception")
+        ai_caller.rate_limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=10000)
+        prompt = {"system": "", "user": "Hello, world!"}
+
+        with pytest.raises(Exception, match="Test exception"):
+            await ai_caller.acall_model(prompt, max_tokens=100)
+
+        assert ai_caller.rate_limiter.token_bucket.level == pytest.approx(10000, abs=1)
+        assert ai_caller.rate_limiter.request_bucket.level == pytest.approx(60, abs=1)
+
+    @patch("cover_agent.AICaller.litellm.completion")
+    def test_call_model_stream_sink(self, mock_completion):
+        received = []
+        ai_caller = AICaller("test-model", "test-api", stream_sink=CallbackStreamSink(received.append))
+        chunks = []
+        for text in ("Hello", None, " world"):
+            chunk = MagicMock()
+            chunk.choices[0].delta.content = text
+            chunks.append(chunk)
+        mock_completion.return_value = chunks
+        prompt = {"system": "", "user": "Hello, world!"}
+        with patch("cover_agent.AICaller.litellm.stream_chunk_builder") as mock_builder:
+            mock_builder.return_value = {
+                "choices": [{"message": {"content": "Hello world"}}],
+                "usage": {"prompt_tokens": 2, "completion_tokens": 10}
+            }
+            ai_caller.call_model(prompt)
+
+        assert received == ["Hello", "", " world"]
+        assert mock_builder.call_args.args[0] == chunks
+
+    @patch("cover_agent.AICaller.litellm.completion")
+    def test_call_model_response_format(self, mock_completion, ai_caller):
+        mock_completion.return_value = []
+        response_format = {"type": "json_schema", "json_schema": {"name": "Response", "schema": {}, "strict": True}}
+        prompt = {"system": "", "user": "Hello, world!"}
+        with patch("cover_agent.AICaller.litellm.stream_chunk_builder") as mock_builder:
+            mock_builder.return_value = {
+                "choices": [{"message": {"content": "{}"}}],
+                "usage": {"prompt_tokens": 2, "completion_tokens": 10}
+            }
+            ai_caller.call_model(prompt)
+            ai_caller.call_model(prompt, response_format=response_format)
+
+        assert "response_format" not in mock_completion.call_args_list[0].kwargs
+        assert mock_completion.call_args_list[1].kwargs["response_format"] == response_format
+
+    def test_supports_structured_output(self, ai_caller):
+        with patch("cover_agent.AICaller.litellm.supports_response_schema", return_value=True):
+            assert ai_caller.supports_structured_output()
+        with patch("cover_agent.AICaller.litellm.supports_response_schema", side_effect=Exception("Unknown model")):
+            assert not ai_caller.supports_structured_output()
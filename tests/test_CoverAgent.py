@@ -96,3 +96,61 @@ class TestCoverAgent:
                 agent = CoverAgent(args)
 
         assert str(exc_info.value) == f"Test file not found at {args.test_file_path}"
+
+    @patch("cover_agent.CoverAgent.ReportGenerator")
+    @patch("cover_agent.CoverAgent.os.path.isfile", return_value=True)
+    @patch("cover_agent.CoverAgent.UnitTestGenerator")
+    def test_run_does_not_ask_llm_for_coverage(
+        self, mock_unit_test_generator, mock_isfile, mock_report_generator
+    ):
+        args = argparse.Namespace(
+            source_file_path="test_source.py",
+            test_file_path="test_file.py",
+            test_file_output_path="",
+            code_coverage_report_path="coverage_report.xml",
+            test_command="pytest",
+            test_command_dir=os.getcwd(),
+            included_files=None,
+            coverage_type="jacoco",
+            report_filepath="test_results.html",
+            desired_coverage=90,
+            max_iterations=2,
+            additional_instructions="",
+            model="gpt-4o",
+            api_base="",
+            strict_coverage=False,
+            batch_validation=False,
+            sandbox_workers=0,
+            sandbox_hardlinks=False,
+            single_test_command="",
+            coverage_index=False,
+            llm_cache="off",
+            llm_cache_dir="",
+            llm_cache_max_mb=1024,
+            llm_requests_per_minute=0,
+            llm_tokens_per_minute=0,
+            stream_output="none",
+            stream_tests=False,
+            structured_output=False,
+            pre_validation="syntax",
+            compile_command="",
+            slice_source=False,
+            prompt_token_budget=0,
+            coverage_format="lists",
+            test_timeout=0,
+            test_idle_timeout=0,
+            max_concurrent_commands=0,
+            early_abort="off",
+        )
+        test_gen = mock_unit_test_generator.return_value
+        test_gen.current_coverage = 0.5
+        test_gen.desired_coverage = 90
+        test_gen.generate_tests.return_value = {"new_tests": [{"test_code": "..."}]}
+
+        agent = CoverAgent(args)
+        agent.run()
+
+        assert test_gen.generate_tests.call_count == 2
+        assert test_gen.validate_test.call_count == 2
+        test_gen.ai_caller.call_model.assert_not_called()
+        mock_report_generator.generate_report.assert_called_once()
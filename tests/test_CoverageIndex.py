@@ -0,0 +1,113 @@
+import os
+import pytest
+from cover_agent.CoverageIndex import CoverageIndex
+from cover_agent.CoverageProcessor import CoverageProcessor
+
+COBERTURA_REPORT = """<coverage>
+    <packages>
+        <package name="src">
+            <classes>
+                <class filename="src/app.py">
+                    <lines>
+                        <line number="1" hits="1"/>
+                        <line number="2" hits="1" branch="true" condition-coverage="50% (1/2)"/>
+                        <line number="3" hits="0"/>
+                    </lines>
+                </class>
+                <class filename="src/test_app.py">
+                    <lines>
+                        <line number="1" hits="1"/>
+                    </lines>
+                </class>
+                <class filename="src/{hits_file}">
+                    <lines>
+                        <line number="1" hits="{hits}"/>
+                    </lines>
+                </class>
+            </classes>
+        </package>
+    </packages>
+</coverage>"""
+
+
+class TestCoverageIndex:
+    @pytest.fixture
+    def report_path(self, tmp_path):
+        path = tmp_path / "coverage.xml"
+        path.write_text(COBERTURA_REPORT.format(hits_file="utils.py", hits=0))
+        return str(path)
+
+    def test_get_file_coverage(self, report_path):
+        index = CoverageIndex()
+
+        app_coverage = index.get_file_coverage(report_path, "cobertura", "/repo/src/app.py")
+        test_app_coverage = index.get_file_coverage(report_path, "cobertura", "/repo/src/test_app.py")
+        missing_coverage = index.get_file_coverage(report_path, "cobertura", "/repo/src/missing.py")
+
+        assert app_coverage.lines_covered == [1, 2]
+        assert app_coverage.lines_missed == [3]
+        assert app_coverage.branches == {2: (1, 2)}
+        assert app_coverage.percentage_covered == pytest.approx(2 / 3)
+        assert test_app_coverage.lines_covered == [1]
+        assert missing_coverage.lines_covered == [] and missing_coverage.percentage_covered == 0
+        assert index.parse_count == 1
+
+    def test_files_are_matched_by_path_from_the_report_sources(self, tmp_path):
+        report_path = tmp_path / "coverage.xml"
+        report_path.write_text(
+            """<coverage>
+                <sources><source>/repo/src</source></sources>
+                <packages>
+                    <package name="pkg_a"><classes>
+                        <class filename="pkg_a/utils.py"><lines><line number="1" hits="1"/></lines></class>
+                    </classes></package>
+                    <package name="pkg_b"><classes>
+                        <class filename="pkg_b/utils.py"><lines><line number="1" hits="0"/></lines></class>
+                    </classes></package>
+                </packages>
+            </coverage>"""
+        )
+        index = CoverageIndex()
+
+        assert index.get_file_coverage(str(report_path), "cobertura", "/repo/src/pkg_a/utils.py").lines_covered == [1]
+        assert index.get_file_coverage(str(report_path), "cobertura", "/repo/src/pkg_b/utils.py").lines_missed == [1]
+        # A checkout in another directory is matched by the trailing directories of the path
+        assert index.get_file_coverage(str(report_path), "cobertura", "/ci/src/pkg_b/utils.py").lines_missed == [1]
+
+    def test_reparses_only_when_the_content_changes(self, report_path):
+        index = CoverageIndex()
+        index.get_file_coverage(report_path, "cobertura", "utils.py")
+
+        # Same content rewritten later: the hash matches, no reparse
+        with open(report_path, "w") as report:
+            report.write(COBERTURA_REPORT.format(hits_file="utils.py", hits=0))
+        os.utime(report_path, ns=(1, 1))
+        assert index.get_file_coverage(report_path, "cobertura", "utils.py").lines_missed == [1]
+        assert index.parse_count == 1
+
+        # New content: reparsed
+        with open(report_path, "w") as report:
+            report.write(COBERTURA_REPORT.format(hits_file="utils.py", hits=1))
+        os.utime(report_path, ns=(2, 2))
+        assert index.get_file_coverage(report_path, "cobertura", "utils.py").lines_covered == [1]
+        assert index.parse_count == 2
+
+        index.invalidate(report_path)
+        index.get_file_coverage(report_path, "cobertura", "utils.py")
+        assert index.parse_count == 3
+
+    def test_unsupported_coverage_type(self, report_path):
+        with pytest.raises(ValueError, match="Unsupported coverage report type"):
+            CoverageIndex().get_report(report_path, "lcov")
+
+    def test_get_instance_is_shared(self):
+        assert CoverageIndex.get_instance() is CoverageIndex.get_instance()
+
+    def test_coverage_processor_matches_the_index(self, report_path):
+        index = CoverageIndex()
+        for src_file_path in ("app.py", "test_app.py", "utils.py", "missing.py"):
+            indexed = CoverageProcessor(report_path, src_file_path, "cobertura", coverage_index=index)
+            streamed = CoverageProcessor(report_path, src_file_path, "cobertura")
+
+            assert indexed.parse_coverage_report() == streamed.parse_coverage_report()
+        assert index.parse_count == 1
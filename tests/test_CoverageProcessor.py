@@ -1,3 +1,4 @@
+import io
 import pytest
 import xml.etree.ElementTree as ET
 from cover_agent.CoverageProcessor import CoverageProcessor
@@ -6,10 +7,11 @@ from cover_agent.CoverageProcessor import CoverageProcessor
 @pytest.fixture
 def mock_xml_tree(monkeypatch):
     """
-    Creates a mock function to simulate the ET.parse method, returning a mocked XML tree structure.
+    Creates a mock function to simulate the ET.iterparse method, streaming a mocked XML tree structure.
     """
+    iterparse = ET.iterparse
 
-    def mock_parse(file_path):
+    def mock_iterparse(file_path, events=None):
         # Mock XML structure for the test
         xml_str = """<coverage>
                         <packages>
@@ -25,10 +27,9 @@ def mock_xml_tree(monkeypatch):
                             </package>
                         </packages>
                      </coverage>"""
-        root = ET.ElementTree(ET.fromstring(xml_str))
-        return root
+        return iterparse(io.StringIO(xml_str), events=events)
 
-    monkeypatch.setattr(ET, "parse", mock_parse)
+    monkeypatch.setattr(ET, "iterparse", mock_iterparse)
 
 
 class TestCoverageProcessor:
@@ -70,7 +71,7 @@ class TestCoverageProcessor:
 
         # Initialize the CoverageProcessor object
         coverage_processor = CoverageProcessor(
-            file_path="path/to/coverage.xml",
+            file_path="path/to/coverage.csv",
             src_file_path="path/to/example.java",
             coverage_type="jacoco"
         )
@@ -89,10 +90,41 @@ class TestCoverageProcessor:
             processor.parse_coverage_report()
 
 
-    def test_parse_coverage_report_not_implemented(self):
-        processor = CoverageProcessor("fake_path", "app.py", "lcov")
-        with pytest.raises(NotImplementedError, match='Parsing for lcov coverage reports is not implemented yet.'):
-            processor.parse_coverage_report()
+    def test_parse_coverage_report_lcov(self, tmp_path):
+        report_path = tmp_path / "lcov.info"
+        report_path.write_text(
+            "TN:\n"
+            "SF:/repo/test/app.js\n"
+            "DA:1,1\n"
+            "end_of_record\n"
+            "SF:/repo/src/app.js\n"
+            "FN:1,add\n"
+            "DA:1,1\n"
+            "DA:2,5,checksum\n"
+            "DA:3,0\n"
+            "DA:4,2\n"
+            "BRDA:2,0,0,1\n"
+            "BRDA:2,0,1,-\n"
+            "LF:4\n"
+            "LH:3\n"
+            "end_of_record\n"
+            "this line would fail to parse: DA:x\n"
+        )
+        processor = CoverageProcessor(str(report_path), "src/app.js", "lcov")
+
+        covered_lines, missed_lines, coverage_pct = processor.parse_coverage_report()
+
+        assert covered_lines == [1, 2, 4]
+        assert missed_lines == [3]
+        assert coverage_pct == 0.75
+        assert processor.branches == {2: (1, 2)}
+
+    def test_parse_coverage_report_lcov_totals_and_missing_file(self, tmp_path):
+        report_path = tmp_path / "lcov.info"
+        report_path.write_text("SF:src/main.cpp\nLF:10\nLH:4\nend_of_record\n")
+
+        assert CoverageProcessor(str(report_path), "/repo/src/main.cpp", "lcov").parse_coverage_report() == ([], [], 0.4)
+        assert CoverageProcessor(str(report_path), "/repo/src/other.cpp", "lcov").parse_coverage_report() == ([], [], 0)
 
     def test_extract_package_and_class_java_file_error(self, mocker):
         mocker.patch('builtins.open', side_effect=FileNotFoundError("File not found"))
@@ -156,3 +188,140 @@ class TestCoverageProcessor:
             processor.parse_missed_covered_lines_jacoco("com.example", "MyClass")
 
 
+
+    def test_parse_coverage_report_jacoco_xml_line_counter(self, mocker, tmp_path):
+        report_path = tmp_path / "jacocoTestReport.xml"
+        report_path.write_text(
+            """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+            <report name="cover-agent">
+                <package name="com/other">
+                    <sourcefile name="MyClass.java">
+                        <counter type="LINE" missed="9" covered="9"/>
+                    </sourcefile>
+                </package>
+                <package name="com/example">
+                    <sourcefile name="MyClass.java">
+                        <counter type="INSTRUCTION" missed="10" covered="10"/>
+                        <counter type="LINE" missed="3" covered="7"/>
+                    </sourcefile>
+                </package>
+            </report>"""
+        )
+        mocker.patch('cover_agent.CoverageProcessor.CoverageProcessor.extract_package_and_class_java',
+                     return_value=('com.example', 'MyClass'))
+        processor = CoverageProcessor(str(report_path), "path/to/MyClass.java", "jacoco")
+
+        # Without line elements, the coverage is read from the LINE counter of the sourcefile of the package
+        assert processor.parse_coverage_report() == ([], [], 0.7)
+
+    def test_parse_coverage_report_jacoco_xml_without_package(self, mocker, tmp_path):
+        report_path = tmp_path / "jacocoTestReport.xml"
+        report_path.write_text(
+            """<report name="cover-agent">
+                <package name="com/example">
+                    <sourcefile name="Calculator.kt">
+                        <counter type="LINE" missed="1" covered="3"/>
+                    </sourcefile>
+                </package>
+            </report>"""
+        )
+        mocker.patch('cover_agent.CoverageProcessor.CoverageProcessor.extract_package_and_class_java',
+                     return_value=('', ''))
+        processor = CoverageProcessor(str(report_path), "path/to/Calculator.kt", "jacoco")
+
+        _, _, coverage_percentage = processor.parse_coverage_report()
+
+        assert coverage_percentage == 0.75
+
+    def test_parse_coverage_report_jacoco_xml_lines(self, mocker, tmp_path):
+        report_path = tmp_path / "jacocoTestReport.xml"
+        report_path.write_text(
+            """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+            <report name="cover-agent">
+                <package name="com/other">
+                    <sourcefile name="MyClass.java">
+                        <line nr="1" mi="0" ci="9" mb="0" cb="0"/>
+                    </sourcefile>
+                </package>
+                <package name="com/example">
+                    <class name="com/example/MyClass" sourcefilename="MyClass.java">
+                        <counter type="LINE" missed="9" covered="9"/>
+                    </class>
+                    <sourcefile name="MyClass.java">
+                        <line nr="3" mi="0" ci="2" mb="0" cb="0"/>
+                        <line nr="4" mi="2" ci="1" mb="1" cb="1"/>
+                        <line nr="5" mi="4" ci="0" mb="2" cb="0"/>
+                        <counter type="LINE" missed="1" covered="2"/>
+                    </sourcefile>
+                </package>
+            <this-is-not-closed>"""
+        )
+        mocker.patch('cover_agent.CoverageProcessor.CoverageProcessor.extract_package_and_class_java',
+                     return_value=('com.example', 'MyClass'))
+        processor = CoverageProcessor(str(report_path), "path/to/MyClass.java", "jacoco")
+
+        covered_lines, missed_lines, coverage_pct = processor.parse_coverage_report()
+
+        assert covered_lines == [3, 4]
+        assert missed_lines == [5]
+        assert coverage_pct == pytest.approx(2 / 3)
+        assert processor.branches == {4: (1, 2), 5: (0, 2)}
+
+    def test_parse_coverage_report_jacoco_xml_matches_package_path_suffix(self, mocker, tmp_path):
+        report_path = tmp_path / "jacocoTestReport.xml"
+        report_path.write_text(
+            """<report name="cover-agent">
+                <package name="com/other">
+                    <sourcefile name="Calculator.kt">
+                        <line nr="1" mi="3" ci="0" mb="0" cb="0"/>
+                    </sourcefile>
+                </package>
+                <package name="com/example">
+                    <sourcefile name="Calculator.kt">
+                        <line nr="1" mi="0" ci="3" mb="0" cb="0"/>
+                    </sourcefile>
+                </package>
+            </report>"""
+        )
+        mocker.patch('cover_agent.CoverageProcessor.CoverageProcessor.extract_package_and_class_java',
+                     return_value=('', ''))
+        processor = CoverageProcessor(str(report_path), "src/main/kotlin/com/example/Calculator.kt", "jacoco")
+
+        assert processor.parse_coverage_report() == ([1], [], 1.0)
+
+    def test_parse_coverage_report_cobertura_streaming(self, tmp_path):
+        report_path = tmp_path / "coverage.xml"
+        report_path.write_text(
+            """<coverage>
+                <packages>
+                    <package name="src">
+                        <classes>
+                            <class filename="src/test_app.py">
+                                <lines><line number="1" hits="0"/></lines>
+                            </class>
+                            <class filename="src/app.py">
+                                <methods>
+                                    <method name="add">
+                                        <lines><line number="2" hits="1"/></lines>
+                                    </method>
+                                </methods>
+                                <lines>
+                                    <line number="1" hits="1"/>
+                                    <line number="2" hits="1"/>
+                                    <line number="3" hits="0"/>
+                                    <line number="4" hits="1"/>
+                                </lines>
+                            </class>
+                        </classes>
+                    </package>
+                </packages>
+            <this-is-not-closed>"""
+        )
+        processor = CoverageProcessor(str(report_path), "/repo/src/app.py", "cobertura")
+
+        # The class is complete before the malformed tail of the report, which is never read
+        covered_lines, missed_lines, coverage_pct = processor.parse_coverage_report()
+
+        assert covered_lines == [1, 2, 4]
+        assert missed_lines == [3]
+        assert coverage_pct == 0.75
@@ -0,0 +1,61 @@
+import pytest
+
+from cover_agent.CoverageSummary import format_coverage_summary, format_line_ranges, group_lines_by_function
+from cover_agent.LineSet import LineSet
+
+SOURCE = """import math
+
+
+def add(a, b):
+    return a + b
+
+
+class Calculator:
+    def sqrt(self, x):
+        if x < 0:
+            raise ValueError("negative")
+        return math.sqrt(x)
+
+
+if __name__ == "__main__":
+    print(add(1, 2))"""
+
+
+class TestCoverageSummary:
+    def test_format_line_ranges(self):
+        assert format_line_ranges(LineSet([12, 13, 14, 15, 16, 17, 18, 40, 52, 53])) == "12-18, 40, 52-53"
+        assert format_line_ranges(LineSet()) == "none"
+
+    def test_group_lines_by_function(self):
+        functions = [(4, 5, "add"), (9, 12, "Calculator.sqrt")]
+        groups = group_lines_by_function(LineSet([1, 4, 5, 9, 10, 15]), functions)
+        assert [(label, lines.to_list()) for label, lines in groups] == [
+            ("outside functions", [1, 15]),
+            ("add", [4, 5]),
+            ("Calculator.sqrt", [9, 10]),
+        ]
+
+    def test_lists_format_is_unchanged(self):
+        assert format_coverage_summary([1, 2], [3], 0.6667) == (
+            "Lines covered: [1, 2]\nLines missed: [3]\nPercentage covered: 66.67%"
+        )
+
+    def test_missed_ranges_grouped_by_function(self):
+        summary = format_coverage_summary(
+            [1, 4, 5, 8, 9, 10, 15], [11, 12, 16], 0.7, coverage_format="ranges", source=SOURCE
+        )
+        assert summary == (
+            "Lines covered: 1, 4-5, 8-10, 15\n"
+            "Lines missed, by function:\n"
+            "- outside functions: 16\n"
+            "- Calculator.sqrt: 11-12\n"
+            "Percentage covered: 70.0%"
+        )
+
+    def test_missed_ranges_omit_the_covered_lines(self):
+        summary = format_coverage_summary([1, 2, 3], [4, 5, 7], 0.5, coverage_format="missed-ranges", language="go")
+        assert summary == "Lines missed: 4-5, 7\nPercentage covered: 50.0%"
+
+    def test_unsupported_format(self):
+        with pytest.raises(ValueError):
+            format_coverage_summary([], [], 0.0, coverage_format="table")
@@ -0,0 +1,48 @@
+import os
+import pytest
+from cover_agent.LLMCache import LLMCache
+
+
+class TestLLMCache:
+    def test_make_key(self):
+        params = {"model": "gpt-4o", "messages": [{"role": "user", "content": "Hi"}], "max_tokens": 10}
+
+        assert LLMCache.make_key(params) == LLMCache.make_key(dict(reversed(list(params.items()))))
+        assert LLMCache.make_key(params) == LLMCache.make_key({**params, "stream": True, "api_base": "http://localhost"})
+        assert LLMCache.make_key(params) != LLMCache.make_key({**params, "max_tokens": 20})
+        assert LLMCache.make_key(params) != LLMCache.make_key({**params, "model": "gpt-4o-mini"})
+
+    def test_get_and_put(self, tmp_path):
+        cache = LLMCache(str(tmp_path))
+        entry = {"content": "response", "prompt_tokens": 2, "completion_tokens": 10}
+
+        assert cache.get("ab12") is None
+        cache.put("ab12", entry)
+
+        assert cache.get("ab12") == entry
+        assert LLMCache(str(tmp_path)).get("ab12") == entry
+        assert os.listdir(tmp_path / "ab") == ["ab12.json"]
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = LLMCache(str(tmp_path))
+        entry = {"content": "x" * 1000, "prompt_tokens": 1, "completion_tokens": 1}
+        for key in ("aa", "bb", "cc"):
+            cache.put(key, entry)
+        os.utime(cache.path_of("aa"), (100, 100))
+        os.utime(cache.path_of("bb"), (300, 300))
+        os.utime(cache.path_of("cc"), (200, 200))
+        cache.get("aa")  # Marks "aa" as the most recently used entry
+
+        cache.max_size_bytes = 2 * os.path.getsize(cache.path_of("aa"))
+        cache.evict()
+
+        assert cache.get("aa") is not None
+        assert cache.get("bb") is not None
+        assert cache.get("cc") is None
+
+    def test_from_mode(self, tmp_path):
+        assert LLMCache.from_mode("off", str(tmp_path)) is None
+        assert LLMCache.from_mode("on", str(tmp_path)).replay is False
+        assert LLMCache.from_mode("replay", str(tmp_path)).replay is True
+        with pytest.raises(ValueError, match="Unsupported LLM cache mode"):
+            LLMCache.from_mode("sometimes", str(tmp_path))
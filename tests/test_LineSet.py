@@ -0,0 +1,29 @@
+from cover_agent.LineSet import LineSet
+
+
+class TestLineSet:
+    def test_to_list_is_sorted(self):
+        assert LineSet([12, 3, 7, 3]).to_list() == [3, 7, 12]
+        assert LineSet().to_list() == []
+
+    def test_set_operations(self):
+        covered = LineSet([1, 2, 3])
+        test_covered = LineSet([3, 4, 5])
+
+        assert (covered | test_covered).to_list() == [1, 2, 3, 4, 5]
+        assert (covered & test_covered).to_list() == [3]
+        assert (test_covered - covered).to_list() == [4, 5]
+
+    def test_len_contains_and_bool(self):
+        line_set = LineSet([1, 100, 1000])
+
+        assert len(line_set) == 3
+        assert 100 in line_set
+        assert 99 not in line_set
+        assert line_set
+        assert not LineSet()
+        assert line_set == LineSet([1000, 100, 1])
+
+    def test_to_ranges(self):
+        assert LineSet([1, 2, 3, 5, 7, 8, 100]).to_ranges() == [(1, 3), (5, 5), (7, 8), (100, 100)]
+        assert LineSet().to_ranges() == []
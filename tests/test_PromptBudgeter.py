@@ -0,0 +1,75 @@
+from cover_agent.PromptBudgeter import PromptBudgeter, trim_text
+from cover_agent.utils import count_tokens
+
+
+def render(variables):
+    return {
+        "system": "Write unit tests for the source file.",
+        "user": "\n".join(
+            variables[name]
+            for name in ("source_file_numbered", "test_file", "additional_includes_section", "failed_tests_section")
+        ),
+    }
+
+
+def count_prompt_tokens(prompt):
+    return count_tokens(prompt["system"]) + count_tokens(prompt["user"])
+
+
+def make_variables():
+    return {
+        "source_file_numbered": "\n".join(f"{i} def function_{i}(): return {i}" for i in range(1, 101)),
+        "test_file": "\n".join(f"def test_{i}(): assert function_{i}() == {i}" for i in range(100)),
+        "additional_includes_section": "\n".join(f"# included line {i}" for i in range(100)),
+        "failed_tests_section": "\n".join(f"Failed Test: test_{i} raised an AssertionError" for i in range(100)),
+    }
+
+
+class TestPromptBudgeter:
+    def test_model_token_budget(self):
+        assert PromptBudgeter.model_token_budget("gpt-4o", 4096) == 128000 - 4096
+        assert PromptBudgeter.model_token_budget("unknown-model", 4096) is None
+        assert PromptBudgeter(model="unknown-model", token_budget=1000).token_budget == 1000
+
+    def test_prompt_within_budget_is_not_trimmed(self):
+        variables = make_variables()
+        prompt, decisions = PromptBudgeter(model="", token_budget=100000).fit(render, variables)
+        assert decisions == []
+        assert prompt == render(make_variables())
+
+    def test_unknown_model_has_no_budget(self):
+        prompt, decisions = PromptBudgeter(model="unknown-model").fit(render, make_variables())
+        assert decisions == []
+        assert prompt == render(make_variables())
+
+    def test_sections_are_trimmed_by_priority(self):
+        variables = make_variables()
+        full_tokens = count_prompt_tokens(render(variables))
+        failed_tests_tokens = count_tokens(variables["failed_tests_section"])
+        budgeter = PromptBudgeter(model="", token_budget=full_tokens - failed_tests_tokens - 100)
+
+        prompt, decisions = budgeter.fit(render, variables)
+
+        assert count_prompt_tokens(prompt) <= budgeter.token_budget
+        # The failed tests history is dropped first, then the included files are trimmed
+        assert variables["failed_tests_section"] == ""
+        assert "lines left out to fit the prompt token budget" in variables["additional_includes_section"]
+        assert variables["additional_includes_section"].startswith("# included line 0")
+        assert variables["test_file"] == make_variables()["test_file"]
+        assert variables["source_file_numbered"] == make_variables()["source_file_numbered"]
+        assert len(decisions) == 2
+        assert decisions[0].startswith("Trimmed the failed tests history of the prompt")
+        assert decisions[1].startswith("Trimmed the included files of the prompt")
+
+    def test_prompt_over_budget_once_trimmed(self):
+        variables = make_variables()
+        prompt, decisions = PromptBudgeter(model="", token_budget=1).fit(render, variables)
+        assert all(value == "" for value in variables.values())
+        assert "over the budget of 1 tokens" in decisions[-1]
+
+    def test_trim_text_keeps_the_first_lines(self):
+        text = "\n".join(f"line {i}" for i in range(100))
+        trimmed = trim_text(text, 112, count_tokens(text))
+        assert trimmed.startswith("line 0\nline 1\n")
+        assert trimmed.endswith("lines left out to fit the prompt token budget)")
+        assert trim_text(text, 5, count_tokens(text)) == ""
@@ -1,11 +1,19 @@
+import os
 import pytest
 from unittest.mock import patch, mock_open
-from cover_agent.PromptBuilder import PromptBuilder
+from cover_agent.PromptBudgeter import PromptBudgeter
+from cover_agent.PromptBuilder import (
+    PromptBuilder,
+    clear_prompt_caches,
+    get_compiled_template,
+    read_file_cached,
+)
 
 
 class TestPromptBuilder:
     @pytest.fixture(autouse=True)
     def setup_method(self, monkeypatch):
+        clear_prompt_caches()
         mock_open_obj = mock_open(read_data="dummy content")
         monkeypatch.setattr("builtins.open", mock_open_obj)
         self.mock_open_obj = mock_open_obj
@@ -168,3 +176,93 @@ class TestPromptBuilder:
         result = builder.build_prompt()
         assert result == {"system": "", "user": ""}
 
+
+    def test_structured_output_asks_for_json(self, monkeypatch):
+        monkeypatch.undo()
+        yaml_prompt = PromptBuilder("source_path", "test_path", "coverage_report").build_prompt()
+        json_prompt = PromptBuilder("source_path", "test_path", "coverage_report", structured_output=True).build_prompt()
+        assert yaml_prompt["user"].rstrip().endswith("```yaml")
+        assert "valid JSON object" in json_prompt["user"]
+        assert not json_prompt["user"].rstrip().endswith("```yaml")
+
+        analysis_prompt = PromptBuilder(
+            "source_path", "test_path", "coverage_report", structured_output=True
+        ).build_prompt_custom("analyze_suite_test_insert_line")
+        assert "valid JSON object" in analysis_prompt["user"]
+
+    def test_source_file_is_sliced_around_missed_lines(self, monkeypatch):
+        monkeypatch.setattr(
+            "builtins.open",
+            mock_open(read_data="def covered():\n" + "    x = 1\n" * 20 + "\n\ndef missed():\n    return 2\n"),
+        )
+        builder = PromptBuilder("source_path", "test_path", "coverage_report", missed_lines=[25])
+        assert "2     x = 1" not in builder.source_file_numbered
+        assert "25     return 2" in builder.source_file_numbered
+        before, after = builder.source_file_token_counts
+        assert after < before
+
+        assert PromptBuilder("source_path", "test_path", "coverage_report").source_file_token_counts is None
+
+    def test_prompt_is_trimmed_to_the_token_budget(self, monkeypatch):
+        # Disable the monkeypatch for open within this test
+        monkeypatch.undo()
+        failed_test_runs = "".join(f"Failed Test:\ntest_{i}\nAssertionError\n\n" for i in range(200))
+        budgeter = PromptBudgeter(model="", token_budget=2000)
+        builder = PromptBuilder(
+            source_file_path="source_path",
+            test_file_path="test_path",
+            code_coverage_report="coverage_report",
+            failed_test_runs=failed_test_runs,
+            budgeter=budgeter,
+        )
+        builder.source_file_numbered = "1 def add(a, b):\n2     return a + b"
+
+        result = builder.build_prompt()
+        assert budgeter.count_prompt_tokens(result) <= 2000
+        assert "test_0\n" in result["user"]
+        assert "test_199\n" not in result["user"]
+        assert "2     return a + b" in result["user"]
+        assert builder.budget_decisions[0].startswith("Trimmed the failed tests history of the prompt")
+
+
+class TestPromptCaches:
+    @pytest.fixture(autouse=True)
+    def setup_method(self):
+        clear_prompt_caches()
+        yield
+        clear_prompt_caches()
+
+    def test_compiled_templates_are_reused(self):
+        template = get_compiled_template("Tests of {{ source_file_name }}")
+        assert get_compiled_template("Tests of {{ source_file_name }}") is template
+        assert template.render(source_file_name="app.py") == "Tests of app.py"
+
+    def test_unchanged_file_is_not_read_again(self, tmp_path, monkeypatch):
+        file_path = tmp_path / "app.py"
+        file_path.write_text("def add(a, b):\n    return a + b\n")
+        # Modified long before it is cached, so its modification time can be trusted
+        os.utime(file_path, (1_000_000_000, 1_000_000_000))
+        assert read_file_cached(str(file_path)) == (
+            "def add(a, b):\n    return a + b\n",
+            "1 def add(a, b):\n2     return a + b\n3 ",
+        )
+
+        def mock_open_raise(*args, **kwargs):
+            raise IOError("File read again")
+
+        monkeypatch.setattr("builtins.open", mock_open_raise)
+        assert read_file_cached(str(file_path))[0] == "def add(a, b):\n    return a + b\n"
+
+    def test_modified_file_is_read_again(self, tmp_path):
+        file_path = tmp_path / "test_app.py"
+        file_path.write_text("def test_a():\n    pass\n")
+        assert read_file_cached(str(file_path))[0] == "def test_a():\n    pass\n"
+
+        file_path.write_text("def test_b():\n    pass\n")
+        assert read_file_cached(str(file_path)) == ("def test_b():\n    pass\n", "1 def test_b():\n2     pass\n3 ")
+
+        # Same size and modification time: the content of a recently modified file is compared
+        stat = os.stat(file_path)
+        file_path.write_text("def test_c():\n    pass\n")
+        os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert read_file_cached(str(file_path))[0] == "def test_c():\n    pass\n"
@@ -0,0 +1,49 @@
+import pytest
+from unittest.mock import patch
+from cover_agent.RateLimiter import RateLimiter
+
+
+class TestRateLimiter:
+    def test_reserve_waits_for_the_most_limiting_bucket(self):
+        with patch("cover_agent.RateLimiter.time.monotonic", return_value=100.0):
+            rate_limiter = RateLimiter(requests_per_minute=2, tokens_per_minute=600)
+
+            assert rate_limiter.reserve(300) == 0
+            assert rate_limiter.reserve(300) == 0
+            # No request left: 1 request refills in 30s, 300 tokens refill in 30s
+            assert rate_limiter.reserve(300) == pytest.approx(30)
+            # The debt of the previous reservation is waited for first
+            assert rate_limiter.reserve(0) == pytest.approx(60)
+
+    def test_refill_and_refund(self):
+        with patch("cover_agent.RateLimiter.time.monotonic", return_value=100.0):
+            rate_limiter = RateLimiter(tokens_per_minute=600)
+            assert rate_limiter.reserve(600) == 0
+            rate_limiter.refund(500)
+            assert rate_limiter.reserve(500) == 0
+        with patch("cover_agent.RateLimiter.time.monotonic", return_value=110.0):
+            # 10s refill 100 tokens
+            assert rate_limiter.reserve(100) == 0
+            # Requests larger than the bucket wait for a full bucket at most
+            assert rate_limiter.reserve(10000) == pytest.approx(60)
+
+    def test_refund_a_request(self):
+        with patch("cover_agent.RateLimiter.time.monotonic", return_value=100.0):
+            rate_limiter = RateLimiter(requests_per_minute=1, tokens_per_minute=600)
+            assert rate_limiter.reserve(600) == 0
+            # The failed call gives back its request and its tokens
+            rate_limiter.refund(600, requests=1)
+            assert rate_limiter.reserve(600) == 0
+
+    def test_get_shared(self):
+        assert RateLimiter.get_shared(0, 0) is None
+        assert RateLimiter.get_shared(10, 1000) is RateLimiter.get_shared(10, 1000)
+        assert RateLimiter.get_shared(10, 1000) is not RateLimiter.get_shared(20, 1000)
+
+    @pytest.mark.asyncio
+    async def test_async_acquire(self):
+        rate_limiter = RateLimiter(requests_per_minute=1)
+        await rate_limiter.async_acquire(0)
+        with patch("cover_agent.RateLimiter.asyncio.sleep") as mock_sleep:
+            await rate_limiter.async_acquire(0)
+        assert mock_sleep.call_args.args[0] == pytest.approx(60, abs=1)
@@ -0,0 +1,152 @@
+from cover_agent.ResponseSchema import (
+    NEW_TESTS_SCHEMA,
+    TEST_HEADERS_INDENTATION_SCHEMA,
+    TEST_INSERT_LINE_SCHEMA,
+    ResponseSchema,
+)
+from cover_agent.utils import load_yaml
+
+
+class TestResponseSchema:
+    def test_parse_skips_prose_and_code_fences(self):
+        response = (
+            "Here are the new tests: they cover the missing lines.\n"
+            "```yaml\n"
+            "language: python\n"
+            "new_tests:\n"
+            "- test_name: |\n"
+            "    test_add\n"
+            "  test_code: |\n"
+            "    def test_add():\n"
+            "        assert add(1, 2) == 3\n"
+            "  test_tags: happy path\n"
+            "```\n"
+            "Let me know: I can add more tests.\n"
+        )
+        data = NEW_TESTS_SCHEMA.parse(response)
+        assert data == {
+            "language": "python",
+            "new_tests": [
+                {
+                    "test_name": "test_add\n",
+                    "test_code": "def test_add():\n    assert add(1, 2) == 3\n",
+                    "test_tags": "happy path",
+                }
+            ],
+        }
+
+    def test_parse_keeps_inline_values_with_colons_as_text(self):
+        response = (
+            "new_tests:\n"
+            "- test_behavior: Test divide: dividing by zero fails\n"
+            "  lines_to_cover: [20, 21]\n"
+            "  test_code: def test_divide(): assert divide(1, 0) is None\n"
+        )
+        test = NEW_TESTS_SCHEMA.parse(response)["new_tests"][0]
+        assert test["test_behavior"] == "Test divide: dividing by zero fails"
+        assert test["lines_to_cover"] == [20, 21]
+        assert test["test_code"] == "def test_divide(): assert divide(1, 0) is None"
+
+    def test_parse_recovers_under_indented_block_lines(self):
+        response = (
+            "new_tests:\n"
+            "- test_code: |\n"
+            "        def test_echo():\n"
+            "      response = echo('a')\n"
+            "            assert response == 'a'\n"
+            "  test_tags: edge case\n"
+        )
+        test = NEW_TESTS_SCHEMA.parse(response)["new_tests"][0]
+        assert test["test_code"] == "  def test_echo():\nresponse = echo('a')\n      assert response == 'a'\n"
+        assert test["test_tags"] == "edge case"
+
+    def test_parse_drops_items_without_test_code(self):
+        response = (
+            "new_tests:\n"
+            "- test_name: test_complete\n"
+            "  test_code: |\n"
+            "    def test_complete():\n"
+            "        pass\n"
+            "- test_name: test_truncated\n"
+            '  test_code: "def test_truncated():\n'
+            "        assert fun(\n"
+        )
+        data = NEW_TESTS_SCHEMA.parse(response)
+        assert [test["test_name"] for test in data["new_tests"]] == ["test_complete"]
+
+    def test_parse_returns_none_without_required_keys(self):
+        assert NEW_TESTS_SCHEMA.parse("Sorry, I cannot generate tests: the file is empty.") is None
+
+    def test_parse_ignores_unknown_keys(self):
+        schema = ResponseSchema(fields=("language",), required=("language",))
+        assert schema.parse("language: python\nextra: value: with colon\n") == {"language": "python"}
+
+    def test_parse_analysis_responses(self):
+        headers_response = (
+            "```yaml\n"
+            "language: python\n"
+            "testing_framework: pytest\n"
+            "number_of_tests: 2\n"
+            "test_headers_indentation: 4\n"
+            "```\n"
+            "Note: the tests are methods of a class.\n"
+        )
+        insert_response = (
+            "The tests should be inserted at the end: line 42.\n"
+            "relevant_line_number_to_insert_tests_after: 42\n"
+            "relevant_line_number_to_insert_imports_after: 3\n"
+        )
+        assert TEST_HEADERS_INDENTATION_SCHEMA.parse(headers_response)["test_headers_indentation"] == 4
+        insert_data = TEST_INSERT_LINE_SCHEMA.parse(insert_response)
+        assert insert_data["relevant_line_number_to_insert_tests_after"] == 42
+        assert insert_data["relevant_line_number_to_insert_imports_after"] == 3
+
+    def test_load_yaml_uses_the_schema_for_invalid_yaml(self):
+        response = (
+            "new_tests:\n"
+            "- test_behavior: Test sqrt: negative input\n"
+            "  test_code: |\n"
+            "    def test_sqrt():\n"
+            "        pass\n"
+        )
+        data = load_yaml(response, schema=NEW_TESTS_SCHEMA)
+        assert data["new_tests"][0]["test_behavior"] == "Test sqrt: negative input"
+
+    def test_load_yaml_keeps_valid_yaml_untouched(self, mocker):
+        parse = mocker.patch.object(NEW_TESTS_SCHEMA, "parse")
+        assert load_yaml("new_tests: []", schema=NEW_TESTS_SCHEMA) == {"new_tests": []}
+        parse.assert_not_called()
+
+
+class TestStructuredOutput:
+    def test_json_schema_is_strict(self):
+        json_schema = TEST_INSERT_LINE_SCHEMA.json_schema()
+        assert json_schema["additionalProperties"] is False
+        assert json_schema["required"] == list(json_schema["properties"])
+        assert json_schema["properties"]["relevant_line_number_to_insert_tests_after"] == {"type": "integer"}
+        assert json_schema["properties"]["language"] == {"type": "string"}
+
+        items = NEW_TESTS_SCHEMA.json_schema()["properties"]["new_tests"]["items"]
+        assert "test_code" in items["required"]
+        assert items["additionalProperties"] is False
+
+    def test_response_format(self):
+        response_format = NEW_TESTS_SCHEMA.response_format()
+        assert response_format["type"] == "json_schema"
+        assert response_format["json_schema"]["name"] == "NewTests"
+        assert response_format["json_schema"]["strict"] is True
+
+    def test_parse_json(self):
+        response = '{"language": "python", "new_tests": [{"test_name": "test_add", "test_code": "def test_add():\\n    pass\\n"}]}'
+        data = NEW_TESTS_SCHEMA.parse_json(response)
+        assert data["new_tests"][0]["test_code"] == "def test_add():\n    pass\n"
+        # A code fence around the JSON is tolerated
+        assert NEW_TESTS_SCHEMA.parse_json(f"```json\n{response}\n```") == data
+
+    def test_parse_json_rejects_responses_not_matching_the_schema(self):
+        assert NEW_TESTS_SCHEMA.parse_json("new_tests: []") is None
+        assert NEW_TESTS_SCHEMA.parse_json('{"language": "python"}') is None
+        assert NEW_TESTS_SCHEMA.parse_json('{"new_tests": [{"test_name": "test_add"}]}') is None
+        assert NEW_TESTS_SCHEMA.parse_json('{"new_tests": [{"test_code": 1}]}') is None
+        assert TEST_HEADERS_INDENTATION_SCHEMA.parse_json('{"test_headers_indentation": "four"}') is None
+        assert TEST_HEADERS_INDENTATION_SCHEMA.parse_json('{"test_headers_indentation": 4}') == {"test_headers_indentation": 4}
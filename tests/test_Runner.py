@@ -1,6 +1,11 @@
+import asyncio
+import os
+import time
+
 import pytest
 from unittest.mock import patch
-from cover_agent.Runner import Runner  # Adjust the import path as necessary
+from cover_agent.Runner import CommandExecutor, OutputBuffer, Runner  # Adjust the import path as necessary
+from cover_agent.TestFailureDetector import TestFailureDetector
 
 
 class TestRunner:
@@ -31,3 +36,130 @@ class TestRunner:
             or "command_that_does_not_exist: command not found" in stderr
         )
         assert exit_code != 0
+
+    def test_run_command_wall_timeout_kills_the_process_group(self, tmp_path):
+        """Test that a command over its timeout is killed, with the processes it started."""
+        marker = tmp_path / "marker"
+        command = f"(sleep 1 && touch {marker}) & sleep 30"
+        result = Runner.run_command_detailed(command, timeout=0.5)
+        assert result.timed_out == "wall"
+        assert result.exit_code != 0
+        assert "timed out after 0.5 seconds" in result.stderr
+        assert result.duration < 10
+        time.sleep(1.5)
+        assert not marker.exists()
+
+    def test_run_command_wall_timeout_after_the_output_is_closed(self):
+        """Test that the wall timeout applies to a command that closed its output and keeps running."""
+        result = Runner.run_command_detailed("exec sleep 6 > /dev/null 2>&1", timeout=1)
+        assert result.timed_out == "wall"
+        assert result.exit_code != 0
+        assert result.duration < 5
+
+    def test_run_command_idle_timeout(self):
+        """Test that a command without output for its idle timeout is killed."""
+        stdout, stderr, exit_code, _ = Runner.run_command("echo started; sleep 30", idle_timeout=0.5)
+        assert stdout == "started\n"
+        assert exit_code != 0
+        assert "no output for 0.5 seconds" in stderr
+
+    def test_run_command_error_kills_the_process_group(self, tmp_path):
+        """Test that the processes of a command are killed when the run is interrupted, e.g. by a KeyboardInterrupt."""
+        marker = tmp_path / "marker"
+
+        class InterruptingDetector:
+            def feed(self, stream, data):
+                raise KeyboardInterrupt
+
+        start = time.monotonic()
+        with pytest.raises(KeyboardInterrupt):
+            Runner.run_command_detailed(
+                f"(sleep 1 && touch {marker}) & echo started; sleep 30", failure_detector=InterruptingDetector()
+            )
+        assert time.monotonic() - start < 10
+        time.sleep(1.5)
+        assert not marker.exists()
+
+    def test_run_command_caps_the_output(self):
+        """Test that the output is captured as a head and a tail, up to the byte cap."""
+        result = Runner.run_command_detailed("seq 1 100000", max_output_bytes=1000)
+        assert result.stdout.startswith("1\n2\n3\n")
+        assert result.stdout.endswith("99999\n100000\n")
+        assert "bytes of output omitted" in result.stdout
+        assert len(result.stdout) < 1100
+        assert result.exit_code == 0
+        assert result.timed_out is None
+
+    def test_run_command_reports_resource_usage(self):
+        result = Runner.run_command_detailed("python3 -c \"data = bytearray(50 * 1024 * 1024)\"")
+        assert result.exit_code == 0
+        assert result.peak_rss_bytes >= 50 * 1024 * 1024
+        assert result.cpu_seconds >= 0
+
+    def test_run_command_stops_at_the_first_failed_test(self, tmp_path):
+        """Test that a test run is stopped at its first failed test, with the failures reported so far."""
+        (tmp_path / "test_sample.py").write_text(
+            "import time\n\n"
+            "def test_fails():\n    assert 1 == 2\n\n"
+            "def test_slow():\n    time.sleep(30)\n"
+        )
+        result = Runner.run_command_detailed(
+            "python3 -m pytest -p no:cacheprovider test_sample.py",
+            cwd=str(tmp_path),
+            failure_detector=TestFailureDetector("pytest"),
+        )
+        assert result.failure_line == "test_sample.py F"
+        assert result.timed_out is None
+        assert result.exit_code != 0
+        assert result.duration < 20
+        assert "= FAILURES =" in result.stdout
+        assert "assert 1 == 2" in result.stdout
+        assert "stopped at the first failed test" in result.stderr
+
+    def test_run_command_without_failure_runs_to_its_end(self):
+        result = Runner.run_command_detailed(
+            "echo 'test_sample.py ...'; sleep 0.2; echo done", failure_detector=TestFailureDetector("pytest")
+        )
+        assert result.failure_line is None
+        assert result.exit_code == 0
+        assert result.stdout.endswith("done\n")
+
+
+class TestRunCommandAsync:
+    def test_run_command_async(self):
+        result = asyncio.run(Runner.run_command_async('echo "Hello, World!"', cwd="/tmp"))
+        assert result.stdout.strip() == "Hello, World!"
+        assert result.exit_code == 0
+
+    def test_concurrent_commands_are_capped(self):
+        executor = CommandExecutor(max_workers=2)
+
+        async def run_all():
+            return await asyncio.gather(
+                *(Runner.run_command_async("sleep 0.3", executor=executor) for _ in range(4))
+            )
+
+        start = time.monotonic()
+        results = asyncio.run(run_all())
+        duration = time.monotonic() - start
+        assert [result.exit_code for result in results] == [0, 0, 0, 0]
+        # Two waves of two commands
+        assert 0.6 <= duration < 1.2
+
+    def test_shared_executor_defaults_to_the_number_of_cores(self):
+        assert CommandExecutor.get_shared() is CommandExecutor.get_shared(0)
+        assert CommandExecutor.get_shared().max_workers == (os.cpu_count() or 1)
+        assert CommandExecutor.get_shared(3).max_workers == 3
+
+
+class TestOutputBuffer:
+    def test_keeps_head_and_tail(self):
+        buffer = OutputBuffer(max_bytes=8)
+        for chunk in (b"ab", b"cdef", b"ghij", b"kl"):
+            buffer.write(chunk)
+        assert buffer.text() == "ab\n... [4 bytes of output omitted] ...\nghijkl"
+
+    def test_short_output_is_kept_whole(self):
+        buffer = OutputBuffer(max_bytes=8)
+        buffer.write(b"abc")
+        assert buffer.text() == "abc"
@@ -0,0 +1,102 @@
+import os
+import time
+
+import pytest
+from cover_agent.Runner import CommandExecutor
+from cover_agent.SandboxPool import SandboxPool
+
+COVERAGE_XML = (
+    '<coverage><packages><package><classes><class filename="app.py"><lines>'
+    '<line number="1" hits="1"/><line number="2" hits="{hits}"/>'
+    "</lines></class></classes></package></packages></coverage>"
+)
+
+
+class TestSandboxPool:
+    @pytest.fixture
+    def project_dir(self, tmp_path):
+        project_dir = tmp_path / "project"
+        project_dir.mkdir()
+        (project_dir / "app.py").write_text("def add(a, b):\n    return a + b\n")
+        (project_dir / "test_app.py").write_text("def test_one():\n    pass\n")
+        (project_dir / "coverage.xml").write_text(COVERAGE_XML.format(hits=0))
+        return project_dir
+
+    def make_pool(self, project_dir, tmp_path, **kwargs):
+        return SandboxPool(
+            project_dir=str(project_dir),
+            test_file_path=str(project_dir / "test_app.py"),
+            code_coverage_report_path=str(project_dir / "coverage.xml"),
+            source_file_path=str(project_dir / "app.py"),
+            size=2,
+            root_dir=str(tmp_path),
+            **kwargs,
+        )
+
+    def test_create_hardlink_sandboxes(self, project_dir, tmp_path):
+        with self.make_pool(project_dir, tmp_path, hardlinks=True) as pool:
+            assert len(pool.sandboxes) == 2
+            sandbox = pool.sandboxes[0]
+            assert sandbox.test_file_path == os.path.join(sandbox.root, "test_app.py")
+            # Source files are shared, the test file is a private copy and the old report is removed
+            assert os.path.samefile(sandbox.source_file_path, project_dir / "app.py")
+            assert not os.path.samefile(sandbox.test_file_path, project_dir / "test_app.py")
+            assert not os.path.exists(sandbox.code_coverage_report_path)
+            root = pool.root
+        assert not os.path.exists(root)
+
+    def test_report_outside_project_dir(self, project_dir, tmp_path):
+        with pytest.raises(ValueError, match="outside of the test command directory"):
+            SandboxPool(
+                project_dir=str(project_dir),
+                test_file_path=str(project_dir / "test_app.py"),
+                code_coverage_report_path=str(tmp_path / "coverage.xml"),
+                source_file_path=str(project_dir / "app.py"),
+                size=2,
+            )
+
+    def test_validate_runs_each_content_in_its_sandbox(self, project_dir, tmp_path):
+        command = (
+            "sleep 0.01; "
+            f"if grep -q test_two {project_dir}/test_app.py; "
+            f"then echo '{COVERAGE_XML.format(hits=1)}' > coverage.xml; "
+            f"else echo '{COVERAGE_XML.format(hits=0)}' > coverage.xml; fi"
+        )
+        contents = [
+            "def test_one():\n    pass\n\ndef test_two():\n    pass\n",
+            "def test_one():\n    pass\n\ndef test_three():\n    pass\n",
+            "this is not python",
+        ]
+        with self.make_pool(project_dir, tmp_path) as pool:
+            results = pool.validate(contents, command, "cobertura")
+
+        assert [result["exit_code"] for result in results] == [0, 0, 0]
+        assert [result["percentage_covered"] for result in results] == [1.0, 0.5, 0.5]
+        assert results[0]["lines_covered"] == [1, 2]
+        # The real project is untouched
+        assert (project_dir / "test_app.py").read_text() == "def test_one():\n    pass\n"
+        assert (project_dir / "coverage.xml").read_text() == COVERAGE_XML.format(hits=0)
+
+    def test_content_that_does_not_compile_is_not_run(self, project_dir, tmp_path):
+        command = f"sleep 0.01; echo '{COVERAGE_XML.format(hits=1)}' > coverage.xml"
+        compile_command = f"! grep -q broken {project_dir}/test_app.py || (echo 'does not compile' >&2; exit 2)"
+        contents = ["def test_one():\n    pass\n", "def test_broken(:\n    pass\n"]
+        with self.make_pool(project_dir, tmp_path) as pool:
+            results = pool.validate(contents, command, "cobertura", compile_command=compile_command)
+
+        assert [result["compile_failed"] for result in results] == [False, True]
+        assert results[0]["percentage_covered"] == 1.0
+        assert results[1]["exit_code"] == 2
+        assert results[1]["stderr"].strip() == "does not compile"
+        assert results[1]["percentage_covered"] is None
+
+    def test_validate_is_capped_by_the_command_executor(self, project_dir, tmp_path):
+        command = f"sleep 0.2; echo '{COVERAGE_XML.format(hits=1)}' > coverage.xml"
+        with self.make_pool(project_dir, tmp_path, command_executor=CommandExecutor(max_workers=1)) as pool:
+            start = time.monotonic()
+            results = pool.validate(["def test_one():\n    pass\n"] * 2, command, "cobertura")
+            duration = time.monotonic() - start
+
+        assert [result["percentage_covered"] for result in results] == [1.0, 1.0]
+        # The two sandboxes ran one after the other
+        assert duration >= 0.4
@@ -0,0 +1,61 @@
+from cover_agent.SourceSlicer import number_lines, python_function_bodies, python_function_names, slice_source
+
+SOURCE = """import math
+
+LIMIT = 10
+
+
+def add(a, b):
+    \"\"\"Add two numbers.\"\"\"
+    result = a + b
+    return result
+
+
+class Calculator:
+    factor = 2
+
+    @staticmethod
+    def double(x):
+        return x * 2
+
+    def sqrt(self, x):
+        if x < 0:
+            raise ValueError("negative")
+        return math.sqrt(x)
+
+    def one_liner(self): return 1"""
+
+
+class TestSourceSlicer:
+    def test_number_lines(self):
+        assert number_lines("a\nb") == "1 a\n2 b"
+
+    def test_python_function_bodies(self):
+        assert python_function_bodies(SOURCE) == [(6, 8, 9, 4), (15, 17, 17, 8), (19, 20, 22, 8)]
+        assert python_function_bodies("def broken(:") == []
+
+    def test_python_function_names(self):
+        assert python_function_names(SOURCE) == [
+            (6, 9, "add"),
+            (15, 17, "Calculator.double"),
+            (19, 22, "Calculator.sqrt"),
+            (24, 24, "Calculator.one_liner"),
+        ]
+        assert python_function_names("def broken(:") == []
+
+    def test_slice_keeps_functions_with_missed_lines(self):
+        sliced = slice_source(SOURCE, [21], "python").split("\n")
+        assert sliced[5:8] == [
+            "6 def add(a, b):",
+            '7     """Add two numbers."""',
+            "    ... (lines 8-9 have no missed lines, not shown)",
+        ]
+        # A single line body is kept
+        assert "17         return x * 2" in sliced
+        assert "21             raise ValueError(\"negative\")" in sliced
+        assert sliced[-1] == "24     def one_liner(self): return 1"
+        assert "8     result = a + b" not in sliced
+
+    def test_no_slicing_without_missed_lines_or_function_index(self):
+        assert slice_source(SOURCE, [], "python") == number_lines(SOURCE)
+        assert slice_source(SOURCE, [21], "go") == number_lines(SOURCE)
@@ -0,0 +1,60 @@
+import io
+import pytest
+from unittest.mock import patch
+from cover_agent.StreamSink import (
+    CallbackStreamSink,
+    ConsoleStreamSink,
+    NullStreamSink,
+    ProgressStreamSink,
+    StreamSink,
+)
+
+
+class TestStreamSink:
+    def test_from_mode(self):
+        assert isinstance(StreamSink.from_mode("console"), ConsoleStreamSink)
+        assert isinstance(StreamSink.from_mode("progress"), ProgressStreamSink)
+        assert isinstance(StreamSink.from_mode("none"), NullStreamSink)
+        with pytest.raises(ValueError, match="Unsupported stream output mode"):
+            StreamSink.from_mode("loud")
+
+    @pytest.mark.parametrize("isatty, sink_class", [(True, ConsoleStreamSink), (False, NullStreamSink)])
+    def test_from_mode_auto(self, isatty, sink_class):
+        with patch("cover_agent.StreamSink.sys.stdout") as mock_stdout:
+            mock_stdout.isatty.return_value = isatty
+            assert isinstance(StreamSink.from_mode("auto"), sink_class)
+
+    def test_console_sink(self):
+        stream = io.StringIO()
+        sink = ConsoleStreamSink(stream)
+
+        sink.start()
+        sink.write("def test_")
+        sink.write("add():\n")
+        sink.finish()
+
+        assert stream.getvalue() == "Streaming results from LLM model...\ndef test_add():\n\n\n"
+
+    def test_progress_sink(self):
+        stream = io.StringIO()
+        sink = ProgressStreamSink(stream, interval=3600)
+
+        sink.start()
+        sink.write("abc")
+        sink.write("de")
+        assert stream.getvalue() == ""
+        sink.finish()
+
+        assert "Receiving the LLM response: 5 characters" in stream.getvalue()
+        assert stream.getvalue().endswith("\n")
+
+    def test_callback_sink(self):
+        received = []
+        sink = CallbackStreamSink(received.append)
+
+        sink.start()
+        sink.write("a")
+        sink.write("b")
+        sink.finish()
+
+        assert received == ["a", "b"]
@@ -0,0 +1,80 @@
+from cover_agent.StreamingTestParser import StreamingTestParser
+
+RESPONSE = '''```yaml
+language: python
+existing_test_function_signature: |
+  def test_add():
+new_tests:
+- test_behavior: |
+    Test adding negative numbers
+  test_name: |
+    test_add_negative
+  test_code: |
+    def test_add_negative():
+
+        assert add(-1, -2) == -3
+  new_imports_code: |
+    ""
+  test_tags: edge case
+- test_behavior: |
+    Test adding zero
+  test_name: |
+    test_add_zero
+  test_code: |
+    def test_add_zero():
+        assert add(0, 0) == 0
+  new_imports_code: |
+    ""
+  test_tags: happy path
+```
+'''
+
+
+class TestStreamingTestParser:
+    def test_yields_each_test_when_it_is_complete(self):
+        parser = StreamingTestParser()
+        second_test_start = RESPONSE.index("- test_behavior: |\n    Test adding zero")
+
+        # Nothing is complete until the first line of the next entry is received
+        assert parser.feed(RESPONSE[:second_test_start]) == []
+        assert parser.feed(RESPONSE[second_test_start:second_test_start + 3]) == []
+        first_tests = parser.feed(RESPONSE[second_test_start + 3:second_test_start + 19])
+        assert [test["test_name"] for test in first_tests] == ["test_add_negative\n"]
+        assert first_tests[0]["test_code"] == "def test_add_negative():\n\n    assert add(-1, -2) == -3\n"
+        assert first_tests[0]["test_tags"] == "edge case"
+        assert parser.document()["language"] == "python"
+
+        # The closing fence ends the list
+        second_tests = parser.feed(RESPONSE[second_test_start + 19:])
+        assert [test["test_name"] for test in second_tests] == ["test_add_zero\n"]
+        assert parser.close() == []
+        assert len(parser.document()["new_tests"]) == 2
+
+    def test_chunked_feed_matches_the_full_response(self):
+        parser = StreamingTestParser()
+        tests = []
+        for i in range(0, len(RESPONSE), 7):
+            tests.extend(parser.feed(RESPONSE[i:i + 7]))
+        tests.extend(parser.close())
+
+        assert [test["test_name"].strip() for test in tests] == ["test_add_negative", "test_add_zero"]
+        assert parser.has_test({"test_code": "def test_add_zero():\n    assert add(0, 0) == 0"})
+        assert not parser.has_test({"test_code": "def test_other():\n    pass"})
+
+    def test_close_completes_the_last_test_and_recovers_invalid_entries(self):
+        parser = StreamingTestParser()
+        tests = parser.feed(
+            "language: python\n"
+            "new_tests:\n"
+            "  - test_code: def test_inline(): assert {1: 2}\n"
+            "  - test_name: test_without_code\n"
+            "  - test_code: |\n"
+            "      def test_last():\n"
+            "          pass"
+        )
+        # The entry that is not valid YAML is recovered, the entry without code is skipped
+        assert tests == [{"test_code": "def test_inline(): assert {1: 2}"}]
+
+        tests = parser.close()
+
+        assert tests == [{"test_code": "def test_last():\n    pass\n"}]
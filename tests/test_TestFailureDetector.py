@@ -0,0 +1,91 @@
+import pytest
+
+from cover_agent.TestFailureDetector import TestFailureDetector, detect_framework
+
+
+def feed_lines(detector, *chunks):
+    for chunk in chunks:
+        failure_line = detector.feed("stdout", chunk.encode())
+        if failure_line is not None:
+            return failure_line
+    return None
+
+
+class TestTestFailureDetector:
+    @pytest.mark.parametrize(
+        "framework, output, failure_line",
+        [
+            ("pytest", "collected 3 items\n\ntest_app.py ..F", "test_app.py ..F"),
+            ("pytest", "test_app.py::test_add PASSED\ntest_app.py::test_sub FAILED   [ 66%]\n", "test_app.py::test_sub FAILED   [ 66%]"),
+            ("pytest", "..E.   [ 50%]\n", "..E.   [ 50%]"),
+            ("go", "=== RUN   TestAdd\n    --- FAIL: TestAdd (0.00s)\n", "    --- FAIL: TestAdd (0.00s)"),
+            ("jest", "PASS src/a.test.js\nFAIL src/app.test.js\n", "FAIL src/app.test.js"),
+            ("jest", "  ✓ adds (2 ms)\n  ✕ subtracts (3 ms)\n", "  ✕ subtracts (3 ms)"),
+            ("gradle", "> Task :test\n\nAppTest > testAdd() FAILED\n", "AppTest > testAdd() FAILED"),
+        ],
+    )
+    def test_detects_the_first_failure(self, framework, output, failure_line):
+        assert feed_lines(TestFailureDetector(framework), output) == failure_line
+
+    @pytest.mark.parametrize(
+        "framework, output",
+        [
+            ("pytest", "collected 3 items\n\ntest_app.py ...s.   [100%]\n\n===== 4 passed in 0.01s =====\n"),
+            ("go", "=== RUN   TestAdd\n--- PASS: TestAdd (0.00s)\nPASS\nok  \texample.com/app\t0.002s\n"),
+            ("jest", "PASS src/app.test.js\n  ✓ adds (2 ms)\nTests:       1 passed, 1 total\n"),
+            ("gradle", "> Task :test\n\nAppTest > testAdd() PASSED\n\nBUILD SUCCESSFUL in 2s\n"),
+        ],
+    )
+    def test_passing_runs_are_not_detected(self, framework, output):
+        assert feed_lines(TestFailureDetector(framework), output) is None
+
+    def test_lines_split_across_reads(self):
+        detector = TestFailureDetector("go")
+        assert feed_lines(detector, "--- FA") is None
+        assert feed_lines(detector, "IL: TestAdd (0.00s)\n") == "--- FAIL: TestAdd (0.00s)"
+
+    def test_characters_split_across_reads(self):
+        detector = TestFailureDetector("jest")
+        data = "  ✕ subtracts\n".encode()
+        assert detector.feed("stderr", data[:3]) is None
+        assert detector.feed("stderr", data[3:]) == "  ✕ subtracts"
+
+    @pytest.mark.parametrize(
+        "reads",
+        [
+            (b"test_app.py ...  [100%]\nE", b"xception ignored in: <function Popen.__del__>\n"),
+            (b"Wrote XML report to coverage.xml\nF", b"inished in 0.2s\n"),
+        ],
+    )
+    def test_start_of_an_unrelated_line_is_not_a_failure(self, reads):
+        detector = TestFailureDetector("pytest")
+        assert [detector.feed("stdout", data) for data in reads] == [None, None]
+
+    def test_quiet_progress_is_detected_at_the_end_of_its_line(self):
+        detector = TestFailureDetector("pytest")
+        assert detector.feed("stdout", b"..F") is None
+        assert detector.feed("stdout", b".   [100%]\n") == "..F.   [100%]"
+
+    def test_streams_have_their_own_lines(self):
+        detector = TestFailureDetector("pytest")
+        assert detector.feed("stdout", b"test_app.py ..") is None
+        assert detector.feed("stderr", b"warning: F\n") is None
+        assert detector.feed("stdout", b"F") == "test_app.py ..F"
+
+
+class TestFromMode:
+    def test_auto_detects_the_framework_of_the_test_command(self):
+        assert detect_framework("coverage run -m pytest tests") == "pytest"
+        assert detect_framework("go test -coverprofile=coverage.out ./...") == "go"
+        assert detect_framework("npx jest --coverage") == "jest"
+        assert detect_framework("./gradlew test jacocoTestReport") == "gradle"
+        assert TestFailureDetector.from_mode("auto", "npx jest --coverage").framework == "jest"
+        assert TestFailureDetector.from_mode("auto", "python -m unittest") is None
+
+    def test_off_and_named_modes(self):
+        assert TestFailureDetector.from_mode("off", "pytest") is None
+        assert TestFailureDetector.from_mode("go", "make test").framework == "go"
+
+    def test_unsupported_mode(self):
+        with pytest.raises(ValueError):
+            TestFailureDetector.from_mode("mocha", "npx mocha")
@@ -0,0 +1,47 @@
+from cover_agent.TestFingerprintIndex import TestFingerprintIndex
+
+TEST_ADD = (
+    "def test_add():\n"
+    '    """Test the add endpoint."""\n'
+    '    response = client.get("/add/2/3")\n'
+    "    assert response.status_code == 200\n"
+    '    assert response.json() == {"result": 5}\n'
+)
+
+
+class TestTestFingerprintIndex:
+    def test_normalize_erases_names_docstrings_and_comments(self):
+        renamed = (
+            "    def test_add_two_numbers():\n"
+            "        # Call the endpoint\n"
+            "        resp = client.get('/add/2/3')\n"
+            "        assert resp.status_code == 200\n"
+            "        assert resp.json() == {'result': 5}\n"
+        )
+        assert TestFingerprintIndex.normalize(renamed) == TestFingerprintIndex.normalize(TEST_ADD)
+        assert TestFingerprintIndex.normalize("it('adds', () => {\n  expect(add(1, 2)).toBe(3);\n});") == (
+            "it ( ' adds ' , ( ) = > { expect ( add ( 1 , 2 ) ) . toBe ( 3 ) ; } ) ;"
+        )
+
+    def test_exact_duplicate(self):
+        index = TestFingerprintIndex()
+        index.add(TEST_ADD, "FAIL")
+        assert index.find(TEST_ADD.replace("test_add", "test_addition")) == ("FAIL", 1.0)
+
+    def test_near_duplicate(self):
+        index = TestFingerprintIndex(threshold=0.6)
+        index.add(TEST_ADD, "PASS")
+        status, similarity = index.find(TEST_ADD + "    assert response.headers['content-type'] == 'application/json'\n")
+        assert status == "PASS"
+        assert 0.6 <= similarity < 1.0
+
+    def test_different_test(self):
+        index = TestFingerprintIndex()
+        index.add(TEST_ADD, "PASS")
+        different_test = (
+            "def test_divide_by_zero():\n"
+            '    response = client.get("/divide/1/0")\n'
+            "    assert response.status_code == 400\n"
+            '    assert response.json() == {"detail": "Cannot divide by zero"}\n'
+        )
+        assert index.find(different_test) is None
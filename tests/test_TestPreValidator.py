@@ -0,0 +1,52 @@
+import pytest
+from unittest.mock import patch
+
+from cover_agent.TestPreValidator import TestPreValidator
+
+
+class TestTestPreValidator:
+    def test_syntax_error(self):
+        error_message = TestPreValidator().check(
+            "test_app.py", "def test_add():\n    assert add(1, 2) == 3\n\ndef test_broken(:\n    pass\n", {}
+        )
+        assert error_message == "SyntaxError: invalid syntax (line 4): def test_broken(:"
+
+    def test_valid_test_and_other_languages_pass(self):
+        assert TestPreValidator().check("test_app.py", "def test_add():\n    pass\n", {}) is None
+        assert TestPreValidator().check("app.test.js", "it('adds', () => {", {}) is None
+        assert TestPreValidator(mode="off").check("test_app.py", "def test_broken(:", {}) is None
+
+    def test_missing_imports(self, tmp_path):
+        (tmp_path / "app.py").write_text("")
+        (tmp_path / "helpers").mkdir()
+        generated_test = {
+            "new_imports_code": '"import os\nfrom app import add\nimport not_installed_module"',
+            "test_code": "def test_add():\n    from helpers.data import DATA\n    import other_missing.sub\n    from . import local\n",
+        }
+        validator = TestPreValidator(mode="imports", search_dirs=[str(tmp_path)])
+        assert validator.find_missing_python_modules(generated_test) == ["not_installed_module", "other_missing"]
+        assert validator.check("test_app.py", "", generated_test) == (
+            "ModuleNotFoundError: No module named 'not_installed_module', 'other_missing'"
+        )
+        # Imports are only checked in "imports" mode
+        assert TestPreValidator(search_dirs=[str(tmp_path)]).check("test_app.py", "", generated_test) is None
+
+    def test_compile_command(self):
+        validator = TestPreValidator(compile_command="go")
+        with patch("cover_agent.TestPreValidator.Runner.run_command", return_value=("vet: undefined: foo", "", 1, 0)) as mock_run:
+            assert validator.run_compile_command("app_test.go", "/project") == "Compilation failed:\nvet: undefined: foo"
+        mock_run.assert_called_once_with(command="go vet .", cwd="/project")
+
+        with patch("cover_agent.TestPreValidator.Runner.run_command", return_value=("", "", 0, 0)):
+            assert validator.run_compile_command("app_test.go", "/project") is None
+        assert TestPreValidator().run_compile_command("app_test.go", "/project") is None
+
+    def test_compile_command_runs_without_the_in_process_checks(self):
+        validator = TestPreValidator(mode="off", compile_command="typescript")
+        with patch("cover_agent.TestPreValidator.Runner.run_command", return_value=("", "TS2304", 2, 0)) as mock_run:
+            assert validator.run_compile_command("app.test.ts", "/project") == "Compilation failed:\nTS2304"
+        mock_run.assert_called_once_with(command="npx tsc --noEmit app.test.ts", cwd="/project")
+
+    def test_unsupported_mode(self):
+        with pytest.raises(ValueError, match="Unsupported pre-validation mode"):
+            TestPreValidator(mode="strict")
@@ -0,0 +1,76 @@
+from cover_agent.TestSuiteAnalyzer import (
+    PythonTestSuiteAnalyzer,
+    analysis_cache_key,
+    analyze_test_file,
+)
+
+
+class TestPythonTestSuiteAnalyzer:
+    def test_module_level_tests(self):
+        content = (
+            '"""Tests of the app."""\n'
+            "import pytest\n"
+            "from app import (\n"
+            "    add,\n"
+            ")\n"
+            "\n"
+            "\n"
+            "def test_add():\n"
+            "    assert add(1, 2) == 3\n"
+            "\n"
+            "\n"
+            "if __name__ == '__main__':\n"
+            "    pytest.main()\n"
+        )
+        assert PythonTestSuiteAnalyzer().analyze(content) == {
+            "test_headers_indentation": 0,
+            "relevant_line_number_to_insert_tests_after": 9,
+            "relevant_line_number_to_insert_imports_after": 5,
+        }
+
+    def test_tests_in_a_class(self):
+        content = (
+            "import unittest\n"
+            "\n"
+            "\n"
+            "class TestApp(unittest.TestCase):\n"
+            "    @unittest.skip('slow')\n"
+            "    def test_one(self):\n"
+            "        pass\n"
+            "\n"
+            "    async def test_two(self):\n"
+            "        pass\n"
+            "\n"
+            "    def helper(self):\n"
+            "        return 1\n"
+            "\n"
+            "\n"
+            "def run():\n"
+            "    unittest.main()\n"
+        )
+        assert PythonTestSuiteAnalyzer().analyze(content) == {
+            "test_headers_indentation": 4,
+            "relevant_line_number_to_insert_tests_after": 13,
+            "relevant_line_number_to_insert_imports_after": 1,
+        }
+
+    def test_imports_go_after_the_module_docstring_without_imports(self):
+        content = '"""Tests of the app.\n\nNo imports yet.\n"""\n\n\ndef test_add():\n    pass\n'
+        assert PythonTestSuiteAnalyzer().analyze(content)["relevant_line_number_to_insert_imports_after"] == 4
+        content = "def test_add():\n    pass\n"
+        assert PythonTestSuiteAnalyzer().analyze(content)["relevant_line_number_to_insert_imports_after"] == 0
+
+    def test_files_without_tests_or_with_syntax_errors_are_left_to_the_llm(self):
+        assert PythonTestSuiteAnalyzer().analyze("import pytest\n") is None
+        assert PythonTestSuiteAnalyzer().analyze("def test_broken(:\n    pass\n") is None
+
+
+def test_analyze_test_file_only_for_supported_languages():
+    content = "def test_add():\n    pass\n"
+    assert analyze_test_file("tests/test_app.py", content)["relevant_line_number_to_insert_tests_after"] == 2
+    assert analyze_test_file("src/app.test.js", content) is None
+
+
+def test_analysis_cache_key_depends_on_the_content():
+    assert analysis_cache_key("def test_a(): pass") == analysis_cache_key("def test_a(): pass")
+    assert analysis_cache_key("def test_a(): pass") != analysis_cache_key("def test_b(): pass")
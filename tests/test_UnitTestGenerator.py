@@ -1,12 +1,19 @@
+import asyncio
+import threading
 import pytest
 from cover_agent.UnitTestGenerator import (
+    TEST_SELECTION_TEMPLATES,
     UnitTestGenerator,
     extract_error_message_python,
 )
+from cover_agent.LineSet import LineSet
+from cover_agent.LLMCache import LLMCache
+from cover_agent.ResponseSchema import NEW_TESTS_SCHEMA
 from cover_agent.ReportGenerator import ReportGenerator
+from cover_agent.Runner import Runner
 import os
 
-from unittest.mock import patch, mock_open
+from unittest.mock import patch, mock_open, MagicMock, AsyncMock
 
 class TestUnitTestGenerator:
     def test_end_to_end1(self):
@@ -151,3 +158,528 @@ class TestExtractErrorMessage:
         expected = ""
         result = extract_error_message_python(fail_message)
         assert result == expected, f"Expected '{expected}', got '{result}'"
+
+
+@pytest.fixture
+def test_gen(tmp_path):
+    source_file = tmp_path / "app.py"
+    source_file.write_text("def add(a, b):\n    return a + b\n")
+    test_file = tmp_path / "test_app.py"
+    test_file.write_text("from app import add\n\n\ndef test_add():\n    assert add(1, 2) == 3\n")
+    with patch.object(UnitTestGenerator, "run_coverage"), patch.object(UnitTestGenerator, "build_prompt"):
+        test_gen = UnitTestGenerator(
+            source_file_path=str(source_file),
+            test_file_path=str(test_file),
+            code_coverage_report_path=str(tmp_path / "coverage.xml"),
+            test_command="pytest",
+            llm_model="gpt-4o",
+            test_command_dir=str(tmp_path),
+        )
+    test_gen.code_coverage_report = ""
+    test_gen.current_coverage = 0.5
+    test_gen.relevant_line_number_to_insert_tests_after = 5
+    test_gen.relevant_line_number_to_insert_imports_after = 1
+    test_gen.test_headers_indentation = 0
+    return test_gen
+
+
+class TestValidateTestsBatch:
+    GENERATED_TESTS = [
+        {"test_code": "def test_one():\n    assert True", "new_imports_code": "import os"},
+        {"test_code": "def test_two():\n    assert 1 + 1 == 2", "new_imports_code": ""},
+        {"test_code": "def test_three():\n    assert False", "new_imports_code": ""},
+    ]
+
+    def test_batch_passes_with_single_run(self, test_gen):
+        with patch("cover_agent.UnitTestGenerator.Runner.run_command", return_value=("", "", 0, 0)) as mock_run, \
+                patch("cover_agent.UnitTestGenerator.CoverageProcessor") as mock_processor:
+            mock_processor.return_value.process_coverage_report.return_value = ([1, 2], [], 1.0)
+            results = test_gen.validate_tests_batch(self.GENERATED_TESTS, {})
+
+        assert mock_run.call_count == 1
+        assert [result["status"] for result in results] == ["PASS", "PASS", "PASS"]
+        assert test_gen.current_coverage == 1.0
+        assert test_gen.relevant_line_number_to_insert_tests_after == 6
+        with open(test_gen.test_file_path) as f:
+            content = f.read()
+        assert content.startswith("from app import add\nimport os\n")
+        assert "def test_one()" in content and "def test_three()" in content
+
+    def test_imports_are_inserted_at_the_start_of_a_file_without_imports(self, test_gen):
+        test_gen.relevant_line_number_to_insert_tests_after = 2
+        test_gen.relevant_line_number_to_insert_imports_after = 0
+
+        content, inserted_imports_line_count = test_gen._insert_tests(
+            "def test_add():\n    pass\n", [self.GENERATED_TESTS[0]]
+        )
+
+        assert inserted_imports_line_count == 1
+        assert content.startswith("import os\ndef test_add():\n")
+        assert "def test_one():" in content
+
+    def test_failed_batch_is_bisected(self, test_gen):
+        with open(test_gen.test_file_path) as f:
+            original_content = f.read()
+
+        def run_command(command, cwd=None, timeout=None, idle_timeout=None, failure_detector=None):
+            with open(test_gen.test_file_path) as f:
+                exit_code = 1 if "test_three" in f.read() else 0
+            return "", "", exit_code, 0
+
+        with patch("cover_agent.UnitTestGenerator.Runner.run_command", side_effect=run_command) as mock_run, \
+                patch("cover_agent.UnitTestGenerator.CoverageProcessor") as mock_processor:
+            mock_processor.return_value.process_coverage_report.return_value = ([1, 2], [], 1.0)
+            results = test_gen.validate_tests_batch(self.GENERATED_TESTS, {})
+
+        # Runs: the full batch, the first half (test_one), the second half, then test_two and test_three alone
+        assert mock_run.call_count == 5
+        assert [result["status"] for result in results] == ["PASS", "FAIL", "FAIL"]
+        assert results[1]["reason"] == "Coverage did not increase"
+        assert results[2]["reason"] == "Test failed"
+        with open(test_gen.test_file_path) as f:
+            content = f.read()
+        assert "def test_one()" in content
+        assert "def test_three()" not in content
+        assert content != original_content
+
+    def test_batch_that_does_not_compile_is_bisected(self, test_gen):
+        test_gen.pre_validator.mode = "off"
+        test_gen.pre_validator.compile_command = "compile {test_file}"
+        commands = []
+
+        def run_command(command, cwd=None, timeout=None, idle_timeout=None, failure_detector=None):
+            commands.append(command)
+            with open(test_gen.test_file_path) as f:
+                exit_code = 1 if command.startswith("compile") and "test_three" in f.read() else 0
+            return "", "undefined: foo", exit_code, 0
+
+        with patch("cover_agent.UnitTestGenerator.Runner.run_command", side_effect=run_command), \
+                patch("cover_agent.TestPreValidator.Runner.run_command", side_effect=run_command), \
+                patch("cover_agent.UnitTestGenerator.CoverageProcessor") as mock_processor:
+            mock_processor.return_value.process_coverage_report.return_value = ([1, 2], [], 1.0)
+            results = test_gen.validate_tests_batch(self.GENERATED_TESTS, {})
+
+        # The batch that does not compile is not run with the test command
+        assert commands[0] == f"compile {test_gen.test_file_path}"
+        assert commands[1].startswith("compile")
+        assert results[2]["reason"] == "Pre-validation failed"
+        assert results[2]["stderr"] == "Compilation failed:\nundefined: foo"
+        with open(test_gen.test_file_path) as f:
+            assert "def test_three()" not in f.read()
+
+    def test_validate_tests_parallel_merges_accepted_tests(self, test_gen):
+        test_gen.sandbox_workers = 2
+        sandbox_results = [
+            {"exit_code": 0, "stdout": "", "stderr": "", "lines_covered": [], "percentage_covered": 0.75, "error": None},
+            {"exit_code": 0, "stdout": "", "stderr": "", "lines_covered": [], "percentage_covered": 0.5, "error": None},
+            {"exit_code": 1, "stdout": "=== FAILURES ===\nassert False\n=== 1 failed ===", "stderr": "", "lines_covered": [], "percentage_covered": None, "error": None},
+        ]
+        with patch("cover_agent.UnitTestGenerator.SandboxPool") as mock_pool, \
+                patch.object(UnitTestGenerator, "validate_tests_batch", return_value=[{"status": "PASS"}]) as mock_batch:
+            mock_pool.return_value.validate.return_value = sandbox_results
+            results = test_gen.validate_tests_parallel(self.GENERATED_TESTS, {})
+
+        contents = mock_pool.return_value.validate.call_args[0][0]
+        assert len(contents) == 3
+        assert "def test_two()" in contents[1] and "def test_one()" not in contents[1]
+        mock_batch.assert_called_once_with([self.GENERATED_TESTS[0]], {})
+        assert results[0]["status"] == "PASS"
+        assert results[1]["reason"] == "Coverage did not increase"
+        assert results[2]["reason"] == "Test failed"
+        assert test_gen.failed_test_runs[-1]["error_message"] == "assert False"
+
+    def test_validate_tests_parallel_rejects_tests_that_do_not_compile(self, test_gen):
+        test_gen.sandbox_workers = 2
+        test_gen.pre_validator.compile_command = "compile {test_file}"
+        sandbox_results = [
+            {"exit_code": 0, "stdout": "", "stderr": "", "lines_covered": [], "percentage_covered": 0.75, "error": None, "compile_failed": False},
+            {"exit_code": 2, "stdout": "", "stderr": "undefined: foo", "lines_covered": [], "percentage_covered": None, "error": None, "compile_failed": True},
+        ]
+        with patch("cover_agent.UnitTestGenerator.SandboxPool") as mock_pool, \
+                patch.object(UnitTestGenerator, "validate_tests_batch", return_value=[{"status": "PASS"}]) as mock_batch:
+            mock_pool.return_value.validate.return_value = sandbox_results
+            results = test_gen.validate_tests_parallel(self.GENERATED_TESTS[:2], {})
+
+        compile_command = mock_pool.return_value.validate.call_args.kwargs["compile_command"]
+        assert compile_command == f"compile {os.path.abspath(test_gen.test_file_path)}"
+        mock_batch.assert_called_once_with([self.GENERATED_TESTS[0]], {})
+        assert results[1]["reason"] == "Pre-validation failed"
+        assert results[1]["stderr"] == "Compilation failed:\nundefined: foo"
+
+
+class TestSingleTestValidation:
+    @pytest.mark.parametrize(
+        "template, test_code, expected_command",
+        [
+            ("pytest", "def test_add_numbers():\n    assert True", 'pytest "test_app.py::test_add_numbers"'),
+            ("go", "func TestAdd(t *testing.T) {\n}", "pytest -run '^TestAdd$'"),
+            ("jest", "test('adds numbers', () => {\n});", 'pytest -t "adds numbers"'),
+            ("gradle", 'def "adds two numbers"() {\n}', 'pytest --tests "*adds two numbers"'),
+            ("make test TESTS={test_file}:{test_name}", "def test_add():\n    pass", "make test TESTS=test_app.py:test_add"),
+        ],
+    )
+    def test_get_single_test_command(self, template, test_code, expected_command):
+        test_gen = UnitTestGenerator.__new__(UnitTestGenerator)
+        test_gen.test_command = "pytest"
+        test_gen.test_file_path = "test_app.py"
+        test_gen.test_command_dir = os.getcwd()
+        test_gen.single_test_command = TEST_SELECTION_TEMPLATES.get(template, template)
+        test_gen.lines_covered = LineSet([1])
+        test_gen.lines_missed = LineSet([2])
+
+        assert test_gen.get_single_test_command({"test_code": test_code}) == expected_command
+
+    def test_pytest_node_id_selects_only_the_new_test(self, test_gen):
+        with open(test_gen.test_file_path, "a") as test_file:
+            test_file.write(
+                "\n\ndef test_add_negative():\n    assert False\n\n\n"
+                "class TestAddition:\n    def test_add(self):\n        assert False\n"
+            )
+        test_gen.test_command = "python -m pytest -p no:cacheprovider"
+        test_gen.single_test_command = TEST_SELECTION_TEMPLATES["pytest"]
+        test_gen.lines_covered, test_gen.lines_missed = LineSet([1]), LineSet([2])
+
+        command = test_gen.get_single_test_command({"test_code": "def test_add():\n    assert add(1, 2) == 3"})
+        stdout, _, exit_code, _ = Runner.run_command(command, cwd=test_gen.test_command_dir)
+
+        # "-k test_add" would also run test_add_negative and TestAddition.test_add, which fail
+        assert command == 'python -m pytest -p no:cacheprovider "test_app.py::test_add"'
+        assert exit_code == 0
+        assert "1 passed" in stdout
+        assert test_gen.get_test_node_id("test_missing") == "test_app.py::test_missing"
+
+    def test_single_test_command_path_is_relative_to_the_command_dir(self, test_gen, tmp_path, monkeypatch):
+        # As in "--test-file-path project/test_app.py --test-command-dir project", run from the parent directory
+        monkeypatch.chdir(tmp_path.parent)
+        test_gen.test_file_path = os.path.join(tmp_path.name, "test_app.py")
+        test_gen.test_command_dir = tmp_path.name
+        test_gen.test_command = "python -m pytest -p no:cacheprovider"
+        test_gen.lines_covered, test_gen.lines_missed = LineSet([1]), LineSet([2])
+        generated_test = {"test_code": "def test_add():\n    assert add(1, 2) == 3"}
+
+        test_gen.single_test_command = TEST_SELECTION_TEMPLATES["pytest"]
+        command = test_gen.get_single_test_command(generated_test)
+        stdout, _, exit_code, _ = Runner.run_command(command, cwd=test_gen.test_command_dir)
+        assert command == 'python -m pytest -p no:cacheprovider "test_app.py::test_add"'
+        assert exit_code == 0
+        assert "1 passed" in stdout
+
+        test_gen.single_test_command = "make test TESTS={test_file}:{test_name}"
+        assert test_gen.get_single_test_command(generated_test) == "make test TESTS=test_app.py:test_add"
+
+    def test_pytest_node_id_of_a_test_in_a_class(self, test_gen):
+        with open(test_gen.test_file_path, "w") as test_file:
+            test_file.write("class TestAddition:\n    def test_add_numbers(self):\n        assert True\n")
+
+        assert test_gen.get_test_node_id("test_add_numbers") == "test_app.py::TestAddition::test_add_numbers"
+
+    def test_get_single_test_command_without_line_data(self, test_gen):
+        test_gen.single_test_command = TEST_SELECTION_TEMPLATES["pytest"]
+        test_gen.lines_covered, test_gen.lines_missed = LineSet(), LineSet()
+
+        assert test_gen.get_single_test_command({"test_code": "def test_add():\n    pass"}) == "pytest"
+
+    def test_validate_test_merges_single_test_coverage(self, test_gen):
+        test_gen.single_test_command = TEST_SELECTION_TEMPLATES["pytest"]
+        test_gen.lines_covered, test_gen.lines_missed = LineSet([1, 2]), LineSet([3, 4])
+        generated_test = {"test_code": "def test_new():\n    assert True", "new_imports_code": ""}
+
+        with patch("cover_agent.UnitTestGenerator.Runner.run_command", return_value=("", "", 0, 0)) as mock_run, \
+                patch("cover_agent.UnitTestGenerator.CoverageProcessor") as mock_processor:
+            # The report of the single test run only holds the lines covered by the new test
+            mock_processor.return_value.process_coverage_report.return_value = ([1, 3], [2, 4], 0.5)
+            result = test_gen.validate_test(generated_test, {})
+
+        assert mock_run.call_args.kwargs["command"] == 'pytest "test_app.py::test_new"'
+        assert result["status"] == "PASS"
+        assert test_gen.lines_covered.to_list() == [1, 2, 3]
+        assert test_gen.lines_missed.to_list() == [4]
+        assert result["new_lines_covered"] == [3]
+        assert test_gen.current_coverage == 0.75
+
+    def test_validate_test_stops_at_the_first_failure(self, test_gen):
+        test_gen.early_abort = "auto"
+        generated_test = {"test_code": "def test_new():\n    assert False", "new_imports_code": ""}
+        stdout = "test_app.py F\n=== FAILURES ===\nassert False\n=== short test summary info ==="
+
+        with patch("cover_agent.UnitTestGenerator.Runner.run_command", return_value=(stdout, "", 1, 0)) as mock_run:
+            result = test_gen.validate_test(generated_test, {})
+
+        assert mock_run.call_args.kwargs["failure_detector"].framework == "pytest"
+        assert result["reason"] == "Test failed"
+        assert test_gen.failed_test_runs[-1]["error_message"] == "assert False"
+
+
+class TestLineCoverageAccounting:
+    def test_accepts_test_covering_a_new_line(self, test_gen):
+        test_gen.update_coverage([1, 2], [3, 4], 0.5)
+        generated_test = {"test_code": "def test_new():\n    assert True", "new_imports_code": ""}
+
+        with patch("cover_agent.UnitTestGenerator.Runner.run_command", return_value=("", "", 0, 0)), \
+                patch("cover_agent.UnitTestGenerator.CoverageProcessor") as mock_processor:
+            # Same percentage, but line 3 was missed in the baseline
+            mock_processor.return_value.process_coverage_report.return_value = ([1, 3], [2, 4], 0.5)
+            result = test_gen.validate_test(generated_test, {})
+
+        assert result["status"] == "PASS"
+        assert result["new_lines_covered"] == [3]
+        assert test_gen.lines_missed.to_list() == [2, 4]
+
+    def test_rejects_test_without_new_lines(self, test_gen):
+        test_gen.update_coverage([1, 2], [3, 4], 0.5)
+        generated_test = {"test_code": "def test_new():\n    assert True", "new_imports_code": ""}
+
+        with patch("cover_agent.UnitTestGenerator.Runner.run_command", return_value=("", "", 0, 0)), \
+                patch("cover_agent.UnitTestGenerator.CoverageProcessor") as mock_processor:
+            mock_processor.return_value.process_coverage_report.return_value = ([1, 2], [3, 4], 0.5)
+            result = test_gen.validate_test(generated_test, {})
+
+        assert result["status"] == "FAIL"
+        assert result["reason"] == "Coverage did not increase"
+
+    def test_coverage_summary_in_ranges(self, test_gen):
+        test_gen.coverage_format = "missed-ranges"
+        with patch("cover_agent.UnitTestGenerator.read_file_cached", return_value=("def add(a, b):\n    return a + b\n", "")):
+            test_gen.update_coverage([1], [2, 3], 0.5)
+
+        assert test_gen.code_coverage_report == (
+            "Lines missed, by function:\n- outside functions: 3\n- add: 2\nPercentage covered: 50.0%"
+        )
+
+    def test_falls_back_to_percentage_without_line_data(self, test_gen):
+        test_gen.update_coverage([], [], 0.5)
+
+        assert test_gen.get_coverage_increase([], 0.6) == (True, [])
+        assert test_gen.get_coverage_increase([], 0.5) == (False, [])
+
+
+class TestInitialTestSuiteAnalysis:
+    def test_analyses_run_concurrently(self, test_gen):
+        in_flight = []
+        max_in_flight = []
+
+        async def acall_model(prompt, max_tokens=4096):
+            in_flight.append(prompt)
+            max_in_flight.append(len(in_flight))
+            await asyncio.sleep(0)
+            in_flight.remove(prompt)
+            if prompt == "analyze_suite_test_headers_indentation":
+                return "test_headers_indentation: 4", 10, 10
+            return "relevant_line_number_to_insert_tests_after: 12\nrelevant_line_number_to_insert_imports_after: 2", 10, 10
+
+        test_gen.prompt_builder = MagicMock()
+        test_gen.prompt_builder.build_prompt_custom.side_effect = lambda file: file
+        test_gen.ai_caller.acall_model = acall_model
+
+        # A test file without a static analyzer is analyzed by the LLM
+        with patch("cover_agent.UnitTestGenerator.analyze_test_file", return_value=None):
+            test_gen.initial_test_suite_analysis()
+
+        assert max(max_in_flight) == 2
+        assert test_gen.test_headers_indentation == 4
+        assert test_gen.relevant_line_number_to_insert_tests_after == 12
+        assert test_gen.relevant_line_number_to_insert_imports_after == 2
+
+    def test_analysis_failure(self, test_gen):
+        test_gen.prompt_builder = MagicMock()
+        test_gen.ai_caller.acall_model = AsyncMock(return_value=("unrelated: 1", 10, 10))
+
+        with patch("cover_agent.UnitTestGenerator.analyze_test_file", return_value=None), pytest.raises(
+            Exception, match="Error during initial test suite analysis"
+        ):
+            test_gen.initial_test_suite_analysis()
+
+    def test_python_test_file_is_analyzed_without_the_llm(self, test_gen):
+        test_gen.ai_caller.acall_model = AsyncMock()
+
+        test_gen.initial_test_suite_analysis()
+
+        test_gen.ai_caller.acall_model.assert_not_called()
+        assert test_gen.test_headers_indentation == 0
+        assert test_gen.relevant_line_number_to_insert_tests_after == 5
+        assert test_gen.relevant_line_number_to_insert_imports_after == 1
+
+    def test_analysis_is_cached_by_test_file_content_without_an_llm_cache(self, test_gen):
+        test_gen.ai_caller.cache = None
+        test_gen.ai_caller.acall_model = AsyncMock(
+            side_effect=[
+                ("test_headers_indentation: 2", 10, 10),
+                ("relevant_line_number_to_insert_tests_after: 3", 10, 10),
+                ("test_headers_indentation: 4", 10, 10),
+                ("relevant_line_number_to_insert_tests_after: 7", 10, 10),
+            ]
+        )
+        test_gen.prompt_builder = MagicMock()
+
+        with patch("cover_agent.UnitTestGenerator.analyze_test_file", return_value=None):
+            test_gen.initial_test_suite_analysis()
+            test_gen.initial_test_suite_analysis()
+            assert test_gen.ai_caller.acall_model.call_count == 2
+
+            # A changed test file is analyzed again
+            with open(test_gen.test_file_path, "a") as f:
+                f.write("\n\ndef test_sub():\n    pass\n")
+            test_gen.initial_test_suite_analysis()
+
+        assert test_gen.ai_caller.acall_model.call_count == 4
+        assert test_gen.test_headers_indentation == 4
+        assert test_gen.relevant_line_number_to_insert_tests_after == 7
+
+    def test_analysis_is_cached_by_test_file_content(self, test_gen, tmp_path):
+        test_gen.ai_caller.cache = LLMCache(str(tmp_path / "cache"))
+        test_gen.ai_caller.acall_model = AsyncMock(
+            side_effect=[
+                ("test_headers_indentation: 2", 10, 10),
+                ("relevant_line_number_to_insert_tests_after: 3", 10, 10),
+            ]
+        )
+        test_gen.prompt_builder = MagicMock()
+
+        with patch("cover_agent.UnitTestGenerator.analyze_test_file", return_value=None):
+            test_gen.initial_test_suite_analysis()
+            test_gen.initial_test_suite_analysis()
+
+        assert test_gen.ai_caller.acall_model.call_count == 2
+        assert test_gen.test_headers_indentation == 2
+        assert test_gen.relevant_line_number_to_insert_tests_after == 3
+
+
+class TestGenerateTestsIncrementally:
+    def test_first_test_is_yielded_while_the_response_is_streamed(self, test_gen):
+        first_test_received = threading.Event()
+        first_test = "new_tests:\n- test_code: |\n    def test_one():\n        pass\n"
+        second_test = "- test_code: |\n    def test_two():\n        pass\n"
+
+        def call_model(prompt, max_tokens=4096, on_text=None):
+            on_text(first_test)
+            on_text("- test_code: |\n")
+            # The rest of the response is only written once the first test was received
+            assert first_test_received.wait(timeout=5)
+            on_text(second_test[len("- test_code: |\n"):])
+            return first_test + second_test, 10, 10
+
+        test_gen.ai_caller.call_model = call_model
+        tests = []
+        for generated_test, generated_tests_dict in test_gen.generate_tests_incrementally():
+            tests.append(generated_test["test_code"])
+            first_test_received.set()
+
+        assert tests == ["def test_one():\n    pass\n", "def test_two():\n    pass\n"]
+
+    def test_tests_only_found_in_the_full_response(self, test_gen):
+        response = "new_tests:\n- test_code: |\n    def test_cached():\n        pass\n"
+        # A cached response is returned without being streamed
+        test_gen.ai_caller.call_model = lambda prompt, max_tokens=4096, on_text=None: (response, 10, 10)
+
+        tests = list(test_gen.generate_tests_incrementally())
+
+        assert [generated_test["test_code"].strip() for generated_test, _ in tests] == ["def test_cached():\n    pass"]
+
+    def test_llm_error_is_raised(self, test_gen):
+        test_gen.ai_caller.call_model = MagicMock(side_effect=RuntimeError("provider down"))
+
+        with pytest.raises(RuntimeError, match="provider down"):
+            list(test_gen.generate_tests_incrementally())
+
+
+class TestStructuredOutput:
+    def test_unsupported_model_uses_yaml(self, test_gen):
+        assert not test_gen.structured_output
+        assert test_gen.structured_output_params(NEW_TESTS_SCHEMA) == {}
+
+    def test_generate_tests_requests_and_validates_json(self, test_gen):
+        test_gen.structured_output = True
+        test_gen.build_prompt = MagicMock(return_value={"system": "", "user": "Write the tests."})
+        response = '{"language": "python", "new_tests": [{"test_code": "def test_one():\\n    pass\\n"}]}'
+        test_gen.ai_caller.call_model = MagicMock(return_value=(response, 10, 10))
+
+        tests_dict = test_gen.generate_tests()
+
+        assert tests_dict["new_tests"] == [{"test_code": "def test_one():\n    pass\n"}]
+        response_format = test_gen.ai_caller.call_model.call_args.kwargs["response_format"]
+        assert response_format == NEW_TESTS_SCHEMA.response_format()
+
+    def test_response_not_matching_the_schema_is_parsed_as_yaml(self, test_gen):
+        test_gen.structured_output = True
+        response = "new_tests:\n- test_code: |\n    def test_one():\n        pass\n"
+
+        assert test_gen.parse_response(response, NEW_TESTS_SCHEMA)["new_tests"][0]["test_code"].startswith("def test_one")
+
+
+class TestPreValidation:
+    def test_test_with_syntax_error_is_not_run(self, test_gen):
+        generated_test = {"test_code": "def test_broken(:\n    assert True", "new_imports_code": ""}
+        with open(test_gen.test_file_path) as f:
+            original_content = f.read()
+
+        with patch("cover_agent.UnitTestGenerator.Runner.run_command") as mock_run:
+            result = test_gen.validate_test(generated_test, {})
+
+        mock_run.assert_not_called()
+        assert result["reason"] == "Pre-validation failed"
+        assert result["stderr"].startswith("SyntaxError")
+        assert test_gen.failed_test_runs == [{"code": generated_test, "error_message": result["stderr"]}]
+        with open(test_gen.test_file_path) as f:
+            assert f.read() == original_content
+
+    def test_compile_command_failure_rolls_back(self, test_gen):
+        test_gen.pre_validator.compile_command = "compile {test_file}"
+        generated_test = {"test_code": "def test_new():\n    assert True", "new_imports_code": ""}
+        with open(test_gen.test_file_path) as f:
+            original_content = f.read()
+
+        with patch("cover_agent.UnitTestGenerator.Runner.run_command", return_value=("", "undefined: foo", 1, 0)) as mock_run:
+            result = test_gen.validate_test(generated_test, {})
+
+        # Only the compile command ran, not the test command
+        mock_run.assert_called_once_with(command=f"compile {test_gen.test_file_path}", cwd=test_gen.test_command_dir)
+        assert result["stderr"] == "Compilation failed:\nundefined: foo"
+        with open(test_gen.test_file_path) as f:
+            assert f.read() == original_content
+
+    def test_rejected_tests_are_left_out_of_the_batch(self, test_gen):
+        generated_tests = [
+            {"test_code": "def test_one():\n    assert True", "new_imports_code": ""},
+            {"test_code": "def test_two(:\n    assert True", "new_imports_code": ""},
+            {"test_code": "def test_three():\n    assert True", "new_imports_code": ""},
+        ]
+        with patch("cover_agent.UnitTestGenerator.Runner.run_command", return_value=("", "", 0, 0)) as mock_run, \
+                patch("cover_agent.UnitTestGenerator.CoverageProcessor") as mock_processor:
+            mock_processor.return_value.process_coverage_report.return_value = ([1, 2], [], 1.0)
+            results = test_gen.validate_tests_batch(generated_tests, {})
+
+        assert mock_run.call_count == 1
+        assert [result["status"] for result in results] == ["PASS", "FAIL", "PASS"]
+        assert results[1]["reason"] == "Pre-validation failed"
+        with open(test_gen.test_file_path) as f:
+            content = f.read()
+        assert "def test_one()" in content and "def test_three()" in content and "test_two" not in content
+
+
+class TestDuplicateDetection:
+    def test_duplicate_of_a_failed_test_is_skipped(self, test_gen):
+        failing_test = {"test_code": "def test_new():\n    assert add(1, 1) == 3", "new_imports_code": ""}
+        renamed_test = {"test_code": "def test_new_again():\n    assert add(1, 1) == 3", "new_imports_code": ""}
+        with patch("cover_agent.UnitTestGenerator.Runner.run_command", return_value=("", "", 1, 0)) as mock_run:
+            assert test_gen.validate_test(failing_test, {})["reason"] == "Test failed"
+            result = test_gen.validate_test(renamed_test, {})
+
+        assert mock_run.call_count == 1
+        assert result["reason"] == "Duplicate test"
+        assert test_gen.failed_test_runs[-1]["error_message"] == "duplicate of a test that already failed (similarity 100%)"
+
+    def test_duplicates_are_left_out_of_the_batch(self, test_gen):
+        test_gen.fingerprint_index.add("def test_old():\n    assert add(2, 2) == 4", "PASS")
+        generated_tests = [
+            {"test_code": "def test_one():\n    assert add(1, 2) == 3", "new_imports_code": ""},
+            {"test_code": "def test_same_as_old():\n    assert add(2, 2) == 4", "new_imports_code": ""},
+        ]
+        with patch("cover_agent.UnitTestGenerator.Runner.run_command", return_value=("", "", 0, 0)) as mock_run, \
+                patch("cover_agent.UnitTestGenerator.CoverageProcessor") as mock_processor:
+            mock_processor.return_value.process_coverage_report.return_value = ([1, 2], [], 1.0)
+            results = test_gen.validate_tests_batch(generated_tests, {})
+
+        assert mock_run.call_count == 1
+        assert [result["reason"] for result in results] == ["", "Duplicate test"]
+        # The accepted test is recorded too
+        assert test_gen.fingerprint_index.find(generated_tests[0]["test_code"]) == ("PASS", 1.0)
@@ -5,6 +5,7 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from cover_agent.CoverAgent import CoverAgent
+from cover_agent.LLMCache import DEFAULT_CACHE_DIR
 
 # List of source/test files to iterate over:
 SOURCE_TEST_FILE_LIST = [
@@ -40,6 +41,28 @@ class Args:
         self.api_base = "http://localhost:11434"
         self.prompt_only = False
         self.strict_coverage = False
+        self.batch_validation = False
+        self.sandbox_workers = 0
+        self.sandbox_hardlinks = False
+        self.single_test_command = ""
+        self.coverage_index = False
+        self.llm_cache = "off"
+        self.llm_cache_dir = DEFAULT_CACHE_DIR
+        self.llm_cache_max_mb = 1024
+        self.llm_requests_per_minute = 0
+        self.llm_tokens_per_minute = 0
+        self.stream_output = "auto"
+        self.stream_tests = False
+        self.structured_output = False
+        self.pre_validation = "syntax"
+        self.compile_command = ""
+        self.slice_source = False
+        self.prompt_token_budget = 0
+        self.coverage_format = "lists"
+        self.test_timeout = 0
+        self.test_idle_timeout = 0
+        self.max_concurrent_commands = 0
+        self.early_abort = "off"
 
 if __name__ == "__main__":
     # Iterate through list of source and test files to run Cover Agent